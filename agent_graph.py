@@ -1,24 +1,18 @@
-import os
 from dotenv import load_dotenv
 from typing import Annotated, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_groq import ChatGroq
+from backend.llms import load_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
 
 # 1. Load Secrets
 load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 
 # 2. Define the "Memory State"
 class AgentState(TypedDict):
     messages: list  # This list stores the entire conversation history!
 
-# 3. Setup the Brain (Groq with LangChain)
-llm = ChatGroq(
-    groq_api_key=GROQ_API_KEY, 
-    model_name="llama-3.1-8b-instant",
-    temperature=0.6
-)
+# 3. Setup the Brain (Groq with LangChain; LLM_BACKEND=fake runs offline)
+llm = load_chat_model(temperature=0.6)
 
 # 4. Define the Node (The "Thinking" Step)
 def call_model(state: AgentState):
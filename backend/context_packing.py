@@ -0,0 +1,71 @@
+import re
+import numpy as np
+
+CONTEXT_BUDGET = 350      # Approx. tokens of retrieved context per prompt
+MMR_LAMBDA = 0.7          # 1.0 = pure relevance, 0.0 = pure diversity
+DUPLICATE_SIM = 0.92      # Passages this similar to one already picked are dropped
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def count_tokens(text):
+    """Rough LLM token count (~4 chars per token for English)."""
+    return (len(text) + 3) // 4
+
+
+def trim_to_tokens(text, budget):
+    """Cuts at a sentence boundary when possible, else at a word boundary."""
+    if count_tokens(text) <= budget:
+        return text
+    out = ""
+    for sentence in _SENTENCE_END.split(text):
+        candidate = f"{out} {sentence}".strip()
+        if count_tokens(candidate) > budget:
+            break
+        out = candidate
+    if not out:
+        out = text[:budget * 4].rsplit(" ", 1)[0]
+    return out
+
+
+def mmr_select(query_vec, vecs, k, lambda_=MMR_LAMBDA, duplicate_sim=DUPLICATE_SIM):
+    """Maximal marginal relevance over unit vectors. Returns picked row indices, best first."""
+    relevance = vecs @ query_vec
+    picked, pool = [], list(range(len(vecs)))
+    while pool and len(picked) < k:
+        if picked:
+            redundancy = (vecs[pool] @ vecs[picked].T).max(axis=1)
+        else:
+            redundancy = np.zeros(len(pool))
+        mmr = lambda_ * relevance[pool] - (1 - lambda_) * redundancy
+        best = int(np.argmax(mmr))
+        row = pool.pop(best)
+        if picked and redundancy[best] >= duplicate_sim:
+            continue  # Near-duplicate (overlapping PDF slices, re-saved facts)
+        picked.append(row)
+    # Final order: most relevant first
+    return sorted(picked, key=lambda i: -relevance[i])
+
+
+def pack_context(query_vec, texts, vecs, max_passages=5, budget=CONTEXT_BUDGET):
+    """
+    Over-fetched candidates -> MMR de-duplication -> token budget.
+    Returns the passages to put in the prompt, most relevant first.
+    """
+    if not texts:
+        return []
+    q = np.asarray(query_vec, dtype=np.float32)
+    v = np.asarray(vecs, dtype=np.float32)
+    q /= np.linalg.norm(q) or 1.0
+    v /= np.clip(np.linalg.norm(v, axis=1, keepdims=True), 1e-12, None)
+
+    out, used = [], 0
+    for i in mmr_select(q, v, max_passages):
+        left = budget - used
+        if left <= 0:
+            break
+        passage = trim_to_tokens(texts[i], left)
+        if passage:
+            out.append(passage)
+            used += count_tokens(passage)
+    return out
@@ -1,19 +1,21 @@
-import os
+import time
 from datetime import datetime
 from typing import Annotated, TypedDict
 from langgraph.graph import StateGraph, END
 from langgraph.graph.message import add_messages
 from langgraph.checkpoint.memory import MemorySaver
-from langchain_groq import ChatGroq
 from langchain_core.messages import SystemMessage, AIMessage
-from langchain_community.tools.tavily_search import TavilySearchResults
 from dotenv import load_dotenv
-from backend import rag_engine
+from backend import rag_engine, tracing
+from backend.llms import load_chat_model
+from backend.web_search import web_search
+from backend.prefetch import MemoryPrefetcher
+from backend.context_packing import CONTEXT_BUDGET, trim_to_tokens
+from backend.resilience import call_with_deadline, get_breaker, new_deadline, stage_timeout
 
 load_dotenv()
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-
-llm = ChatGroq(groq_api_key=GROQ_API_KEY, model_name="llama-3.1-8b-instant")
+# Groq by default; LLM_BACKEND=fake for a scripted offline model (backend/llms.py)
+llm = load_chat_model()
 
 # --- TOOLS ---
 def save_memory(text):
@@ -22,83 +24,229 @@ def save_memory(text):
         return "Info unclear, ignored."
         
     print(f"💾 SAVING: {text}")
-    with open("data/knowledge_base.txt", "a") as f:
-        f.write(f"\n{text}")
-    rag_engine.ingest_text(text)
+    # Journaled and acknowledged now; embedded + upserted in the next write-behind batch,
+    # where repeats are skipped and superseded facts are replaced
+    rag_engine.save_fact(text)
     return "Saved."  # <--- Brief response
 
-def search_memory(query):
+# Periodically folds duplicate facts that slipped in (e.g. edits to knowledge_base.txt)
+rag_engine.start_compaction()
+
+# Uploaded document each conversation is about: thread_id -> source name
+active_documents = {}
+
+def set_active_document(config, source):
+    """Scopes this conversation's memory searches to long-term memory + this document."""
+    active_documents[config["configurable"]["thread_id"]] = source
+
+def memory_namespaces(thread_id):
+    source = active_documents.get(thread_id)
+    return ["", rag_engine.doc_namespace(source)] if source else [""]
+
+def search_memory(query, timeout=None, namespace=None):
     print(f"🧠 MEMORY: {query}")
-    return rag_engine.retrieve(query)
+    if timeout is None:
+        timeout = stage_timeout(None, "retrieval")
+    with tracing.span("tool.memory"):
+        return call_with_deadline(rag_engine.retrieve, query, namespace=namespace, timeout=timeout,
+                                  breaker=get_breaker("pinecone"), fallback="")
+
+def _prefetch_retrieve(text, namespace=None):
+    # Speculative calls respect the breaker too, but never trip it (or use up its trial call).
+    # None = skipped: retrieval_node then calls search_memory, which makes the trial call.
+    if get_breaker("pinecone").state != "CLOSED":
+        return None
+    return rag_engine.retrieve(text, namespace=namespace)
+
+# Speculative retrieval: starts on the transcript, before the router has decided
+prefetcher = MemoryPrefetcher(_prefetch_retrieve)
 
-def search_web(query):
+def prefetch_memory(text, config):
+    """
+    Front ends can call this as soon as they have a transcript. Pass the same
+    text the graph will get as the user message: router_node reuses the
+    prefetch only if the text matches.
+    """
+    thread_id = config["configurable"]["thread_id"]
+    prefetcher.start(thread_id, text, namespace=memory_namespaces(thread_id))
+
+def search_web(query, timeout=None):
     print(f"🔍 GOOGLE: {query}")
-    try:
-        tavily = TavilySearchResults(max_results=1) # Faster (1 result only)
-        results = tavily.invoke(query)
-        return results[0]['content'] # Return just the text
-    except:
-        return "No results."
+    if timeout is None:
+        timeout = stage_timeout(None, "web")
+    # Cached, reuses one Tavily client
+    with tracing.span("tool.web"):
+        return call_with_deadline(web_search.search, query, timeout=timeout,
+                                  breaker=get_breaker("tavily"), fallback="No results.")
 
 def get_system_time():
     return datetime.now().strftime("%I:%M %p")
 
 # --- BRAIN ---
+def merge_timings(old, new):
+    """Per-node timings (ms). The router starts a new turn, so it resets them."""
+    if "router" in new:
+        return dict(new)
+    return {**(old or {}), **new}
+
 class AgentState(TypedDict):
     messages: Annotated[list, add_messages]
+    route: str      # SAVE / SEARCH / GOOGLE / BOTH / TIME / CHAT
+    query: str      # Argument of the CMD line
+    memory: str     # Filled by the retrieval node
+    web: str        # Filled by the web node
+    timings: Annotated[dict, merge_timings]
+    deadline: float # Absolute time.time() by which the turn must answer
 
-def agent_node(state: AgentState):
-    messages = state['messages']
-    
-    # SYSTEM PROMPT: Brief & Strict
-    system_prompt = SystemMessage(content="""
+def timed(name):
+    """Wraps a node so its duration shows up in the graph's stream events (and as a trace span)."""
+    def wrap(fn):
+        def node(state, config):
+            start = time.perf_counter()
+            with tracing.span(f"node.{name}"):
+                update = fn(state, config)
+            update["timings"] = {name: round((time.perf_counter() - start) * 1000, 1)}
+            return update
+        return node
+    return wrap
+
+def invoke_llm(messages):
+    """llm.invoke, but streamed so time-to-first-token shows up in traces."""
+    start = time.perf_counter()
+    reply = None
+    with tracing.span("llm", messages=len(messages)):
+        for chunk in llm.stream(messages):
+            if reply is None:
+                tracing.record("llm.first_token", (time.perf_counter() - start) * 1000)
+                reply = chunk
+            else:
+                reply += chunk
+    return AIMessage(content=reply.content if reply else "")
+
+# SYSTEM PROMPT: Brief & Strict
+ROUTER_PROMPT = SystemMessage(content="""
     You are JARVIS. Be FAST and CONCISE.
     
     COMMANDS (Start response with):
     1. "CMD: SAVE | <fact>" (Only for explicit facts like "I live in X")
     2. "CMD: SEARCH | <query>" (For "Who am I?", "Where do I live?")
     3. "CMD: GOOGLE | <query>" (For Weather, Stocks, Facts)
-    4. "CMD: TIME" (For time)
+    4. "CMD: BOTH | <query>" (Needs my info AND the web, e.g. "Weather where I live?")
+    5. "CMD: TIME" (For time)
     
     RULES:
     - Do NOT save random chat. Only save FACTS.
     - If user says "Omnodx" or gibberish, just ignore or ask to repeat.
     - Keep normal chat responses under 1 sentence.
     """)
-    
-    response = llm.invoke([system_prompt] + messages)
-    content = response.content.strip()
-    
-    # HANDLERS
-    if "CMD: SAVE |" in content:
-        raw_fact = content.split("CMD: SAVE |")[1].strip()
-        fact = raw_fact.strip('"').split("\n")[0]
-        result = save_memory(fact)
+
+def parse_command(content):
+    """Returns (route, argument) for a router reply."""
+    for route in ("SAVE", "SEARCH", "GOOGLE", "BOTH"):
+        marker = f"CMD: {route} |"
+        if marker in content:
+            arg = content.split(marker, 1)[1].strip()
+            if route == "SAVE":
+                return route, arg.strip('"').split("\n")[0]
+            return route, arg.split('"')[0].strip()
+    if "CMD: TIME" in content:
+        return "TIME", ""
+    return "CHAT", ""
+
+@timed("router")
+def router_node(state: AgentState, config):
+    thread_id = config["configurable"]["thread_id"]
+    deadline = new_deadline()
+    prefetcher.start(thread_id, state['messages'][-1].content, namespace=memory_namespaces(thread_id))
+    response = call_with_deadline(invoke_llm, [ROUTER_PROMPT] + state['messages'],
+                                  timeout=stage_timeout(deadline, "router"),
+                                  breaker=get_breaker("groq"))
+    if response is None:
+        # Degraded: no routing decision, but still answer inside the budget
+        prefetcher.discard(thread_id)
+        return {"route": "CHAT", "query": "", "memory": "", "web": "", "deadline": deadline,
+                "messages": [AIMessage(content="Sorry, I'm having trouble thinking right now.")]}
+    route, query = parse_command(response.content.strip())
+    if route not in ("SEARCH", "BOTH"):
+        prefetcher.discard(thread_id)
+    update = {"route": route, "query": query, "memory": "", "web": "", "deadline": deadline}
+    if route == "CHAT":
+        update["messages"] = [response]
+    return update
+
+@timed("retrieval")
+def retrieval_node(state: AgentState, config):
+    stage_end = time.time() + stage_timeout(state.get('deadline'), "retrieval")
+    thread_id = config["configurable"]["thread_id"]
+    context = prefetcher.take(thread_id, timeout=max(0.0, stage_end - time.time()))
+    if context is None:
+        context = search_memory(state['query'], timeout=max(0.0, stage_end - time.time()),
+                                namespace=memory_namespaces(thread_id))
+    return {"memory": context}
+
+@timed("web")
+def web_node(state: AgentState, config):
+    return {"web": search_web(state['query'], timeout=stage_timeout(state.get('deadline'), "web"))}
+
+@timed("tool")
+def tool_node(state: AgentState, config):
+    if state['route'] == "SAVE":
+        with tracing.span("tool.save"):
+            result = save_memory(state['query'])
         # Check if save was ignored
         if "ignored" in result:
-             return {"messages": [AIMessage(content="I didn't catch that fact clearly.")]}
+            return {"messages": [AIMessage(content="I didn't catch that fact clearly.")]}
         return {"messages": [AIMessage(content="Got it.")]} # <--- Shortest reply
-        
-    elif "CMD: SEARCH |" in content:
-        query = content.split("|", 1)[1].strip().split('"')[0]
-        context = search_memory(query)
-        final = llm.invoke([SystemMessage(content=f"Info: {context}. User Question: {messages[-1].content}")] + messages)
-        return {"messages": [final]}
-        
-    elif "CMD: GOOGLE |" in content:
-        query = content.split("|", 1)[1].strip().split('"')[0]
-        data = search_web(query)
-        final = llm.invoke([SystemMessage(content=f"Web: {data}. User Question: {messages[-1].content}")] + messages)
-        return {"messages": [final]}
-        
-    elif "CMD: TIME" in content:
-        return {"messages": [AIMessage(content=f"It's {get_system_time()}.")]}
-        
-    return {"messages": [response]}
+    return {"messages": [AIMessage(content=f"It's {get_system_time()}.")]}
+
+@timed("answer")
+def answer_node(state: AgentState, config):
+    messages = state['messages']
+    context = []
+    if state.get('memory'):
+        context.append(f"Info: {state['memory']}.")
+    if state.get('web'):
+        # Memory is packed in rag_engine.retrieve; web results get the same budget
+        context.append(f"Web: {trim_to_tokens(state['web'], CONTEXT_BUDGET)}.")
+    context.append(f"User Question: {messages[-1].content}")
+    final = call_with_deadline(invoke_llm, [SystemMessage(content=" ".join(context))] + messages,
+                               timeout=stage_timeout(state.get('deadline'), "answer"),
+                               breaker=get_breaker("groq"))
+    if final is None:
+        # Degraded: read out the raw context we already have
+        raw = state.get('web') if state.get('web') not in (None, "", "No results.") else state.get('memory')
+        if raw:
+            first_line = raw.split("\n")[0][:200]
+            final = AIMessage(content=f"Here's what I found: {first_line}")
+        else:
+            final = AIMessage(content="Sorry, that took too long. Please try again.")
+    return {"messages": [final]}
+
+def pick_route(state: AgentState):
+    """Conditional edge. BOTH fans out to retrieval and web in parallel."""
+    route = state['route']
+    if route == "SEARCH":
+        return ["retrieval"]
+    if route == "GOOGLE":
+        return ["web"]
+    if route == "BOTH":
+        return ["retrieval", "web"]
+    if route in ("SAVE", "TIME"):
+        return ["tool"]
+    return [END]
 
 workflow = StateGraph(AgentState)
-workflow.add_node("agent", agent_node)
-workflow.set_entry_point("agent")
-workflow.add_edge("agent", END)
+workflow.add_node("router", router_node)
+workflow.add_node("retrieval", retrieval_node)
+workflow.add_node("web", web_node)
+workflow.add_node("tool", tool_node)
+workflow.add_node("answer", answer_node)
+workflow.set_entry_point("router")
+workflow.add_conditional_edges("router", pick_route, ["retrieval", "web", "tool", END])
+# Both branches join here; the answer node runs once they have finished
+workflow.add_edge("retrieval", "answer")
+workflow.add_edge("web", "answer")
+workflow.add_edge("tool", END)
+workflow.add_edge("answer", END)
 
-app = workflow.compile(checkpointer=MemorySaver())
\ No newline at end of file
+app = workflow.compile(checkpointer=MemorySaver())
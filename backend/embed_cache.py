@@ -0,0 +1,147 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+import numpy as np
+
+
+def cache_key(model_name, text):
+    return hashlib.sha1(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class CachedEmbedder:
+    """
+    Drop-in wrapper around an encoder's `encode()`:
+    - hot layer: in-memory LRU, bounded by bytes
+    - cold layer: SQLite file with float16 vectors (half the size of float32)
+    Only texts missing from both layers reach the model.
+    """
+
+    def __init__(self, model, model_name, path="data/embed_cache.sqlite", hot_bytes=32 * 1024 * 1024):
+        self.model = model
+        self.model_name = model_name
+        self.path = path
+        self.hot_bytes = hot_bytes
+        self._hot = OrderedDict()
+        self._hot_size = 0
+        self._lock = threading.Lock()
+        self.stats = {"hot_hits": 0, "disk_hits": 0, "misses": 0}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vec BLOB)")
+        self._db.commit()
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        """Same shape contract as SentenceTransformer.encode: str -> 1-D, list -> 2-D."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        keys = [cache_key(self.model_name, t) for t in texts]
+        found = {}
+
+        # 1. Hot layer
+        with self._lock:
+            for k in keys:
+                if k in self._hot:
+                    self._hot.move_to_end(k)
+                    found[k] = self._hot[k]
+        self.stats["hot_hits"] += len(found)
+
+        # 2. Disk layer
+        missing = [k for k in dict.fromkeys(keys) if k not in found]
+        if missing:
+            disk = self._load(missing)
+            self.stats["disk_hits"] += len(disk)
+            for k, vec in disk.items():
+                found[k] = vec
+                self._remember(k, vec)
+
+        # 3. Model, for whatever is left
+        todo = [(k, t) for k, t in dict(zip(keys, texts)).items() if k not in found]
+        if todo:
+            self.stats["misses"] += len(todo)
+            vecs = self.model.encode([t for _, t in todo], batch_size=batch_size, **kwargs)
+            new = {}
+            for (k, _), vec in zip(todo, vecs):
+                vec = np.asarray(vec, dtype=np.float16)
+                found[k] = new[k] = vec
+                self._remember(k, vec)
+            self._store(new)
+
+        out = np.stack([found[k] for k in keys]).astype(np.float32)
+        return out[0] if single else out
+
+    def _remember(self, key, vec):
+        with self._lock:
+            if key in self._hot:
+                return
+            self._hot[key] = vec
+            self._hot_size += vec.nbytes
+            while self._hot_size > self.hot_bytes and self._hot:
+                _, old = self._hot.popitem(last=False)
+                self._hot_size -= old.nbytes
+
+    def _load(self, keys):
+        out = {}
+        with self._lock:
+            for start in range(0, len(keys), 500): # SQLite variable limit
+                part = keys[start:start + 500]
+                rows = self._db.execute(
+                    f"SELECT key, vec FROM embeddings WHERE key IN ({','.join('?' * len(part))})", part
+                ).fetchall()
+                for k, blob in rows:
+                    out[k] = np.frombuffer(blob, dtype=np.float16)
+        return out
+
+    def _store(self, vectors):
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vec) VALUES (?, ?)",
+                [(k, v.tobytes()) for k, v in vectors.items()],
+            )
+            self._db.commit()
+
+    def hit_rate(self):
+        total = self.stats["hot_hits"] + self.stats["disk_hits"] + self.stats["misses"]
+        return (self.stats["hot_hits"] + self.stats["disk_hits"]) / total if total else 0.0
+
+    def report(self):
+        return {**self.stats, "hit_rate": round(self.hit_rate(), 3), "hot_entries": len(self._hot)}
+
+
+class LazyEmbedder:
+    """
+    Stands in for a CachedEmbedder until the first encode (or a warm-up) needs
+    the model, so importing rag_engine doesn't load it.
+    `connect_fn() -> (encoder, model name)`. Attribute access is forwarded.
+    """
+
+    def __init__(self, connect_fn, path="data/embed_cache.sqlite"):
+        self.connect_fn = connect_fn
+        self.path = path
+        self._embedder = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._embedder is not None
+
+    def get(self):
+        if self._embedder is None:
+            with self._lock:
+                if self._embedder is None:
+                    encoder, model_name = self.connect_fn()
+                    self._embedder = CachedEmbedder(encoder, model_name, path=self.path)
+        return self._embedder
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        return self.get().encode(sentences, batch_size=batch_size, **kwargs)
+
+    def report(self):
+        # Don't load a model just to report that it was never used
+        return self._embedder.report() if self._embedder else {"loaded": False}
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
@@ -0,0 +1,228 @@
+"""
+Shared embedding daemon.
+Loads the encoder ONCE and serves encode requests over a Unix socket, so the GUI,
+the web app and ingestion jobs on the same box share one model in memory.
+Concurrent requests are micro-batched into a single forward pass.
+
+    python -m backend.embed_server
+"""
+import json
+import os
+import queue
+import socket
+import socketserver
+import struct
+import threading
+import time
+import numpy as np
+
+EMBED_SOCKET = os.getenv("EMBED_SOCKET", "/tmp/jarvis-embed.sock")
+MAX_BATCH = 256        # Sentences per forward pass
+MAX_WAIT_MS = 5        # How long to wait for more requests to join a batch
+RECONNECTS = 2         # Fresh connections tried (after a timeout or drop) before the in-process fallback
+
+
+# --- WIRE FORMAT ---
+# Request:  4-byte length + JSON {"op": "encode", "texts": [...]} or {"op": "info"}
+# Response: 4-byte length + 1-byte kind + payload
+#           kind "V": float32 vectors, kind "J": JSON (info or {"error": ...})
+
+def _send(sock, payload):
+    sock.sendall(struct.pack(">I", len(payload)) + payload)
+
+def _recv_exact(sock, n):
+    buf = bytearray()
+    while len(buf) < n:
+        part = sock.recv(n - len(buf))
+        if not part:
+            raise ConnectionError("socket closed")
+        buf.extend(part)
+    return bytes(buf)
+
+def _recv(sock):
+    (size,) = struct.unpack(">I", _recv_exact(sock, 4))
+    return _recv_exact(sock, size)
+
+
+# --- SERVER ---
+class MicroBatcher:
+    """Collects requests from many client threads and encodes them together."""
+
+    def __init__(self, encoder):
+        self.encoder = encoder
+        self._queue = queue.Queue()
+        self.stats = {"requests": 0, "batches": 0, "sentences": 0}
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def encode(self, texts):
+        job = {"texts": texts, "done": threading.Event(), "result": None, "error": None}
+        self._queue.put(job)
+        job["done"].wait()
+        if job["error"]:
+            raise job["error"]
+        return job["result"]
+
+    def _loop(self):
+        while True:
+            jobs = [self._queue.get()]
+            count = len(jobs[0]["texts"])
+            # Let concurrent requests pile in for a few ms
+            while count < MAX_BATCH:
+                try:
+                    job = self._queue.get(timeout=MAX_WAIT_MS / 1000)
+                except queue.Empty:
+                    break
+                jobs.append(job)
+                count += len(job["texts"])
+
+            texts = [t for job in jobs for t in job["texts"]]
+            passes = 0
+            try:
+                # One huge request must not become one huge forward pass: MAX_BATCH at a time
+                parts = []
+                for i in range(0, len(texts), MAX_BATCH):
+                    chunk = texts[i:i + MAX_BATCH]
+                    parts.append(np.asarray(self.encoder.encode(chunk, batch_size=len(chunk)), dtype=np.float32))
+                    passes += 1
+                vecs = np.concatenate(parts) if parts else np.zeros((0, 0), dtype=np.float32)
+                start = 0
+                for job in jobs:
+                    job["result"] = vecs[start:start + len(job["texts"])]
+                    start += len(job["texts"])
+            except Exception as e:
+                for job in jobs:
+                    job["error"] = e
+            self.stats["requests"] += len(jobs)
+            self.stats["batches"] += passes
+            self.stats["sentences"] += len(texts)
+            for job in jobs:
+                job["done"].set()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        server = self.server
+        while True:
+            try:
+                request = json.loads(_recv(self.request))
+            except (ConnectionError, OSError):
+                return
+            try:
+                if request.get("op") == "info":
+                    _send(self.request, b"J" + json.dumps({"name": server.cache_name, **server.batcher.stats}).encode())
+                else:
+                    vecs = server.batcher.encode(request["texts"])
+                    _send(self.request, b"V" + vecs.astype(np.float32).tobytes())
+            except OSError:
+                return  # The client gave up (timed out) and closed its end
+            except Exception as e:
+                _send(self.request, b"J" + json.dumps({"error": str(e)}).encode())
+
+
+# Unix sockets only; on Windows the client never finds a daemon and falls back
+class EmbedServer(socketserver.ThreadingMixIn, getattr(socketserver, "UnixStreamServer", socketserver.TCPServer)):
+    daemon_threads = True
+
+    def __init__(self, path, encoder, cache_name):
+        if os.path.exists(path):
+            os.remove(path) # Stale socket from a previous run
+        super().__init__(path, _Handler)
+        self.cache_name = cache_name
+        self.batcher = MicroBatcher(encoder)
+
+
+# --- CLIENT ---
+class EmbedClient:
+    """
+    Encoder that talks to the daemon. Same encode() contract as SentenceTransformer.
+    A timeout or dropped connection is retried on a fresh connection (the daemon
+    may just be busy or restarting); only if that keeps failing does it load
+    `fallback()` in-process once and carry on.
+    """
+
+    def __init__(self, path=EMBED_SOCKET, fallback=None, timeout=30.0, reconnects=RECONNECTS):
+        self.path = path
+        self.fallback = fallback
+        self.timeout = timeout
+        self.reconnects = reconnects
+        self._dim = None
+        self._local = threading.local()
+        self._fallback_encoder = None
+        self._fallback_lock = threading.Lock()
+
+    def _sock(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+            self._local.sock = sock
+        return sock
+
+    def _drop(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = None
+
+    def info(self):
+        """Daemon info, or None if no daemon is listening."""
+        if not hasattr(socket, "AF_UNIX") or not os.path.exists(self.path):
+            return None
+        try:
+            sock = self._sock()
+            _send(sock, json.dumps({"op": "info"}).encode())
+            return json.loads(_recv(sock)[1:])
+        except (OSError, ConnectionError, ValueError):
+            self._drop()
+            return None
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if not texts:
+            # (0, d) like SentenceTransformer; the width comes from one probe sentence if not seen yet
+            if self._dim is None:
+                self._dim = self.encode("dimension probe").shape[-1]
+            return np.zeros((0, self._dim), dtype=np.float32)
+        for attempt in range(self.reconnects + 1):
+            if self._fallback_encoder is not None:
+                break
+            try:
+                sock = self._sock()
+                _send(sock, json.dumps({"op": "encode", "texts": texts}).encode())
+                payload = _recv(sock)
+                if payload[:1] == b"J":
+                    raise RuntimeError(json.loads(payload[1:])["error"])
+                vecs = np.frombuffer(payload[1:], dtype=np.float32).reshape(len(texts), -1)
+                self._dim = vecs.shape[1]
+                return vecs[0] if single else vecs
+            except (OSError, ConnectionError) as e:
+                # A timed-out reply may still arrive later: never reuse that connection
+                self._drop()
+                if attempt < self.reconnects:
+                    print(f"⚠️ Embedding daemon: {e!r}, reconnecting ({attempt + 1}/{self.reconnects})")
+                    time.sleep(0.2 * (attempt + 1))
+                    continue
+                if self.fallback is None:
+                    raise
+                print(f"⚠️ Embedding daemon unavailable ({e!r}), loading model in-process")
+                with self._fallback_lock:
+                    if self._fallback_encoder is None:
+                        self._fallback_encoder = self.fallback()[0]
+        vecs = self._fallback_encoder.encode(sentences, batch_size=batch_size, **kwargs)
+        self._dim = np.shape(vecs)[-1]
+        return vecs
+
+
+if __name__ == "__main__":
+    from backend.encoders import load_encoder
+    print("⏳ Loading Embedding Model...")
+    encoder, cache_name = load_encoder()
+    server = EmbedServer(EMBED_SOCKET, encoder, cache_name)
+    print(f"✅ Embedding daemon ({cache_name}) listening on {EMBED_SOCKET}")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        os.remove(EMBED_SOCKET)
@@ -0,0 +1,17 @@
+import os
+
+EMBED_MODEL = 'all-MiniLM-L6-v2'
+# "torch" (sentence-transformers) or "onnx" (int8 ONNX Runtime, faster on CPU)
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", "0")) or None
+
+def load_encoder(backend=EMBED_BACKEND):
+    """Returns (encoder, cache name). The cache name keeps backends' vectors apart."""
+    if backend == "onnx":
+        from backend.onnx_embedder import OnnxEmbedder
+        return OnnxEmbedder(f"sentence-transformers/{EMBED_MODEL}", threads=EMBED_THREADS), f"{EMBED_MODEL}:onnx-int8"
+    from sentence_transformers import SentenceTransformer
+    if EMBED_THREADS:
+        import torch
+        torch.set_num_threads(EMBED_THREADS)
+    return SentenceTransformer(EMBED_MODEL), EMBED_MODEL
@@ -0,0 +1,94 @@
+"""
+Scripted chat model for offline runs of the agent graph (LLM_BACKEND=fake).
+It speaks the router's CMD: protocol, answers from the context the answer
+node puts in the system prompt, and streams tokens with a configurable
+time-to-first-token and token rate. Same input -> same output and timing.
+"""
+import re
+import time
+from typing import Any, Iterator, List, Optional, Tuple
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+_TOKEN = re.compile(r"\s*\S+")
+
+# (pattern on the user's text, route) - checked in order, first match wins
+ROUTE_RULES = [
+    (r"\b(remember|my name is|i live in|i am a|i work|i study|my \w+ is)\b", "SAVE"),
+    (r"\b(weather|news|time)\b.*\b(where i|my)\b", "BOTH"),
+    (r"\bwhat time\b|\bthe time\b", "TIME"),
+    (r"\b(who am i|do i|am i|my)\b", "SEARCH"),
+    (r"\b(weather|stock|price|news|latest|who won|score|today)\b", "GOOGLE"),
+]
+
+
+def route_for(text, rules=ROUTE_RULES):
+    """The CMD line a well-behaved router would reply with."""
+    lowered = text.lower().strip()
+    question = lowered.endswith("?") or re.match(r"(who|what|where|when|why|how|do|does|did|is|are|am|can)\b", lowered)
+    for pattern, route in rules:
+        if route == "SAVE" and question:
+            continue  # "Where do I study?" is a lookup, not a fact
+        if re.search(pattern, lowered):
+            if route == "TIME":
+                return "CMD: TIME"
+            arg = text.strip().rstrip("?.!")
+            if route == "SAVE":
+                arg = re.sub(r"^(please\s+)?remember( that)?\s+", "", arg, flags=re.I)
+            return f"CMD: {route} | {arg}"
+    return "Sure, happy to help."
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Deterministic stand-in for ChatGroq.
+    `script` (optional) is a list of replies used in order before falling back
+    to the CMD: rules, for tests that need an exact conversation.
+    """
+
+    ttft_ms: float = 150.0          # Delay before the first token
+    tokens_per_sec: float = 500.0   # Then one token every 1/rate seconds
+    script: List[str] = []
+    rules: List[Tuple[str, str]] = ROUTE_RULES
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-fake"
+
+    def _reply(self, messages: List[BaseMessage]) -> str:
+        if self.script:
+            return self.script.pop(0)
+        system = next((m.content for m in messages if isinstance(m, SystemMessage)), "")
+        user = next((m.content for m in reversed(messages) if isinstance(m, HumanMessage)), "")
+        if "COMMANDS" in system:
+            return route_for(user, self.rules)
+        # Answer node: "Info: ... Web: ... User Question: ..."
+        for label in ("Info:", "Web:"):
+            if label in system:
+                context = system.split(label, 1)[1].split("User Question:", 1)[0]
+                first = re.split(r"(?<=[.!?])\s+|\n", context.strip())[0].strip(" .")
+                if first:
+                    return f"Here's what I know: {first}."
+        return "I'm not sure about that."
+
+    def _tokens(self, messages):
+        return _TOKEN.findall(self._reply(messages))
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Any = None, **kwargs: Any) -> ChatResult:
+        tokens = self._tokens(messages)
+        time.sleep(self.ttft_ms / 1000 + max(len(tokens) - 1, 0) / self.tokens_per_sec)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(tokens)))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Any = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        time.sleep(self.ttft_ms / 1000)
+        for i, token in enumerate(self._tokens(messages)):
+            if i:
+                time.sleep(1 / self.tokens_per_sec)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=token))
+            if run_manager:
+                run_manager.on_llm_new_token(token, chunk=chunk)
+            yield chunk
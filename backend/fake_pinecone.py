@@ -0,0 +1,157 @@
+"""
+In-process stand-in for the part of the Pinecone client rag_engine uses:
+list_indexes / create_index / describe_index / Index(...).upsert / query /
+delete / describe_index_stats. Vectors live in memory (LocalIndex, never
+flushed), and every call can be given network-like latency and random
+failures from a seeded RNG, so benchmarks are reproducible without an account.
+
+    pc = FakePinecone(latency_ms=40, jitter_ms=10, failure_rate=0.01, seed=1)
+"""
+import json
+import random
+import threading
+import time
+from backend.vector_store import LocalIndex
+
+MAX_UPSERT_VECTORS = 1000              # Same request limits as the real service
+MAX_REQUEST_BYTES = 2 * 1024 * 1024
+
+
+class FakePineconeError(Exception):
+    """Raised for injected failures and for requests the real API would reject."""
+
+    def __init__(self, status, message):
+        super().__init__(f"({status}) {message}")
+        self.status = status
+
+
+class _IndexModel:
+    def __init__(self, name, dimension, metric):
+        self.name = name
+        self.dimension = dimension
+        self.metric = metric
+        self.status = {"ready": True, "state": "Ready"}
+
+
+class _IndexList(list):
+    def names(self):
+        return [i.name for i in self]
+
+
+class _FaultInjector:
+    def __init__(self, latency_ms, jitter_ms, failure_rate, seed):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.failure_rate = failure_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"calls": 0, "failures": 0, "slept_ms": 0.0}
+
+    def __call__(self, op):
+        with self._lock:
+            delay = self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)
+            fail = self._rng.random() < self.failure_rate
+            self.stats["calls"] += 1
+            self.stats["slept_ms"] += max(delay, 0.0)
+            if fail:
+                self.stats["failures"] += 1
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if fail:
+            raise FakePineconeError(503, f"{op}: service unavailable (injected)")
+
+
+class FakeIndex:
+    """Pinecone Index handle backed by one in-memory LocalIndex per namespace."""
+
+    def __init__(self, model, fault):
+        self._model = model
+        self._fault = fault
+        self._spaces = {}
+        self._lock = threading.Lock()
+
+    def _space(self, namespace):
+        with self._lock:
+            if namespace not in self._spaces:
+                # Memory only: no files, no atexit flush
+                self._spaces[namespace] = LocalIndex(f"fake-pinecone/{self._model.name}/ns-{namespace or 'default'}",
+                                                     self._model.dimension, persist=False)
+            return self._spaces[namespace]
+
+    def upsert(self, vectors, namespace=""):
+        self._fault("upsert")
+        rows = [(v["id"], v["values"], v.get("metadata")) if isinstance(v, dict) else v for v in vectors]
+        if len(rows) > MAX_UPSERT_VECTORS:
+            raise FakePineconeError(400, f"upsert of {len(rows)} vectors exceeds {MAX_UPSERT_VECTORS}")
+        size = sum(len(v[1]) * 10 + len(json.dumps(v[2] or {})) + len(v[0]) for v in rows)
+        if size > MAX_REQUEST_BYTES:
+            raise FakePineconeError(400, f"request of ~{size} bytes exceeds {MAX_REQUEST_BYTES}")
+        for id_, values, _ in rows:
+            if len(values) != self._model.dimension:
+                raise FakePineconeError(400, f"vector {id_} has dimension {len(values)}, "
+                                             f"index expects {self._model.dimension}")
+        self._space(namespace).upsert(rows)
+        return {"upserted_count": len(rows)}
+
+    def query(self, vector, top_k=10, include_metadata=False, filter=None, namespace="", include_values=False, **kwargs):
+        self._fault("query")
+        if len(vector) != self._model.dimension:
+            raise FakePineconeError(400, f"query vector has dimension {len(vector)}")
+        results = self._space(namespace).query(vector, top_k=top_k, include_metadata=include_metadata,
+                                               filter=filter, include_values=include_values)
+        return {"matches": results["matches"], "namespace": namespace}
+
+    def delete(self, ids=None, delete_all=False, namespace="", **kwargs):
+        self._fault("delete")
+        with self._lock:
+            if namespace and namespace not in self._spaces:
+                # Real Pinecone: deleting from a namespace that was never written is a 404
+                raise FakePineconeError(404, f"namespace '{namespace}' not found")
+        self._space(namespace).delete(ids=ids, delete_all=delete_all)
+        return {}
+
+    def describe_index_stats(self, **kwargs):
+        self._fault("describe_index_stats")
+        with self._lock:
+            spaces = dict(self._spaces)
+        counts = {ns: {"vector_count": sp._size} for ns, sp in spaces.items()}
+        return {
+            "dimension": self._model.dimension,
+            "namespaces": counts,
+            "total_vector_count": sum(c["vector_count"] for c in counts.values()),
+        }
+
+
+class FakePinecone:
+    """Drop-in for `pinecone.Pinecone` in rag_engine (VECTOR_BACKEND=fake)."""
+
+    def __init__(self, api_key=None, latency_ms=0.0, jitter_ms=0.0, failure_rate=0.0, seed=0):
+        self.fault = _FaultInjector(latency_ms, jitter_ms, failure_rate, seed)
+        self._indexes = {}   # name -> (model, FakeIndex)
+        self._lock = threading.Lock()
+
+    def list_indexes(self):
+        self.fault("list_indexes")
+        with self._lock:
+            return _IndexList(model for model, _ in self._indexes.values())
+
+    def create_index(self, name, dimension, metric="cosine", spec=None, **kwargs):
+        self.fault("create_index")
+        with self._lock:
+            if name in self._indexes:
+                raise FakePineconeError(409, f"index '{name}' already exists")
+            model = _IndexModel(name, dimension, metric)
+            self._indexes[name] = (model, FakeIndex(model, self.fault))
+
+    def describe_index(self, name):
+        self.fault("describe_index")
+        with self._lock:
+            if name not in self._indexes:
+                raise FakePineconeError(404, f"index '{name}' not found")
+            return self._indexes[name][0]
+
+    def Index(self, name, **kwargs):
+        with self._lock:
+            if name not in self._indexes:
+                raise FakePineconeError(404, f"index '{name}' not found")
+            return self._indexes[name][1]
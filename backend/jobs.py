@@ -0,0 +1,180 @@
+import hashlib
+import io
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from backend import rag_engine
+
+MAX_WORKERS = 2  # Ingestion jobs running at once; the rest wait in the queue
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class IngestJob:
+    def __init__(self, job_id, source, content_hash):
+        self.id = job_id
+        self.source = source
+        self.content_hash = content_hash
+        self.status = "queued"   # queued / running / done / failed / cancelled
+        self.pages_done = 0
+        self.total_pages = 0
+        self.chunks = 0
+        self.error = None
+        self.created_at = time.time()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._on_progress = []
+        self._on_done = []
+
+    @property
+    def progress(self):
+        return self.pages_done / self.total_pages if self.total_pages else 0.0
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed", "cancelled")
+
+    def cancel(self):
+        self._cancel.set()
+
+    def add_callbacks(self, on_progress=None, on_done=None):
+        """Attaches callbacks. Returns False (attaching nothing) if the job already finished."""
+        with self._lock:
+            if self.finished:
+                return False
+            if on_progress:
+                self._on_progress.append(on_progress)
+            if on_done:
+                self._on_done.append(on_done)
+            return True
+
+    def _finish(self, status, error=None):
+        with self._lock:
+            self.status, self.error = status, error
+            callbacks = list(self._on_done)
+        for fn in callbacks:
+            try:
+                fn(self)
+            except Exception as e:
+                print(f"⚠️ Ingestion callback failed for {self.source}: {e}")
+
+
+def _content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class JobManager:
+    """
+    Runs PDF ingestion off the UI / voice threads.
+    Chunks become searchable batch by batch while a job is still running,
+    and an identical file (same bytes) is never ingested twice.
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ingest")
+        self._ids = itertools.count(1)
+        self._jobs = {}       # id -> job
+        self._by_hash = {}    # content hash -> job
+        self._lock = threading.Lock()
+
+    def submit_pdf(self, file, source, on_progress=None, on_done=None):
+        """
+        `file` is a path, bytes or a file-like object. Returns the IngestJob
+        (an existing one if the same content was already submitted).
+        on_progress(job) / on_done(job) run on a background thread; on_done runs
+        once, also when the same content is already being ingested or done.
+        """
+        if isinstance(file, (bytes, bytearray)):
+            data = bytes(file)
+        elif isinstance(file, str):
+            with open(file, "rb") as f:
+                data = f.read()
+        else:
+            file.seek(0)
+            data = file.read()
+        digest = _content_hash(data)
+
+        with self._lock:
+            existing = self._by_hash.get(digest)
+            if existing and existing.status not in ("failed", "cancelled"):
+                job = existing
+            else:
+                job = IngestJob(f"job-{next(self._ids)}", source, digest)
+                job.add_callbacks(on_progress, on_done)
+                self._jobs[job.id] = job
+                self._by_hash[digest] = job
+                self._pool.submit(self._run, job, data)
+                return job
+
+        # Same content: follow the running job, or report the finished one
+        # (off the caller's thread, like a normal completion)
+        if not job.add_callbacks(on_progress, on_done) and on_done:
+            threading.Thread(target=on_done, args=(job,), name="ingest-done", daemon=True).start()
+        return job
+
+    def _run(self, job, data):
+        if job._cancel.is_set():
+            job._finish("cancelled")
+            return
+        job.status = "running"
+
+        def _progress(done, total):
+            if job._cancel.is_set():
+                raise JobCancelled()
+            job.pages_done, job.total_pages = done, total
+            with job._lock:
+                callbacks = list(job._on_progress)
+            for fn in callbacks:
+                try:
+                    fn(job)
+                except Exception as e:
+                    print(f"⚠️ Ingestion callback failed for {job.source}: {e}")
+
+        try:
+            rag_engine.delete_document(job.source)
+            job.chunks = rag_engine.ingest_pdf(io.BytesIO(data), job.source, progress=_progress)
+            if job._cancel.is_set():
+                raise JobCancelled()  # Cancelled (or deleted) during the last batch
+        except JobCancelled:
+            # Deleted again now that this job has stopped writing: a delete_document()
+            # that ran mid-batch would otherwise see the batch's vectors come back
+            rag_engine.delete_document(job.source)
+            job._finish("cancelled")
+        except Exception as e:
+            print(f"❌ Ingestion failed for {job.source}: {e}")
+            job._finish("failed", str(e))
+        else:
+            job._finish("done")
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job:
+            job.cancel()
+        return job
+
+    def delete_document(self, source):
+        """
+        Cancels ingestion of `source` and deletes its vectors. Its content hash
+        is forgotten too, so uploading the same file again ingests it again.
+        """
+        with self._lock:
+            for digest, job in list(self._by_hash.items()):
+                if job.source == source:
+                    job.cancel()
+                    del self._by_hash[digest]
+        rag_engine.delete_document(source)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+
+# Shared instance (module import survives Streamlit reruns)
+job_manager = JobManager()
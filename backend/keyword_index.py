@@ -0,0 +1,158 @@
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+STOPWORDS = set("""
+a an and are as at be by for from has have i in is it its me my of on or that the this to was
+were what when where which who why will with you your do does did am about tell please can
+""".split())
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+# Names, acronyms and numbers in the ORIGINAL query ("NIT Raipur", "M.Tech", "2025")
+_KEY_PHRASE = re.compile(r"\b(?:[A-Z][\w.\-]*|\d[\w.\-]*)(?:\s+(?:[A-Z][\w.\-]*|\d[\w.\-]*))*")
+
+
+def key_phrases(text):
+    """
+    Capitalized runs / IDs in `text`. A plain capitalized word at
+    the start of a sentence ("What", "Tell") is grammar, not a name, so it is
+    dropped; acronyms and IDs there ("NIT", "3.5") are kept.
+    """
+    phrases = []
+    for m in _KEY_PHRASE.finditer(text):
+        words = m.group().split()
+        before = text[:m.start()].rstrip()
+        if (not before or before[-1] in ".!?") and words[0].istitle():
+            words = words[1:]
+        phrase = " ".join(words).rstrip(".-")
+        if len(phrase) > 2 and phrase.lower() not in STOPWORDS:
+            phrases.append(phrase)
+    return phrases
+
+
+def tokenize(text):
+    return [t for t in _TOKEN.findall(text.lower()) if t not in STOPWORDS]
+
+
+class KeywordIndex:
+    """
+    BM25 over an in-process inverted index, kept next to the vector index.
+    Catches names, IDs and acronyms that dense embeddings often miss.
+    """
+
+    def __init__(self, path="data/keyword_index.json", k1=1.5, b=0.75):
+        self.path = path
+        self.k1, self.b = k1, b
+        self._lock = threading.RLock()
+        self._docs = {}                     # id -> {"text", "ns", "len"}
+        self._postings = defaultdict(dict)  # term -> {id: tf}
+        self._total_len = 0
+        self._dirty = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for id_, doc in json.load(f).items():
+                    self.add(id_, doc["text"], doc["ns"])
+            self._dirty = False
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, id_):
+        return id_ in self._docs
+
+    # --- MAINTENANCE ---
+    def add(self, id_, text, namespace=""):
+        with self._lock:
+            if id_ in self._docs:
+                self.remove(id_)
+            terms = Counter(tokenize(text))
+            for term, tf in terms.items():
+                self._postings[term][id_] = tf
+            length = sum(terms.values())
+            self._docs[id_] = {"text": text, "ns": namespace, "len": length}
+            self._total_len += length
+            self._dirty = True
+
+    def remove(self, id_):
+        with self._lock:
+            doc = self._docs.pop(id_, None)
+            if not doc:
+                return
+            for term in set(tokenize(doc["text"])):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(id_, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_len -= doc["len"]
+            self._dirty = True
+
+    def remove_namespace(self, namespace):
+        with self._lock:
+            for id_ in [i for i, d in self._docs.items() if d["ns"] == namespace]:
+                self.remove(id_)
+
+    def flush(self):
+        with self._lock:
+            if not self._dirty:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"  # Temp file + rename: a crash never leaves half a JSON file
+            with open(tmp, "w") as f:
+                json.dump({i: {"text": d["text"], "ns": d["ns"]} for i, d in self._docs.items()}, f)
+            os.replace(tmp, self.path)
+            self._dirty = False
+
+    # --- SEARCH ---
+    def search(self, query, top_k=3, namespaces=("",)):
+        """BM25 ranking. Returns [(id, score, text)]."""
+        with self._lock:
+            n = len(self._docs)
+            if not n:
+                return []
+            avg_len = self._total_len / n
+            scores = defaultdict(float)
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for id_, tf in postings.items():
+                    doc = self._docs[id_]
+                    if doc["ns"] not in namespaces:
+                        continue
+                    norm = tf + self.k1 * (1 - self.b + self.b * doc["len"] / avg_len)
+                    scores[id_] += idf * tf * (self.k1 + 1) / norm
+            best = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+            return [(id_, score, self._docs[id_]["text"]) for id_, score in best]
+
+    def exact_lookup(self, query, top_k=3, namespaces=("",)):
+        """
+        Cheap path before any embedding: if the query names something specific
+        ("NIT Raipur", an ID, an acronym) and chunks contain it verbatim, return those.
+        A chunk only counts if it contains every phrase the query names, and a
+        lone ordinary word ("Python") is too weak a signal to skip dense retrieval.
+        """
+        phrases = key_phrases(query)
+        if len(phrases) == 1 and " " not in phrases[0] and phrases[0].istitle():
+            return []
+        phrases = [p.lower() for p in phrases]
+        if not phrases:
+            return []
+        hits = [h for h in self.search(" ".join(phrases), top_k=top_k * 4, namespaces=namespaces)
+                if all(p in h[2].lower() for p in phrases)]
+        return hits[:top_k]
+
+
+def rrf_fuse(ranked_lists, top_k=3, k=60):
+    """Reciprocal-rank fusion of several [(id, text)] rankings."""
+    scores, texts = defaultdict(float), {}
+    for ranking in ranked_lists:
+        for rank, (id_, text) in enumerate(ranking):
+            scores[id_] += 1.0 / (k + rank + 1)
+            texts[id_] = text
+    best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+    return [(id_, texts[id_]) for id_ in best]
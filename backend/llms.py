@@ -0,0 +1,15 @@
+import os
+
+CHAT_MODEL = "llama-3.1-8b-instant"
+# "groq" or "fake" (scripted local model in backend/fake_llm.py, no network)
+LLM_BACKEND = os.getenv("LLM_BACKEND", "groq")
+FAKE_LLM_TTFT_MS = float(os.getenv("FAKE_LLM_TTFT_MS", "150"))
+FAKE_LLM_TOKENS_PER_SEC = float(os.getenv("FAKE_LLM_TOKENS_PER_SEC", "500"))
+
+def load_chat_model(backend=LLM_BACKEND, **kwargs):
+    """Returns the chat model the agent talks to. kwargs go to ChatGroq (e.g. temperature)."""
+    if backend == "fake":
+        from backend.fake_llm import ScriptedChatModel
+        return ScriptedChatModel(ttft_ms=FAKE_LLM_TTFT_MS, tokens_per_sec=FAKE_LLM_TOKENS_PER_SEC)
+    from langchain_groq import ChatGroq
+    return ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name=CHAT_MODEL, **kwargs)
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import os
+import threading
+
+
+def chunk_id(source, text):
+    """Stable vector ID: same file + same text -> same ID, wherever the line moves."""
+    return hashlib.sha1(f"{source}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class IngestManifest:
+    """
+    Remembers which chunks of which file are already in the index.
+    {source: {"mtime": float, "size": int, "ids": [chunk_id, ...]}}
+    """
+
+    def __init__(self, path="data/ingest_manifest.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._data = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self._data = json.load(f)
+
+    def sources(self):
+        with self._lock:
+            return list(self._data)
+
+    def ids(self, source):
+        with self._lock:
+            return set(self._data.get(source, {}).get("ids", []))
+
+    def unchanged(self, source, mtime, size):
+        with self._lock:
+            entry = self._data.get(source)
+        return bool(entry) and entry.get("mtime") == mtime and entry.get("size") == size
+
+    def set(self, source, ids, mtime=None, size=None):
+        with self._lock:
+            self._data[source] = {"mtime": mtime, "size": size, "ids": sorted(ids)}
+            self._save()
+
+    def add(self, source, new_ids):
+        """Records IDs written outside a full sync (e.g. save_memory)."""
+        with self._lock:
+            entry = self._data.setdefault(source, {"mtime": None, "size": None, "ids": []})
+            entry["ids"] = sorted(set(entry["ids"]) | set(new_ids))
+            # The file changed under us; force the next sync to re-read it
+            entry["mtime"] = None
+            self._save()
+
+    def discard(self, source, old_ids):
+        """Forgets IDs deleted outside a full sync (e.g. a superseded fact)."""
+        with self._lock:
+            entry = self._data.get(source)
+            if not entry:
+                return
+            entry["ids"] = sorted(set(entry["ids"]) - set(old_ids))
+            entry["mtime"] = None
+            self._save()
+
+    def remove(self, source):
+        with self._lock:
+            self._data.pop(source, None)
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._data, f)
+        os.replace(tmp, self.path)
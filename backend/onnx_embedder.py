@@ -0,0 +1,78 @@
+import os
+import numpy as np
+
+# Optional dependency: pip install onnxruntime
+import onnxruntime as ort
+from onnxruntime.quantization import QuantType, quantize_dynamic
+from transformers import AutoModel, AutoTokenizer
+
+MAX_SEQ_LENGTH = 256  # Same limit sentence-transformers uses for MiniLM
+
+
+class OnnxEmbedder:
+    """
+    Same vectors as SentenceTransformer('all-MiniLM-L6-v2') (mean pooling + L2 norm),
+    but run through ONNX Runtime with int8 dynamic quantization on CPU.
+    The model is exported and quantized once into `cache_dir`.
+    """
+
+    def __init__(self, model_name="sentence-transformers/all-MiniLM-L6-v2", cache_dir="data/onnx",
+                 threads=None, quantize=True):
+        self.model_name = model_name
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+
+        slug = model_name.split("/")[-1]
+        fp32_path = os.path.join(cache_dir, f"{slug}.onnx")
+        int8_path = os.path.join(cache_dir, f"{slug}-int8.onnx")
+        if not os.path.exists(fp32_path):
+            self._export(fp32_path)
+        path = fp32_path
+        if quantize:
+            if not os.path.exists(int8_path):
+                print("⏳ Quantizing embedding model (int8)...")
+                quantize_dynamic(fp32_path, int8_path, weight_type=QuantType.QInt8)
+            path = int8_path
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = threads or os.cpu_count() or 1
+        opts.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def _export(self, path):
+        import torch
+        print("⏳ Exporting embedding model to ONNX (one time)...")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        model = AutoModel.from_pretrained(self.model_name).eval()
+        sample = self.tokenizer(["export"], return_tensors="pt")
+        dynamic = {0: "batch", 1: "tokens"}
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                (sample["input_ids"], sample["attention_mask"], sample["token_type_ids"]),
+                path,
+                input_names=["input_ids", "attention_mask", "token_type_ids"],
+                output_names=["last_hidden_state"],
+                dynamic_axes={"input_ids": dynamic, "attention_mask": dynamic,
+                              "token_type_ids": dynamic, "last_hidden_state": dynamic},
+                opset_version=14,
+            )
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        """Same shape contract as SentenceTransformer.encode: str -> 1-D, list -> 2-D."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                   max_length=MAX_SEQ_LENGTH, return_tensors="np")
+            feed = {k: v.astype(np.int64) for k, v in batch.items() if k in self._inputs}
+            hidden = self.session.run(None, feed)[0]
+            # Mean pooling over real tokens, then L2 normalize
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            out.append(pooled.astype(np.float32))
+        vecs = np.concatenate(out) if out else np.zeros((0, 384), dtype=np.float32)
+        return vecs[0] if single else vecs
@@ -0,0 +1,128 @@
+"""
+Streaming PDF ingestion:
+pages are extracted in a process pool (in order, a bounded window at a time),
+chunked by sentence with a token budget + overlap, and handed to batched
+embedding as they come. Memory stays flat even for 1000-page documents.
+"""
+import os
+import re
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+PAGES_PER_TASK = 8          # Pages one worker extracts per task
+PARALLEL_MIN_PAGES = 40     # Small PDFs are faster without spinning up a pool
+MAX_TOKENS = 200            # MiniLM truncates at 256 word pieces; stay under it
+OVERLAP_TOKENS = 40
+FLUSH_CHUNKS = 64           # Chunks buffered before embedding (also how soon a running job becomes searchable)
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _extract_range(path, start, end):
+    """Worker: (page_no, text) for pages [start, end). Runs in a child process."""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    return [(i + 1, reader.pages[i].extract_text() or "") for i in range(start, end)]
+
+
+def iter_pages(path, workers=None, progress=None):
+    """Yields (page_no, text) in order without holding the whole document."""
+    from pypdf import PdfReader
+    total = len(PdfReader(path).pages)
+    ranges = [(s, min(s + PAGES_PER_TASK, total)) for s in range(0, total, PAGES_PER_TASK)]
+
+    if total < PARALLEL_MIN_PAGES:
+        for start, end in ranges:
+            yield from _extract_range(path, start, end)
+            if progress:
+                progress(end, total)
+        return
+
+    workers = workers or max(1, (os.cpu_count() or 2) - 1)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Sliding window: at most 2 tasks per worker in flight
+        window = []
+        todo = iter(ranges)
+        for start, end in todo:
+            window.append((end, pool.submit(_extract_range, path, start, end)))
+            if len(window) >= workers * 2:
+                break
+        while window:
+            end, future = window.pop(0)
+            yield from future.result()
+            if progress:
+                progress(end, total)
+            nxt = next(todo, None)
+            if nxt:
+                window.append((nxt[1], pool.submit(_extract_range, path, *nxt)))
+
+
+def _sentences(text):
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        # A "sentence" longer than the budget (tables, lists) is cut by words
+        for i in range(0, len(words), MAX_TOKENS):
+            yield words[i:i + MAX_TOKENS]
+
+
+def iter_chunks(pages, max_tokens=MAX_TOKENS, overlap_tokens=OVERLAP_TOKENS):
+    """
+    Sentence-aware chunking with overlap. Token counts are approximated by words.
+    Yields (text, page_no) where page_no is the page the chunk starts on.
+    """
+    current, current_len = [], 0  # [(words, page_no)]
+    for page_no, text in pages:
+        for words in _sentences(text):
+            if not words:
+                continue
+            if current and current_len + len(words) > max_tokens:
+                yield " ".join(w for s, _ in current for w in s), current[0][1]
+                # Carry the tail sentences over as overlap
+                keep, kept = [], 0
+                for s, p in reversed(current):
+                    if kept + len(s) > overlap_tokens or kept + len(s) + len(words) > max_tokens:
+                        break
+                    keep.insert(0, (s, p))
+                    kept += len(s)
+                current, current_len = keep, kept
+            current.append((words, page_no))
+            current_len += len(words)
+    if current:
+        yield " ".join(w for s, _ in current for w in s), current[0][1]
+
+
+def ingest_pdf_stream(file, source, ingest_fn, progress=None, workers=None):
+    """
+    Drives the pipeline. `file` is a path or a file-like object (Streamlit upload).
+    `ingest_fn(chunks, metadatas)` does the batched embedding + upsert.
+    `progress(pages_done, total_pages)` is called as pages are extracted.
+    Returns the number of chunks ingested.
+    """
+    tmp = None
+    if not isinstance(file, (str, os.PathLike)):
+        # Worker processes need a path, so spool the upload to disk once
+        tmp = tempfile.NamedTemporaryFile(suffix=".pdf", delete=False)
+        file.seek(0)
+        shutil.copyfileobj(file, tmp)
+        tmp.close()
+        path = tmp.name
+    else:
+        path = file
+
+    count = 0
+    chunks, metas = [], []
+    try:
+        for text, page_no in iter_chunks(iter_pages(path, workers=workers, progress=progress)):
+            chunks.append(text)
+            metas.append({"source": source, "page": page_no, "chunk": count})
+            count += 1
+            if len(chunks) >= FLUSH_CHUNKS:
+                ingest_fn(chunks, metas)
+                chunks, metas = [], []
+        if chunks:
+            ingest_fn(chunks, metas)
+    finally:
+        if tmp:
+            os.remove(tmp.name)
+    return count
@@ -0,0 +1,78 @@
+import contextvars
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# How long the retrieval node waits for an in-flight prefetch before giving up on it
+TAKE_TIMEOUT = 5.0
+
+
+class MemoryPrefetcher:
+    """
+    Speculative memory retrieval.
+    As soon as we have the user's transcript we start embedding + querying in the
+    background. The result sits in a per-turn slot (keyed by thread_id) until the
+    router decides: SEARCH consumes it, any other route discards it.
+    """
+
+    def __init__(self, retrieve_fn, max_workers=2):
+        self.retrieve_fn = retrieve_fn
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+        self._slots = {}  # thread_id -> (text, future)
+        self._lock = threading.Lock()
+        self.stats = {"started": 0, "hits": 0, "misses": 0, "wasted": 0, "errors": 0}
+
+    def start(self, thread_id, text, **kwargs):
+        """Kick off retrieval for `text`. No-op if the same text is already in flight."""
+        if not text:
+            return
+        with self._lock:
+            slot = self._slots.get(thread_id)
+            if slot and slot[0] == text:
+                return
+            if slot:
+                # A newer transcript replaced the old one
+                self.stats["wasted"] += 1
+            future = self._pool.submit(contextvars.copy_context().run, self.retrieve_fn, text, **kwargs)
+            self._slots[thread_id] = (text, future)
+            self.stats["started"] += 1
+
+    def take(self, thread_id, timeout=TAKE_TIMEOUT):
+        """
+        Returns the prefetched context, or None if there is nothing usable
+        (retrieve_fn returning None means "skipped", and counts as a miss).
+        """
+        with self._lock:
+            slot = self._slots.pop(thread_id, None)
+            if not slot:
+                self.stats["misses"] += 1
+                return None
+        try:
+            result = slot[1].result(timeout=timeout)
+        except Exception as e:
+            print(f"⚠️ Prefetch failed: {e}")
+            with self._lock:
+                self.stats["errors"] += 1
+            return None
+        with self._lock:
+            self.stats["hits" if result is not None else "misses"] += 1
+        return result
+
+    def discard(self, thread_id):
+        """Router picked a non-memory route: drop the speculative result."""
+        with self._lock:
+            slot = self._slots.pop(thread_id, None)
+            if slot:
+                self.stats["wasted"] += 1
+        if slot:
+            slot[1].cancel()
+
+    def report(self):
+        with self._lock:
+            stats = dict(self.stats)
+        used = stats["hits"] + stats["misses"]
+        started = stats["started"] or 1
+        return {
+            **stats,
+            "hit_rate": round(stats["hits"] / used, 3) if used else 0.0,
+            "waste_rate": round(stats["wasted"] / started, 3),
+        }
@@ -1,85 +1,621 @@
+import atexit
 import os
+import json
+import hashlib
+import re
 import time
+import threading
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from pinecone import Pinecone, ServerlessSpec
-from sentence_transformers import SentenceTransformer
+from backend.manifest import IngestManifest, chunk_id
+from backend.embed_cache import LazyEmbedder
+from backend.encoders import load_encoder
+from backend.embed_server import EMBED_SOCKET, EmbedClient
+from backend.keyword_index import KeywordIndex, rrf_fuse, tokenize
+from backend.vector_store import matches_filter
+from backend.write_behind import WriteBehindBuffer
+from backend import tracing
+from backend.context_packing import CONTEXT_BUDGET, pack_context, trim_to_tokens
 
 load_dotenv()
 
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 INDEX_NAME = "voice-agent-memory"
 
+# Bulk ingestion
+ENCODE_BATCH = 64                    # Sentences per embedder forward pass
+UPSERT_BATCH = 100                   # Max vectors per upsert request
+UPSERT_MAX_BYTES = 2 * 1024 * 1024   # Pinecone rejects requests over ~2MB
+
+# "pinecone", "local" (in-process index in backend/vector_store.py)
+# or "fake" (in-memory Pinecone stand-in with injected latency/failures, backend/fake_pinecone.py)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "pinecone" if PINECONE_API_KEY else "local")
+LOCAL_INDEX_PATH = os.getenv("LOCAL_INDEX_PATH", "data/local_index")
+# "float32" or "int8" (quantized in RAM, exact re-rank from float vectors on disk)
+LOCAL_INDEX_STORAGE = os.getenv("LOCAL_INDEX_STORAGE", "float32")
+# "flat" (exact scan) or "ivf" (approximate, probes IVF_NPROBE clusters once past IVF_MIN_VECTORS)
+LOCAL_INDEX_TYPE = os.getenv("LOCAL_INDEX_TYPE", "flat")
+
+KNOWLEDGE_BASE = "data/knowledge_base.txt"
+SYNC_EXTENSIONS = (".txt", ".md")
+
+# What is already embedded, per file (content hash per chunk)
+manifest = IngestManifest(os.getenv("INGEST_MANIFEST_PATH", "data/ingest_manifest.json"))
+
+# BM25 index kept alongside the vectors (names / IDs / acronyms)
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") == "1"
+keywords = KeywordIndex(os.getenv("KEYWORD_INDEX_PATH", "data/keyword_index.json"))
+retrieve_stats = {"queries": 0, "keyword_short_circuits": 0}
+
+# Saved facts: cosine similarity above which a new fact is a repeat / replaces an old one
+DUPLICATE_SIM = 0.95
+SUPERSEDE_SIM = 0.85
+COMPACT_INTERVAL = 6 * 3600  # Seconds between background compaction runs
+_kb_lock = threading.Lock()  # save_memory appends vs. compaction rewrites
+
+# Over-fetch, drop near-duplicates (MMR) and trim retrieved context to a token budget
+CONTEXT_PACKING = os.getenv("CONTEXT_PACKING", "1") == "1"
+OVERFETCH = 4
+
 # Initialize Pinecone & Embedder
-if PINECONE_API_KEY:
+if VECTOR_BACKEND == "pinecone" and PINECONE_API_KEY:
+    from pinecone import Pinecone
     pc = Pinecone(api_key=PINECONE_API_KEY)
+elif VECTOR_BACKEND == "fake":
+    from backend.fake_pinecone import FakePinecone
+    pc = FakePinecone(latency_ms=float(os.getenv("FAKE_PINECONE_LATENCY_MS", "0")),
+                      jitter_ms=float(os.getenv("FAKE_PINECONE_JITTER_MS", "0")),
+                      failure_rate=float(os.getenv("FAKE_PINECONE_FAILURE_RATE", "0")),
+                      seed=int(os.getenv("FAKE_PINECONE_SEED", "0")))
+    print("🧪 Using in-memory Pinecone stand-in")
 else:
     pc = None
-    print("⚠️ PINECONE_API_KEY missing. RAG will not work.")
+    if VECTOR_BACKEND == "pinecone":
+        print("⚠️ PINECONE_API_KEY missing. RAG will not work.")
+    else:
+        print(f"📁 Using local vector index at {LOCAL_INDEX_PATH}")
+
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", "data/embed_cache.sqlite")
+
+def _connect_encoder():
+    """Shared daemon (python -m backend.embed_server) if running, else load in-process."""
+    client = EmbedClient(EMBED_SOCKET, fallback=load_encoder)
+    info = client.info()
+    if info:
+        print(f"🔗 Using shared embedding daemon at {EMBED_SOCKET}")
+        return client, info["name"]
+    print("⏳ Loading Embedding Model...")
+    return load_encoder()
 
-print("⏳ Loading Embedding Model...")
-embedder = SentenceTransformer('all-MiniLM-L6-v2')
+# Every encode goes through a disk-backed cache keyed by hash(model + text).
+# The model connects on first use (or in backend/warmup.py), not at import.
+embedder = LazyEmbedder(_connect_encoder, path=EMBED_CACHE_PATH)
 
 def setup_index():
     """Creates Index if missing"""
     if not pc: return
     existing = [i.name for i in pc.list_indexes()]
     if INDEX_NAME not in existing:
+        spec = None # The in-memory stand-in needs no spec (and pinecone may not be installed)
+        if VECTOR_BACKEND == "pinecone":
+            from pinecone import ServerlessSpec
+            spec = ServerlessSpec(cloud="aws", region="us-east-1")
         pc.create_index(
             name=INDEX_NAME, 
             dimension=384, 
             metric="cosine", 
-            spec=ServerlessSpec(cloud="aws", region="us-east-1")
+            spec=spec
         )
-        time.sleep(10) # Wait for AWS to provision
+        # Wait for AWS to provision (poll instead of a fixed 10 s sleep)
+        deadline = time.time() + 60
+        while not pc.describe_index(INDEX_NAME).status["ready"] and time.time() < deadline:
+            time.sleep(1)
+
+def _open_index():
+    if VECTOR_BACKEND == "local":
+        from backend.vector_store import IVFLocalIndex, LocalIndex, LocalNamespaces, QuantizedLocalIndex
+        if LOCAL_INDEX_TYPE == "ivf":
+            cls = IVFLocalIndex
+        else:
+            cls = QuantizedLocalIndex if LOCAL_INDEX_STORAGE == "int8" else LocalIndex
+        return LocalNamespaces(LOCAL_INDEX_PATH, dimension=384, index_cls=cls)
+    if pc:
+        setup_index()
+        return pc.Index(INDEX_NAME)
+    return None
+
+_index = None
+_index_lock = threading.Lock()  # Warm-up and the first query may race to open it
+
+def get_index():
+    """Resolves the index handle once. None if no backend is available."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = _open_index()
+    return _index
+
+def flush():
+    """Persists the local index (no-op for Pinecone) and the keyword index."""
+    if hasattr(_index, "flush"):
+        _index.flush()
+    keywords.flush()
+
+def _upsert_batches(vectors):
+    """Splits vectors into requests bounded by count AND payload size."""
+    batch, batch_bytes = [], 0
+    for v in vectors:
+        # Rough wire size: float values as JSON + metadata
+        size = len(v[1]) * 10 + len(json.dumps(v[2])) + len(v[0]) + 16
+        if batch and (len(batch) >= UPSERT_BATCH or batch_bytes + size > UPSERT_MAX_BYTES):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(v)
+        batch_bytes += size
+    if batch:
+        yield batch
+
+def ingest_chunks(chunks, metadatas=None, ids=None, encode_batch=ENCODE_BATCH, progress=None, namespace="",
+                  persist=True):
+    """
+    Bulk ingestion: encodes in batches and upserts in size-bounded batches.
+    Upserts run on a background thread, so the network round trip for one
+    batch overlaps with encoding the next. Returns the number of vectors written.
+    persist=False skips the flush: callers feeding many batches flush once at the end.
+    """
+    index = get_index()
+    if index is None or not chunks: return 0
+    if ids is None:
+        prefix = str(time.time())
+        ids = [f"{prefix}-{i}" for i in range(len(chunks))]
+
+    # At interpreter exit no new threads can start: upsert inline instead
+    uploader = None if _exiting else ThreadPoolExecutor(max_workers=1, thread_name_prefix="upsert")
+    pending = []
+    done = 0
+    try:
+        for start in range(0, len(chunks), encode_batch):
+            batch = chunks[start:start + encode_batch]
+            vecs = embedder.encode(batch, batch_size=encode_batch)
+            vectors = []
+            for j, (chunk, vec) in enumerate(zip(batch, vecs)):
+                meta = dict(metadatas[start + j]) if metadatas else {}
+                meta["text"] = chunk
+                vectors.append((ids[start + j], vec.tolist(), meta))
+                keywords.add(ids[start + j], chunk, namespace)
+            for req in _upsert_batches(vectors):
+                if uploader is None:
+                    index.upsert(vectors=req, namespace=namespace)
+                else:
+                    pending.append(uploader.submit(index.upsert, vectors=req, namespace=namespace))
+            # Don't let encoded-but-unsent batches pile up in memory
+            while len(pending) > 4:
+                pending.pop(0).result()
+            done += len(batch)
+            if progress:
+                progress(done, len(chunks))
+        for future in pending:
+            future.result() # Surface upsert errors
+    finally:
+        if uploader:
+            uploader.shutdown(wait=True)
+    if persist:
+        flush()
+    return done
+
+def _delete_ids(ids):
+    index = get_index()
+    ids = list(ids)
+    for start in range(0, len(ids), 1000): # Pinecone deletes at most 1000 IDs per call
+        index.delete(ids=ids[start:start + 1000])
+    for id_ in ids:
+        keywords.remove(id_)
+
+def sync_file(filepath=KNOWLEDGE_BASE, persist=True):
+    """
+    Incremental ingestion: one chunk per non-empty line, ID = content hash.
+    Only new/changed lines are embedded, removed lines are deleted.
+    Returns (added, removed). persist=False leaves the flush to the caller.
+    """
+    if get_index() is None: return (0, 0)
+    stat = os.stat(filepath)
+    if manifest.unchanged(filepath, stat.st_mtime, stat.st_size) and len(keywords):
+        return (0, 0)
 
-def ingest_file(filepath="data/knowledge_base.txt"):
-    """Reads file and uploads to Pinecone (Batch Mode)"""
-    if not pc: return
-    setup_index()
-    index = pc.Index(INDEX_NAME)
-    
     with open(filepath, "r") as f:
         text = f.read()
-    
-    chunks = [c.strip() for c in text.split("\n") if c.strip()]
-    vectors = []
-    
-    print(f"🚀 Ingesting {len(chunks)} facts...")
-    for i, chunk in enumerate(chunks):
-        vec = embedder.encode(chunk).tolist()
-        # Use simple ID for initial batch
-        vectors.append((str(i), vec, {"text": chunk}))
-    
-    index.upsert(vectors=vectors)
+    chunks = {}
+    for line in text.split("\n"):
+        if line.strip():
+            chunks[chunk_id(filepath, line.strip())] = line.strip()
+
+    known = manifest.ids(filepath)
+    if not known and filepath == KNOWLEDGE_BASE:
+        # First sync: drop the positional IDs ("0", "1", ...) the old ingest_file wrote
+        _delete_ids(str(i) for i in range(len(chunks)))
+
+    new_ids = [i for i in chunks if i not in known]
+    removed = known - set(chunks)
+    # Backfill the keyword index for lines embedded before it existed (no embedding needed)
+    for i in known & set(chunks):
+        if i not in keywords:
+            keywords.add(i, chunks[i])
+    if new_ids:
+        print(f"🚀 Ingesting {len(new_ids)} new facts from {filepath}...")
+        ingest_chunks([chunks[i] for i in new_ids], ids=new_ids,
+                      metadatas=[{"source": filepath}] * len(new_ids), persist=False)
+    if removed:
+        print(f"🧹 Removing {len(removed)} stale facts from {filepath}...")
+        _delete_ids(removed)
+    if persist:
+        flush()
+    manifest.set(filepath, chunks.keys(), stat.st_mtime, stat.st_size)
+    return (len(new_ids), len(removed))
+
+def sync_directory(dirpath, extensions=SYNC_EXTENSIONS):
+    """Syncs every text file in a folder; files that disappeared are deleted from the index."""
+    if get_index() is None: return (0, 0)
+    added = removed = 0
+    present = set()
+    for root, _, files in os.walk(dirpath):
+        for name in sorted(files):
+            if name.endswith(extensions):
+                path = os.path.join(root, name)
+                present.add(path)
+                a, r = sync_file(path, persist=False)  # One flush for the whole folder
+                added, removed = added + a, removed + r
+    prefix = os.path.join(dirpath, "")
+    for source in manifest.sources():
+        if source.startswith(prefix) and source not in present:
+            gone = manifest.ids(source)
+            print(f"🧹 {source} was deleted, removing {len(gone)} facts...")
+            _delete_ids(gone)
+            manifest.remove(source)
+            removed += len(gone)
+    flush()
+    return (added, removed)
+
+def watch_directory(dirpath, interval=5.0, stop_event=None):
+    """Polls a folder and keeps the index in sync until stop_event is set."""
+    print(f"👀 Watching {dirpath} (every {interval}s)")
+    while stop_event is None or not stop_event.is_set():
+        added, removed = sync_directory(dirpath)
+        if added or removed:
+            print(f"✅ {dirpath}: +{added} / -{removed}")
+        time.sleep(interval)
+
+def ingest_knowledge_base():
+    """Entry point used by setup.py and main.py"""
+    added, removed = sync_file(KNOWLEDGE_BASE)
+    print(f"✅ Memory Updated (+{added} / -{removed}).")
+
+def ingest_file(filepath=KNOWLEDGE_BASE):
+    """Reads file and uploads to Pinecone (incremental, see sync_file)"""
+    sync_file(filepath)
     print("✅ Memory Updated.")
+    print(f"📊 Embedding cache: {embedder.report()}")
 
-def ingest_text(text):
+def ingest_text(text, source=None):
     """
-    NEW: Uploads a SINGLE fact immediately.
-    Called by the 'save_user_info' tool in core.py.
+    Saves a SINGLE fact. Returns as soon as it is journaled; the embedding and
+    upsert happen in the next write-behind batch (retrieve() already sees it).
+    With a `source` file, the ID is the content hash and goes into the manifest,
+    so the next sync of that file doesn't embed it again.
     """
-    if not pc: return
-    setup_index()
-    index = pc.Index(INDEX_NAME)
-    
-    print(f"💾 Real-time Ingestion: '{text}'")
-    vec = embedder.encode(text).tolist()
-    
-    # Generate a unique ID based on time so we don't overwrite old facts
-    unique_id = str(time.time())
-    
-    index.upsert(vectors=[(unique_id, vec, {"text": text})])
-    print("✅ Fact Saved to Database.")
-
-def retrieve(query):
-    """Searches memory"""
-    if not pc: return ""
-    index = pc.Index(INDEX_NAME)
-    vec = embedder.encode(query).tolist()
-    
-    results = index.query(vector=vec, top_k=3, include_metadata=True)
-    return "\n".join([m['metadata']['text'] for m in results['matches']])
+    if get_index() is None: return
+    text = text.strip()
+    # Without a source: a time-based ID so we don't overwrite old facts
+    unique_id = chunk_id(source, text) if source else str(time.time())
+    writer.submit({"kind": "text", "id": unique_id, "text": text, "source": source})
+    print(f"💾 Queued: '{text}'")
+
+def save_fact(text):
+    """save_memory's write path: journaled now, de-duplicated (see remember_many) when applied."""
+    text = text.strip()
+    writer.submit({"kind": "fact", "id": chunk_id(KNOWLEDGE_BASE, text), "text": text, "source": KNOWLEDGE_BASE})
+
+def _ingest_entries(entries):
+    """One bulk ingest per source for queued ingest_text() calls."""
+    by_source = {}
+    for e in entries:
+        by_source.setdefault(e["source"], []).append(e)
+    for source, group in by_source.items():
+        meta = {"source": source} if source else {}
+        ingest_chunks([e["text"] for e in group], ids=[e["id"] for e in group],
+                      metadatas=[meta] * len(group))
+        if source:
+            manifest.add(source, [e["id"] for e in group])
+    print(f"✅ {len(entries)} facts saved to database.")
+
+def _apply_writes(entries):
+    """Write-behind batch: saved facts go through dedup, the rest straight to bulk ingest."""
+    facts = [e["text"] for e in entries if e["kind"] == "fact"]
+    others = [e for e in entries if e["kind"] != "fact"]
+    if facts:
+        remember_many(facts)
+    if others:
+        _ingest_entries(others)
+
+# --- SAVED FACTS (dedup / supersede / compaction) ---
+def _read_facts():
+    if not os.path.exists(KNOWLEDGE_BASE):
+        return []
+    with open(KNOWLEDGE_BASE, "r") as f:
+        return [line.strip() for line in f if line.strip()]
+
+def _write_facts(facts):
+    tmp = f"{KNOWLEDGE_BASE}.tmp"
+    with open(tmp, "w") as f:
+        f.write("\n".join(facts))
+    os.replace(tmp, KNOWLEDGE_BASE)
+
+# Relations that hold one value at a time: a new value replaces the old one.
+# Others ("I like pizza" / "I like pasta") can hold many, so both facts are kept.
+_SINGLE_VALUED = {"live", "lives", "living", "name", "named", "called", "age", "old", "born", "birthday",
+                  "work", "works", "working", "job", "study", "studying", "studies", "email", "phone",
+                  "address", "favorite", "favourite"}
+_ATTRIBUTE = re.compile(r"^\s*my\b.*\b(?:is|are)\b", re.IGNORECASE)  # "My car is a Honda"
+
+def _same_subject(a, b):
+    """
+    'I live in Delhi' vs 'I live in Raipur': everything but the trailing value
+    matches, and the relation holds one value ('live', 'my ... is').
+    """
+    ta, tb = tokenize(a), tokenize(b)
+    shared = 0
+    while shared < min(len(ta), len(tb)) and ta[shared] == tb[shared]:
+        shared += 1
+    if not shared or shared == len(ta) or shared == len(tb):
+        return False
+    return bool(_SINGLE_VALUED & set(ta[:shared])) or bool(_ATTRIBUTE.match(a) and _ATTRIBUTE.match(b))
+
+def _append_facts(facts):
+    """Appends facts not in the file yet: a retried write-behind batch doesn't write them twice."""
+    known = set(_read_facts())
+    new = [t for t in dict.fromkeys(facts) if t not in known]
+    if new:
+        with open(KNOWLEDGE_BASE, "a") as f:
+            f.write("".join(f"\n{text}" for text in new))
+
+def remember_many(texts):
+    """
+    Applies saved facts in one batch. Each is checked against saved ones first:
+      "duplicate" - an (almost) identical fact exists, nothing is written
+      "updated"   - a fact about the same thing is replaced in place (file line + vector)
+      "saved"     - appended as a new fact
+    New and updated facts are embedded and upserted together. Returns the statuses.
+    """
+    texts = [t.strip() for t in texts]
+    index = get_index()
+    with _kb_lock:
+        if index is None:
+            _append_facts(texts) # Keep the file as the source of truth; next sync embeds it
+            return ["saved"] * len(texts)
+        vecs = embedder.encode(texts, batch_size=ENCODE_BATCH)
+        statuses, added, replaced = [], [], {}  # replaced: old id -> (old text, new text)
+        for text, vec in zip(texts, vecs):
+            if text in added or text in [new for _, new in replaced.values()]:
+                statuses.append("duplicate")
+                continue
+            results = index.query(vector=vec.tolist(), top_k=1, include_metadata=True,
+                                  filter={"source": KNOWLEDGE_BASE})
+            best = results['matches'][0] if results['matches'] else None
+            if best and best['score'] >= DUPLICATE_SIM:
+                print(f"♻️ Already known: '{best['metadata']['text']}'")
+                statuses.append("duplicate")
+                continue
+            old = best['metadata']['text'] if best and best['score'] >= SUPERSEDE_SIM else None
+            if old and _same_subject(old, text) and best['id'] not in replaced:
+                replaced[best['id']] = (old, text)
+                statuses.append("updated")
+                continue
+            added.append(text)
+            statuses.append("saved")
+
+        if replaced:
+            swap = dict(replaced.values())
+            _write_facts([swap.get(f, f) for f in _read_facts()])
+        if added:
+            _append_facts(added)
+        written = added + [new for _, new in replaced.values()]
+        if written:
+            ids = [chunk_id(KNOWLEDGE_BASE, t) for t in written]
+            ingest_chunks(written, ids=ids, metadatas=[{"source": KNOWLEDGE_BASE}] * len(written))
+            manifest.add(KNOWLEDGE_BASE, ids)
+        if replaced:
+            _delete_ids(replaced)
+            manifest.discard(KNOWLEDGE_BASE, replaced)
+            flush()
+            for old, new in replaced.values():
+                print(f"✏️ Updated: '{old}' -> '{new}'")
+    return statuses
+
+def remember(text):
+    """Synchronous single-fact version of remember_many."""
+    return remember_many([text])[0]
+
+def compact_memory(threshold=DUPLICATE_SIM):
+    """
+    Drops saved facts that repeat a newer one (cosine >= threshold), rewrites the
+    knowledge base and syncs, so their vectors are deleted.
+    Returns {"facts", "kept", "reclaimed"}.
+    """
+    if get_index() is None: return {"facts": 0, "kept": 0, "reclaimed": 0}
+    with _kb_lock:
+        facts = _read_facts()
+        if not facts:
+            return {"facts": 0, "kept": 0, "reclaimed": 0}
+        vecs = embedder.encode(facts, batch_size=ENCODE_BATCH) # Cache hits for synced lines
+        vecs = vecs / np.clip(np.linalg.norm(vecs, axis=1, keepdims=True), 1e-12, None)
+        keep = []
+        # Newest line wins: walk from the end of the file
+        for i in range(len(facts) - 1, -1, -1):
+            if keep and float((vecs[keep] @ vecs[i]).max()) >= threshold:
+                continue
+            keep.append(i)
+        kept = [facts[i] for i in sorted(keep)]
+        if len(kept) < len(facts):
+            _write_facts(kept)
+        _, reclaimed = sync_file(KNOWLEDGE_BASE)
+    report = {"facts": len(facts), "kept": len(kept), "reclaimed": reclaimed}
+    print(f"🧹 Compaction: {report}")
+    return report
+
+def start_compaction(interval=COMPACT_INTERVAL):
+    """Runs compact_memory every `interval` seconds on a daemon thread. Returns its stop event."""
+    stop = threading.Event()
+
+    def _loop():
+        while not stop.wait(interval):
+            try:
+                compact_memory()
+            except Exception as e:
+                print(f"⚠️ Compaction failed: {e}")
+
+    threading.Thread(target=_loop, name="compaction", daemon=True).start()
+    return stop
+
+# Memory writes are acknowledged at once and applied in batches (journal survives crashes)
+writer = WriteBehindBuffer(_apply_writes, os.getenv("MEMORY_JOURNAL_PATH", "data/memory_journal.jsonl"),
+                           close_at_exit=False)
+
+_exiting = False
+
+def _shutdown():
+    """atexit: applies the queued memory writes, then persists the indexes they touched."""
+    global _exiting
+    _exiting = True  # Thread pools refuse new work now; ingest_chunks upserts inline
+    writer.close()
+    flush() # After the writer: the local index's own atexit flush has already run
+
+atexit.register(_shutdown)
+
+# --- DOCUMENTS (one namespace per uploaded file) ---
+def doc_namespace(source):
+    """Namespace holding one uploaded document's chunks."""
+    return "doc-" + hashlib.sha1(source.encode("utf-8")).hexdigest()[:16]
+
+def ingest_pdf(file, source, progress=None):
+    """
+    Streaming PDF ingestion into the document's own namespace (see backend/pdf_pipeline.py).
+    Each chunk carries source / page / chunk / uploaded_at metadata.
+    progress(pages_done, total_pages) is called as pages are read.
+    """
+    from backend.pdf_pipeline import ingest_pdf_stream
+    namespace = doc_namespace(source)
+    uploaded_at = time.time()
+
+    def _ingest(chunks, metas):
+        for m in metas:
+            m["uploaded_at"] = uploaded_at
+        ids = [f"{namespace}-{m['chunk']}" for m in metas]
+        ingest_chunks(chunks, metadatas=metas, ids=ids, namespace=namespace, persist=False)
+
+    try:
+        return ingest_pdf_stream(file, source, _ingest, progress=progress)
+    finally:
+        flush() # Once per document, not per batch: each flush rewrites the whole local store
+
+def delete_document(source):
+    """Really deletes an uploaded document's vectors (drops its namespace)."""
+    index = get_index()
+    if index is None: return
+    try:
+        keywords.remove_namespace(doc_namespace(source))
+        keywords.flush()
+        index.delete(delete_all=True, namespace=doc_namespace(source))
+        print(f"🗑️ Deleted {source} from memory.")
+    except Exception as e:
+        # Pinecone returns 404 for a namespace that was never written
+        print(f"⚠️ Could not delete {source}: {e}")
+
+def retrieve(query, top_k=3, namespace=None, filter=None, budget=CONTEXT_BUDGET):
+    """
+    Searches memory.
+    namespace: None = default memory, a string, or a list of namespaces to merge.
+    filter: Pinecone-style metadata filter, e.g. {"source": "resume.pdf"}.
+    budget: approx. tokens of context returned (when CONTEXT_PACKING is on).
+    """
+    with tracing.span("rag.retrieve", namespaces=len(namespace) if isinstance(namespace, list) else 1):
+        return _retrieve(query, top_k, namespace, filter, budget)
+
+def _retrieve(query, top_k, namespace, filter, budget):
+    index = get_index()
+    if index is None: return ""
+    namespaces = [namespace] if isinstance(namespace, str) else (namespace or [""])
+    hybrid = HYBRID_SEARCH and not filter # BM25 side has no metadata filters
+    retrieve_stats["queries"] += 1
+
+    # Read-your-writes: facts saved in the last few seconds may not be upserted yet
+    pending = writer.pending() if "" in namespaces else []
+
+    # 1. Exact keyword hit ("NIT Raipur") -> skip the embedding + vector query entirely
+    if hybrid and not pending:
+        exact = keywords.exact_lookup(query, top_k=top_k, namespaces=namespaces)
+        if exact:
+            retrieve_stats["keyword_short_circuits"] += 1
+            texts = [text for _, _, text in exact]
+            if CONTEXT_PACKING:
+                per_passage = budget // max(len(texts), 1)
+                texts = [trim_to_tokens(t, per_passage) for t in texts]
+            return "\n".join(texts)
+
+    # 2. Dense retrieval (over-fetch when we are going to fuse or pack)
+    with tracing.span("rag.embed"):
+        query_vec = embedder.encode(query)
+    fetch_k = top_k * OVERFETCH if CONTEXT_PACKING else (top_k * 2 if hybrid else top_k)
+    matches = []
+    with tracing.span("rag.query", top_k=fetch_k):
+        for ns in namespaces:
+            # Packing needs the candidates' vectors: take the stored ones instead of re-embedding
+            results = index.query(vector=query_vec.tolist(), top_k=fetch_k, include_metadata=True, filter=filter,
+                                  namespace=ns, include_values=CONTEXT_PACKING)
+            matches.extend(results['matches'])
+    if pending:
+        pending_vecs = embedder.encode([e["text"] for e in pending], batch_size=ENCODE_BATCH)
+        q_norm = float(np.linalg.norm(query_vec)) or 1.0
+        seen = {m['id'] for m in matches}
+        for e, v in zip(pending, pending_vecs):
+            meta = {"text": e["text"], **({"source": e["source"]} if e["source"] else {})}
+            if e["id"] in seen or (filter and not matches_filter(meta, filter)):
+                continue
+            score = float(v @ query_vec) / (float(np.linalg.norm(v)) * q_norm or 1.0)
+            matches.append({"id": e["id"], "score": score, "metadata": meta, "values": v})
+    matches.sort(key=lambda m: m['score'], reverse=True)
+    ranked = [(m['id'], m['metadata']['text']) for m in matches[:fetch_k]]
+
+    # 3. Fuse dense + BM25 rankings
+    if hybrid:
+        sparse = [(id_, text) for id_, _, text in keywords.search(query, top_k=fetch_k, namespaces=namespaces)]
+        ranked = rrf_fuse([ranked, sparse], top_k=fetch_k)
+
+    if not CONTEXT_PACKING:
+        return "\n".join([text for _, text in ranked[:top_k]])
+
+    # 4. Pack: MMR over the candidates. Dense hits carry their stored vectors;
+    #    only BM25-only hits are encoded (usually straight from the embedding cache)
+    texts = [text for _, text in ranked]
+    if not texts:
+        return ""
+    stored = {m['id']: m['values'] for m in matches if len(m['values'])}
+    missing = [i for i, (id_, _) in enumerate(ranked) if id_ not in stored]
+    vecs = np.zeros((len(ranked), len(query_vec)), dtype=np.float32)
+    for i, (id_, _) in enumerate(ranked):
+        if id_ in stored:
+            vecs[i] = stored[id_]
+    if missing:
+        vecs[missing] = embedder.encode([texts[i] for i in missing], batch_size=ENCODE_BATCH)
+    passages = pack_context(query_vec, texts, vecs, max_passages=top_k + 2, budget=budget)
+    return "\n".join(passages)
 
 if __name__ == "__main__":
-    # If run directly, it loads the file
-    ingest_file()
\ No newline at end of file
+    import sys
+    # If run directly, it syncs the file (or watches a folder: python -m backend.rag_engine docs/)
+    if sys.argv[1:] == ["--compact"]:
+        compact_memory()
+    elif len(sys.argv) > 1:
+        watch_directory(sys.argv[1])
+    else:
+        ingest_knowledge_base()
\ No newline at end of file
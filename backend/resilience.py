@@ -0,0 +1,131 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+# --- CONFIG ---
+TURN_BUDGET = 8.0  # Seconds for one whole voice turn (router -> answer)
+
+# Max share of the turn budget each stage may use
+STAGE_SHARES = {
+    "router": 0.35,
+    "retrieval": 0.25,
+    "web": 0.35,
+    "answer": 0.5,
+}
+
+# Calls that blow their deadline keep running here in the background,
+# so the pool is sized for a few stuck calls at once.
+_pool = ThreadPoolExecutor(max_workers=8, thread_name_prefix="deadline")
+
+
+# --- DEADLINES ---
+def new_deadline(budget=TURN_BUDGET):
+    """Absolute wall-clock deadline. Stored as a float so it fits in graph state."""
+    return time.time() + budget
+
+
+def stage_timeout(deadline, stage):
+    """Seconds the given stage may use: its share of the budget, capped by what is left."""
+    remaining = (deadline or new_deadline()) - time.time()
+    share = TURN_BUDGET * STAGE_SHARES.get(stage, 1.0)
+    return max(0.0, min(remaining, share))
+
+
+# --- CIRCUIT BREAKERS ---
+class CircuitBreaker:
+    """
+    CLOSED: calls go through.
+    OPEN: after `failure_threshold` failures in a row, calls are skipped for `cooldown` seconds.
+    HALF_OPEN: after the cool-down one trial call is let through; everyone else is
+    skipped until it records success (CLOSED) or failure (OPEN again). A trial that
+    never reports back frees the slot after another cool-down.
+    """
+
+    def __init__(self, name, failure_threshold=3, cooldown=30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None  # When the HALF_OPEN trial call was let through
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "CLOSED"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "HALF_OPEN"
+        return "OPEN"
+
+    def allow(self):
+        """True if the caller may make the call. In HALF_OPEN only the first caller gets True."""
+        with self._lock:
+            state = self.state
+            if state != "HALF_OPEN":
+                return state == "CLOSED"
+            now = time.monotonic()
+            if self.probe_at is not None and now - self.probe_at < self.cooldown:
+                return False  # Trial call still in flight
+            self.probe_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probe_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                if self.opened_at is None:
+                    print(f"🔌 Circuit OPEN for {self.name} ({self.cooldown:.0f}s cool-down)")
+                self.opened_at = time.monotonic()
+                self.probe_at = None
+
+
+breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name):
+    with _breakers_lock:
+        if name not in breakers:
+            breakers[name] = CircuitBreaker(name)
+        return breakers[name]
+
+
+def call_with_deadline(fn, *args, timeout, breaker=None, fallback=None, **kwargs):
+    """
+    Runs fn(*args, **kwargs) with a timeout. Returns `fallback` instead of raising
+    when the call fails, times out, or its circuit breaker is open.
+    """
+    # Budget first: allow() may hand out the single HALF_OPEN trial, which must lead to a call
+    if timeout <= 0:
+        print(f"⏭️ No time left for {getattr(breaker, 'name', fn.__name__)}")
+        return fallback
+    if breaker is not None and not breaker.allow():
+        print(f"⏭️ Skipping {breaker.name} (circuit open)")
+        return fallback
+
+    # Carry the caller's context (turn ID for tracing) into the worker thread
+    future = _pool.submit(contextvars.copy_context().run, fn, *args, **kwargs)
+    try:
+        result = future.result(timeout=timeout)
+    except FutureTimeout:
+        print(f"⏱️ {getattr(breaker, 'name', fn.__name__)} timed out after {timeout:.1f}s")
+        if breaker is not None:
+            breaker.record_failure()
+        return fallback
+    except Exception as e:
+        print(f"⚠️ {getattr(breaker, 'name', fn.__name__)} failed: {e}")
+        if breaker is not None:
+            breaker.record_failure()
+        return fallback
+
+    if breaker is not None:
+        breaker.record_success()
+    return result
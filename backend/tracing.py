@@ -0,0 +1,219 @@
+"""
+Per-turn tracing: one span per stage (listen -> transcribe -> think -> speak),
+all tagged with the same turn ID.
+
+    turn_id = tracing.start_turn()
+    with tracing.span("stt", model="whisper"):
+        ...
+    tracing.end_turn()
+
+Finished spans always feed in-memory histograms (tracing.report()).
+TRACE_EXPORT picks file exporters, comma-separated:
+  jsonl - one span per line in data/traces.jsonl
+  otlp  - OTLP/JSON (what an OpenTelemetry Collector's otlpjsonfile receiver
+          reads) in data/traces.otlp.jsonl, no network or SDK needed
+TRACING=0 turns spans into no-ops.
+"""
+import bisect
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+
+TRACING = os.getenv("TRACING", "1") == "1"
+TRACE_EXPORT = [e for e in os.getenv("TRACE_EXPORT", "").split(",") if e]
+JSONL_PATH = os.getenv("TRACE_JSONL_PATH", "data/traces.jsonl")
+OTLP_PATH = os.getenv("TRACE_OTLP_PATH", "data/traces.otlp.jsonl")
+
+# Histogram bucket upper bounds (ms)
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 300, 500, 750, 1000, 1500, 2000, 3000, 5000, 10000, float("inf")]
+
+_turn = contextvars.ContextVar("turn", default=None)      # (turn_id, start_ns, root span ID)
+_parent = contextvars.ContextVar("span_parent", default=None)
+# Threads that don't inherit a turn's context (warm-up, write-behind, compaction)
+# record their spans without a turn ID rather than borrowing whichever turn is newest.
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, ms):
+        self.counts[bisect.bisect_left(BUCKETS, ms)] += 1
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th value (max for the open bucket)."""
+        target, seen = q * self.count, 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if seen >= target and n:
+                return round(min(bound, self.max), 1)
+        return round(self.max, 1)
+
+
+class JsonlExporter:
+    def __init__(self, path=JSONL_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", buffering=1)  # Line-buffered: a crash loses at most one span
+
+    def export(self, span):
+        self._file.write(json.dumps(span) + "\n")
+
+
+class OtlpJsonExporter:
+    """OTLP/JSON: one ExportTraceServiceRequest per line, one span each."""
+
+    def __init__(self, path=OTLP_PATH, service_name="jarvis-voice-agent"):
+        self.path = path
+        self.resource = {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a", buffering=1)
+
+    @staticmethod
+    def _value(v):
+        if isinstance(v, bool):
+            return {"boolValue": v}
+        if isinstance(v, int):
+            return {"intValue": str(v)}
+        if isinstance(v, float):
+            return {"doubleValue": v}
+        return {"stringValue": str(v)}
+
+    def export(self, span):
+        otlp = {
+            "traceId": span["trace_id"],
+            "spanId": span["span_id"],
+            "name": span["name"],
+            "kind": 1,
+            "startTimeUnixNano": str(span["start_ns"]),
+            "endTimeUnixNano": str(span["end_ns"]),
+            "attributes": [{"key": k, "value": self._value(v)}
+                           for k, v in dict(span["attrs"], **{"turn.id": span["turn_id"]}).items()],
+            "status": {"code": 2 if span.get("error") else 1},
+        }
+        if span["parent_id"]:
+            otlp["parentSpanId"] = span["parent_id"]
+        request = {"resourceSpans": [{"resource": self.resource,
+                                      "scopeSpans": [{"scope": {"name": "backend.tracing"}, "spans": [otlp]}]}]}
+        self._file.write(json.dumps(request) + "\n")
+
+
+_EXPORTER_TYPES = {"jsonl": JsonlExporter, "otlp": OtlpJsonExporter}
+
+
+class Tracer:
+    def __init__(self, exporters=()):
+        self.exporters = list(exporters)
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def start_turn(self, turn_id=None, start_ns=None):
+        """
+        Begins a turn in this context; spans opened afterwards carry its ID. Returns the ID.
+        start_ns backdates the turn (e.g. to when the capture that heard the speech began).
+        """
+        turn = (turn_id or secrets.token_hex(16), start_ns or time.time_ns(), secrets.token_hex(8))
+        _turn.set(turn)
+        _parent.set(None)
+        return turn[0]
+
+    def current_turn(self):
+        turn = _turn.get()
+        return turn[0] if turn else None
+
+    def current_context(self):
+        """Opaque handle of the active turn, to carry it across a queue (see attach)."""
+        return _turn.get()
+
+    def attach(self, turn):
+        """Continues a turn started elsewhere (another task / thread) in this context."""
+        _turn.set(turn)
+        _parent.set(None)
+
+    def end_turn(self, **attrs):
+        """Records the whole turn as one span and clears it. Only the thread that started it can end it."""
+        turn = _turn.get()
+        if not turn:
+            return
+        self._finish("turn", turn[0], None, turn[2], turn[1], time.time_ns(), attrs)
+        _turn.set(None)
+
+    @contextmanager
+    def span(self, name, **attrs):
+        if not TRACING:
+            yield attrs
+            return
+        turn = _turn.get()
+        # Top-level stage spans hang off the turn's root span
+        span_id, parent = secrets.token_hex(8), _parent.get() or (turn[2] if turn else None)
+        token = _parent.set(span_id)
+        start = time.time_ns()
+        error = None
+        try:
+            yield attrs  # Callers may add attributes while the span is open
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _parent.reset(token)
+            if error:
+                attrs["error"] = error
+            self._finish(name, turn[0] if turn else None, parent, span_id, start, time.time_ns(), attrs)
+
+    def record(self, name, duration_ms, **attrs):
+        """A span measured elsewhere (e.g. time to first token), ending now."""
+        if not TRACING:
+            return
+        turn = _turn.get()
+        end = time.time_ns()
+        self._finish(name, turn[0] if turn else None, _parent.get() or (turn[2] if turn else None), secrets.token_hex(8),
+                     end - int(duration_ms * 1e6), end, attrs)
+
+    def _finish(self, name, turn_id, parent_id, span_id, start_ns, end_ns, attrs):
+        ms = (end_ns - start_ns) / 1e6
+        with self._lock:
+            self.histograms.setdefault(name, Histogram()).add(ms)
+            if not self.exporters:
+                return
+            span = {"name": name, "turn_id": turn_id, "trace_id": turn_id or "0" * 32,
+                    "span_id": span_id, "parent_id": parent_id, "start_ns": start_ns,
+                    "end_ns": end_ns, "duration_ms": round(ms, 3), "attrs": attrs,
+                    "error": attrs.get("error")}
+            for exporter in self.exporters:
+                try:
+                    exporter.export(span)
+                except Exception as e:
+                    print(f"⚠️ Trace export failed: {e}")
+
+    def report(self):
+        """{span name: count / mean / p50 / p95 / max in ms} from the in-memory histograms."""
+        with self._lock:
+            return {name: {"count": h.count,
+                           "mean_ms": round(h.total / h.count, 1),
+                           "p50_ms": h.quantile(0.5),
+                           "p95_ms": h.quantile(0.95),
+                           "max_ms": round(h.max, 1)}
+                    for name, h in self.histograms.items()}
+
+
+tracer = Tracer(_EXPORTER_TYPES[name]() for name in TRACE_EXPORT if name in _EXPORTER_TYPES)
+
+# Module-level shortcuts
+start_turn = tracer.start_turn
+end_turn = tracer.end_turn
+current_turn = tracer.current_turn
+current_context = tracer.current_context
+attach = tracer.attach
+span = tracer.span
+record = tracer.record
+report = tracer.report
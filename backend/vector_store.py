@@ -0,0 +1,589 @@
+import atexit
+import json
+import os
+import sqlite3
+import threading
+import numpy as np
+
+
+# Rows per block when scanning int8 codes (block x dimension float32 temporaries, ~12 MB at 384-dim)
+SCAN_BLOCK = 8192
+# Approximate (IVF) index: clusters probed per query, and the store size where it kicks in
+IVF_NPROBE = int(os.getenv("IVF_NPROBE", "16"))
+IVF_MIN_VECTORS = int(os.getenv("IVF_MIN_VECTORS", "50000"))
+
+
+def _save_npy(path, array):
+    """np.save via a temp file + rename, so a crash (or a live memory map) never sees half a file."""
+    tmp = f"{path}.tmp.npy"
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def _save_npz(path, **arrays):
+    """np.savez via a temp file + rename (path ends in .npz)."""
+    tmp = f"{path[:-len('.npz')]}.tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def matches_filter(metadata, flt):
+    """Pinecone-style metadata filter: {"source": "a.pdf"} or {"page": {"$gte": 3}}."""
+    for key, cond in (flt or {}).items():
+        value = metadata.get(key)
+        if not isinstance(cond, dict):
+            cond = {"$eq": cond}
+        for op, target in cond.items():
+            if op == "$eq" and value != target: return False
+            if op == "$ne" and value == target: return False
+            if op == "$in" and value not in target: return False
+            if op == "$nin" and value in target: return False
+            if op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None: return False
+                if op == "$gt" and not value > target: return False
+                if op == "$gte" and not value >= target: return False
+                if op == "$lt" and not value < target: return False
+                if op == "$lte" and not value <= target: return False
+    return True
+
+
+class LocalIndex:
+    """
+    In-process vector index with the same surface as the Pinecone `Index`
+    calls we use (upsert / query / delete), so rag_engine can swap it in.
+    Brute-force (exact) cosine over a contiguous float32 matrix, persisted to
+    disk and memory-mapped on load, so startup doesn't read the whole file.
+    Metadata (chunk text) lives in a SQLite file next to it: startup reads only
+    the IDs, and a row's metadata is read the first time a query returns it.
+    Subclasses change how vectors are stored by overriding the storage hooks.
+    With persist=False nothing is loaded or written (and no atexit flush is registered).
+    """
+
+    def __init__(self, path="data/local_index", dimension=384, persist=True):
+        self.path = path
+        self.dimension = dimension
+        self.persist = persist
+        self._lock = threading.RLock()
+        self._capacity = 0
+        self._size = 0
+        self._ids = []          # row -> id
+        self._rows = {}         # id -> row
+        self._metadata = []     # row -> dict, or int: its row in the metadata file, not read yet
+        self._meta_db = None
+        self._dirty = False
+        self._init_storage()
+        if persist:
+            self._load()
+            atexit.register(self.flush)
+
+    # --- STORAGE HOOKS (float32 in RAM) ---
+    def _init_storage(self):
+        self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+
+    def _resize_storage(self, capacity):
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:self._size] = self._vectors[:self._size]
+        self._vectors = grown
+
+    def _write_row(self, row, vec):
+        self._vectors[row] = vec
+
+    def _move_row(self, dst, src):
+        self._vectors[dst] = self._vectors[src]
+
+    def _scores(self, q):
+        return self._vectors[:self._size] @ q
+
+    def _exact_scores(self, rows, q):
+        """Exact re-rank of candidate rows. Float storage is already exact."""
+        return None
+
+    def _row_vector(self, row):
+        return self._vectors[row]
+
+    def _load_storage(self, size):
+        if not os.path.exists(f"{self.path}.npy"):
+            return False
+        # Copy-on-write mapping: pages load as queries touch them, writes stay in RAM
+        self._vectors = np.load(f"{self.path}.npy", mmap_mode="c")
+        return True
+
+    def _save_storage(self):
+        if os.name == "nt" and isinstance(self._vectors, np.memmap):
+            # Windows can't replace a file that is still mapped
+            self._vectors = np.array(self._vectors)
+        _save_npy(f"{self.path}.npy", self._vectors[:self._size])
+        # Map the saved file again, so rows appended since the last load leave RAM too
+        self._vectors = np.load(f"{self.path}.npy", mmap_mode="c")
+        self._capacity = self._size
+
+    def storage_bytes(self):
+        """RAM used by vectors (metadata not included)."""
+        return self._size * self.dimension * 4
+
+    # --- METADATA ---
+    def _meta(self, row):
+        meta = self._metadata[row]
+        if isinstance(meta, int):
+            (text,) = self._meta_db.execute("SELECT meta FROM rows WHERE row = ?", (meta,)).fetchone()
+            meta = self._metadata[row] = json.loads(text)
+        return meta
+
+    def _all_meta(self):
+        """Reads every row's metadata not read yet, in one pass (filtered queries need them all)."""
+        unread = {meta: row for row, meta in enumerate(self._metadata) if isinstance(meta, int)}
+        if unread:
+            for saved, text in self._meta_db.execute("SELECT row, meta FROM rows"):
+                if saved in unread:
+                    self._metadata[unread[saved]] = json.loads(text)
+        return self._metadata
+
+    def _save_metadata(self):
+        # Caller holds self._lock. Written to a temp file, then swapped in.
+        path, tmp = f"{self.path}.meta.sqlite", f"{self.path}.meta.sqlite.tmp"
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        db = sqlite3.connect(tmp)
+        db.execute("CREATE TABLE rows (row INTEGER PRIMARY KEY, id TEXT, meta TEXT)")
+        db.executemany("INSERT INTO rows VALUES (?, ?, ?)",
+                       ((row, self._ids[row], json.dumps(meta))
+                        for row, meta in enumerate(self._metadata) if not isinstance(meta, int)))
+        unread = [(row, meta) for row, meta in enumerate(self._metadata) if isinstance(meta, int)]
+        if unread:
+            # Never read: copied file to file, without parsing the JSON
+            db.execute("ATTACH DATABASE ? AS old", (path,))
+            db.execute("CREATE TEMP TABLE unread (row INTEGER, saved INTEGER)")
+            db.executemany("INSERT INTO unread VALUES (?, ?)", unread)
+            db.execute("INSERT INTO rows SELECT unread.row, old.rows.id, old.rows.meta "
+                       "FROM unread JOIN old.rows ON old.rows.row = unread.saved")
+            db.commit()
+            db.execute("DETACH DATABASE old")
+        db.commit()
+        db.close()
+        if self._meta_db is not None:
+            self._meta_db.close()  # Windows can't replace an open file
+        os.replace(tmp, path)
+        self._meta_db = sqlite3.connect(path, check_same_thread=False)
+        # Saved rows now match in-memory rows; metadata already read stays in RAM
+        self._metadata = [row if isinstance(meta, int) else meta for row, meta in enumerate(self._metadata)]
+        if os.path.exists(f"{self.path}.json"):
+            os.remove(f"{self.path}.json")  # Pre-SQLite format, migrated
+
+    def close(self):
+        """Releases the metadata file and memory maps (after a flush; the index is unusable afterwards)."""
+        with self._lock:
+            if self._meta_db is not None:
+                self._meta_db.close()
+                self._meta_db = None
+            self._init_storage()
+
+    # --- PERSISTENCE ---
+    def _load(self):
+        meta_file = f"{self.path}.meta.sqlite"
+        db = None
+        if os.path.exists(meta_file):
+            db = sqlite3.connect(meta_file, check_same_thread=False)
+            ids = [id_ for (id_,) in db.execute("SELECT id FROM rows ORDER BY row")]
+            metadata = list(range(len(ids)))
+        elif os.path.exists(f"{self.path}.json"):
+            # Pre-SQLite format: read once, rewritten as SQLite on the next flush
+            with open(f"{self.path}.json", "r") as f:
+                meta = json.load(f)
+            ids, metadata = meta["ids"], meta["metadata"]
+            self._dirty = True
+        else:
+            return
+        if not self._load_storage(len(ids)):
+            if db is not None:
+                db.close()
+            self._dirty = False
+            return
+        self._meta_db = db
+        self._size = self._capacity = len(ids)
+        self._ids = ids
+        self._metadata = metadata
+        self._rows = {id_: i for i, id_ in enumerate(self._ids)}
+
+    def flush(self):
+        """Writes the index to disk if anything changed."""
+        with self._lock:
+            if not self._dirty or not self.persist:
+                return
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._save_storage()
+            self._save_metadata()
+            self._dirty = False
+
+    # --- PINECONE-STYLE API ---
+    def upsert(self, vectors):
+        """vectors: list of (id, values, metadata) tuples."""
+        with self._lock:
+            for id_, values, metadata in vectors:
+                vec = np.asarray(values, dtype=np.float32)
+                norm = np.linalg.norm(vec)
+                if norm:
+                    vec = vec / norm
+                row = self._rows.get(id_)
+                if row is None:
+                    row = self._append_row()
+                    self._ids.append(id_)
+                    self._metadata.append(metadata or {})
+                    self._rows[id_] = row
+                else:
+                    self._metadata[row] = metadata or {}
+                self._write_row(row, vec)
+            self._dirty = True
+        return {"upserted_count": len(vectors)}
+
+    def _append_row(self):
+        if self._size == self._capacity:
+            # Grow by doubling so bulk ingestion stays O(n)
+            self._capacity = max(64, self._capacity * 2)
+            self._resize_storage(self._capacity)
+        self._size += 1
+        return self._size - 1
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None, rerank_factor=10, include_values=False, **kwargs):
+        with self._lock:
+            if self._size == 0:
+                return {"matches": []}
+            q = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if norm:
+                q = q / norm
+            scores = self._scores(q)
+            if filter:
+                allowed = np.fromiter((matches_filter(m, filter) for m in self._all_meta()), bool, self._size)
+                if not allowed.any():
+                    return {"matches": []}
+                scores = np.where(allowed, scores, -np.inf)
+                top_k = min(top_k, int(allowed.sum()))
+            # Over-fetch candidates; lossy storage re-ranks them exactly
+            k = min(top_k * rerank_factor, self._size)
+            top = np.argpartition(-scores, k - 1)[:k]
+            exact = self._exact_scores(top, q)
+            if exact is not None:
+                if filter:
+                    exact = np.where(allowed[top], exact, -np.inf)
+                scores = np.full(self._size, -np.inf, dtype=np.float32)
+                scores[top] = exact
+            top = top[np.argsort(-scores[top])][:top_k]
+            return {"matches": [self._match(i, scores[i], include_metadata, include_values) for i in top]}
+
+    def _match(self, row, score, include_metadata, include_values=False):
+        match = {
+            "id": self._ids[row],
+            "score": float(score),
+            "metadata": self._meta(row) if include_metadata else {},
+        }
+        if include_values:
+            match["values"] = self._row_vector(row).tolist()
+        return match
+
+    def delete(self, ids=None, delete_all=False, **kwargs):
+        with self._lock:
+            if delete_all:
+                self._size, self._ids, self._rows, self._metadata = 0, [], {}, []
+                self._dirty = True
+                return {}
+            for id_ in ids or []:
+                row = self._rows.pop(id_, None)
+                if row is None:
+                    continue
+                # Swap the last row into the hole
+                last = self._size - 1
+                if row != last:
+                    self._move_row(row, last)
+                    self._ids[row] = self._ids[last]
+                    self._metadata[row] = self._metadata[last]
+                    self._rows[self._ids[row]] = row
+                self._ids.pop()
+                self._metadata.pop()
+                self._size -= 1
+            self._dirty = True
+        return {}
+
+    def describe_index_stats(self):
+        return {"dimension": self.dimension, "total_vector_count": self._size}
+
+
+class QuantizedLocalIndex(LocalIndex):
+    """
+    Compact storage mode: int8 scalar-quantized vectors in RAM (one float32
+    scale per vector, ~4x smaller than float32) for the candidate scan, and full
+    float32 vectors in a memory-mapped file on disk for an exact re-rank of the
+    top candidates. Only the handful of re-ranked rows are ever paged in.
+    With persist=False the float32 vectors stay in RAM and no file is created.
+    """
+
+    def _init_storage(self):
+        self._codes = np.zeros((0, self.dimension), dtype=np.int8)
+        self._scales = np.zeros(0, dtype=np.float32)
+        self._floats = None  # np.memmap over {path}.f32 (a plain array when not persisting)
+
+    def _open_floats(self, capacity):
+        if not self.persist:
+            floats = np.zeros((capacity, self.dimension), dtype=np.float32)
+            if self._floats is not None:
+                floats[:self._size] = self._floats[:self._size]
+            self._floats = floats
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        path = f"{self.path}.f32"
+        needed = capacity * self.dimension * 4
+        if self._floats is not None:
+            self._floats.flush()
+            self._floats = None
+        with open(path, "ab") as f:
+            if f.tell() < needed:
+                f.truncate(needed)
+        self._floats = np.memmap(path, dtype=np.float32, mode="r+", shape=(capacity, self.dimension))
+
+    def _resize_storage(self, capacity):
+        codes = np.zeros((capacity, self.dimension), dtype=np.int8)
+        codes[:self._size] = self._codes[:self._size]
+        scales = np.zeros(capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        self._codes, self._scales = codes, scales
+        self._open_floats(capacity)
+
+    def _write_row(self, row, vec):
+        scale = float(np.abs(vec).max()) or 1.0
+        self._codes[row] = np.round(vec / scale * 127).astype(np.int8)
+        self._scales[row] = scale / 127
+        self._floats[row] = vec
+
+    def _move_row(self, dst, src):
+        self._codes[dst] = self._codes[src]
+        self._scales[dst] = self._scales[src]
+        self._floats[dst] = self._floats[src]
+
+    def _scores(self, q, block=SCAN_BLOCK):
+        # Approximate: int8 codes * per-row scale. Converted to float32 one block
+        # at a time, so a query never materializes the whole matrix as floats.
+        scores = np.empty(self._size, dtype=np.float32)
+        q = q.astype(np.float32, copy=False)
+        for start in range(0, self._size, block):
+            end = min(start + block, self._size)
+            scores[start:end] = self._codes[start:end].astype(np.float32) @ q
+        scores *= self._scales[:self._size]
+        return scores
+
+    def _exact_scores(self, rows, q):
+        order = np.sort(rows)  # Sequential reads from the memmap
+        exact = self._floats[order] @ q
+        return exact[np.argsort(np.argsort(rows))] if len(rows) else exact
+
+    def _row_vector(self, row):
+        return self._floats[row]
+
+    def _load_storage(self, size):
+        if not os.path.exists(f"{self.path}.q8.npz"):
+            return False
+        data = np.load(f"{self.path}.q8.npz")
+        self._codes, self._scales = data["codes"], data["scales"]
+        self._open_floats(max(size, 1))
+        return True
+
+    def _save_storage(self):
+        _save_npz(f"{self.path}.q8.npz", codes=self._codes[:self._size], scales=self._scales[:self._size])
+        if self._floats is not None:
+            self._floats.flush()
+
+    def storage_bytes(self):
+        return self._size * (self.dimension + 4)
+
+
+class IVFLocalIndex(LocalIndex):
+    """
+    Approximate search for large stores (inverted file, as in FAISS IVF-Flat).
+    Vectors are clustered around `nlist` centroids (spherical k-means); a query
+    only scores the rows in its `nprobe` nearest clusters, exactly.
+    Below IVF_MIN_VECTORS, before the first training, and for filtered queries
+    it falls back to the exact flat scan, so small stores behave like LocalIndex.
+    Training happens on flush() once the store has doubled since the last one;
+    rows added in between join their nearest existing cluster.
+    """
+
+    def __init__(self, path="data/local_index", dimension=384, persist=True,
+                 nprobe=IVF_NPROBE, min_vectors=IVF_MIN_VECTORS):
+        self.nprobe = nprobe
+        self.min_vectors = min_vectors
+        super().__init__(path, dimension, persist)
+
+    # --- STORAGE HOOKS (float32 rows + one cluster ID per row) ---
+    def _init_storage(self):
+        super()._init_storage()
+        self._centroids = None
+        self._assign = np.zeros(0, dtype=np.int32)
+        self._trained_size = 0
+        self._order = None  # Rows sorted by cluster, rebuilt lazily after changes
+
+    def _resize_storage(self, capacity):
+        super()._resize_storage(capacity)
+        grown = np.zeros(capacity, dtype=np.int32)
+        grown[:self._size] = self._assign[:self._size]
+        self._assign = grown
+
+    def _write_row(self, row, vec):
+        super()._write_row(row, vec)
+        if self._centroids is not None:
+            self._assign[row] = int(np.argmax(self._centroids @ vec))
+            self._order = None
+
+    def _move_row(self, dst, src):
+        super()._move_row(dst, src)
+        self._assign[dst] = self._assign[src]
+        self._order = None
+
+    def delete(self, ids=None, delete_all=False, **kwargs):
+        with self._lock:
+            result = super().delete(ids=ids, delete_all=delete_all, **kwargs)
+            if delete_all:
+                self._centroids, self._trained_size = None, 0
+            self._order = None
+            return result
+
+    def _load_storage(self, size):
+        if not super()._load_storage(size):
+            return False
+        if os.path.exists(f"{self.path}.ivf.npz"):
+            data = np.load(f"{self.path}.ivf.npz")
+            if len(data["assign"]) == size:  # Otherwise stale: retrained on the next flush
+                self._centroids = data["centroids"]
+                self._assign = data["assign"]
+                self._trained_size = int(data["trained_size"])
+        if len(self._assign) != size:
+            self._assign = np.zeros(size, dtype=np.int32)
+        return True
+
+    def _save_storage(self):
+        if self._size >= self.min_vectors and self._size >= 2 * self._trained_size:
+            self.train()
+        super()._save_storage()
+        if self._centroids is not None:
+            _save_npz(f"{self.path}.ivf.npz", centroids=self._centroids,
+                      assign=self._assign[:self._size], trained_size=self._trained_size)
+
+    # --- CLUSTERING ---
+    @staticmethod
+    def _nearest(x, centroids, block=16384):
+        """Nearest centroid per row, in blocks so the score matrix stays small."""
+        out = np.empty(len(x), dtype=np.int32)
+        for start in range(0, len(x), block):
+            out[start:start + block] = np.argmax(x[start:start + block] @ centroids.T, axis=1)
+        return out
+
+    def train(self, nlist=None, iterations=10, seed=0):
+        """(Re)builds the clusters from the current rows. nlist defaults to ~sqrt(n)."""
+        with self._lock:
+            n = self._size
+            nlist = nlist or max(16, int(np.sqrt(n)))
+            if n < nlist:
+                return
+            rng = np.random.default_rng(seed)
+            # k-means on a sample (~64 rows per cluster is plenty), then assign everything
+            sample = self._vectors[np.sort(rng.choice(n, min(n, nlist * 64), replace=False))]
+            centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+            for _ in range(iterations):
+                assign = self._nearest(sample, centroids)
+                order = np.argsort(assign, kind="stable")
+                counts = np.bincount(assign, minlength=nlist)
+                filled = np.flatnonzero(counts)
+                starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[filled]
+                centroids[filled] = np.add.reduceat(sample[order], starts, axis=0)
+                empty = np.flatnonzero(counts == 0)
+                if len(empty):
+                    centroids[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+                centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+            self._centroids = centroids.astype(np.float32)
+            if len(self._assign) < len(self._vectors):
+                self._assign = np.zeros(len(self._vectors), dtype=np.int32)
+            self._assign[:n] = self._nearest(self._vectors[:n], self._centroids)
+            self._trained_size = n
+            self._order = None
+
+    def _cluster_rows(self, clusters):
+        if self._order is None:
+            assign = self._assign[:self._size]
+            self._order = np.argsort(assign, kind="stable")
+            self._offsets = np.searchsorted(assign[self._order], np.arange(len(self._centroids) + 1))
+        return np.concatenate([self._order[self._offsets[c]:self._offsets[c + 1]] for c in clusters])
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None, nprobe=None, include_values=False, **kwargs):
+        with self._lock:
+            if filter or self._centroids is None or self._size < self.min_vectors:
+                return super().query(vector, top_k=top_k, include_metadata=include_metadata, filter=filter,
+                                     include_values=include_values, **kwargs)
+            q = np.asarray(vector, dtype=np.float32)
+            norm = np.linalg.norm(q)
+            if norm:
+                q = q / norm
+            nprobe = min(nprobe or self.nprobe, len(self._centroids))
+            clusters = np.argpartition(-(self._centroids @ q), nprobe - 1)[:nprobe]
+            rows = self._cluster_rows(clusters)
+            if not len(rows):
+                return {"matches": []}
+            scores = self._vectors[rows] @ q
+            k = min(top_k, len(rows))
+            top = np.argpartition(-scores, k - 1)[:k]
+            top = top[np.argsort(-scores[top])]
+            return {"matches": [self._match(rows[i], scores[i], include_metadata, include_values) for i in top]}
+
+
+class LocalNamespaces:
+    """
+    Pinecone-style namespaces on top of LocalIndex: each namespace is its own
+    index file, so a query scoped to one document only scans that document.
+    The default namespace ("") keeps the original path.
+    """
+
+    def __init__(self, path="data/local_index", dimension=384, index_cls=LocalIndex):
+        self.path = path
+        self.dimension = dimension
+        self.index_cls = index_cls
+        self._spaces = {}
+        self._lock = threading.Lock()
+
+    def _space(self, namespace):
+        namespace = namespace or ""
+        with self._lock:
+            if namespace not in self._spaces:
+                path = self.path if not namespace else f"{self.path}.ns-{namespace}"
+                self._spaces[namespace] = self.index_cls(path, self.dimension)
+            return self._spaces[namespace]
+
+    def upsert(self, vectors, namespace=""):
+        return self._space(namespace).upsert(vectors)
+
+    def query(self, vector, top_k=3, include_metadata=True, filter=None, namespace="", **kwargs):
+        return self._space(namespace).query(vector, top_k=top_k, include_metadata=include_metadata, filter=filter, **kwargs)
+
+    def delete(self, ids=None, delete_all=False, namespace="", **kwargs):
+        space = self._space(namespace)
+        result = space.delete(ids=ids, delete_all=delete_all)
+        if delete_all and namespace:
+            # Drop the namespace's files entirely
+            space.close()
+            for suffix in (".npy", ".json", ".meta.sqlite", ".q8.npz", ".f32", ".ivf.npz"):
+                if os.path.exists(space.path + suffix):
+                    os.remove(space.path + suffix)
+            space._dirty = False
+            with self._lock:
+                self._spaces.pop(namespace, None)
+        return result
+
+    def flush(self):
+        with self._lock:
+            spaces = list(self._spaces.values())
+        for space in spaces:
+            space.flush()
+
+    def describe_index_stats(self):
+        with self._lock:
+            spaces = dict(self._spaces)
+        return {
+            "dimension": self.dimension,
+            "namespaces": {ns: {"vector_count": sp._size} for ns, sp in spaces.items()},
+            "total_vector_count": sum(sp._size for sp in spaces.values()),
+        }
@@ -0,0 +1,130 @@
+"""
+Background warm-up: slow imports, models and clients load on a daemon thread
+at startup instead of in front of the first window / greeting.
+
+    from backend.warmup import BACKEND_TASKS, warmup
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    warmup.start()
+    warmup.on_ready(lambda: print("ready"))   # or warmup.wait("embedder", timeout=5)
+
+Everything warmed here is also loaded lazily on first use, so a question that
+arrives early simply waits for the same load (import / model locks) instead
+of failing. Durations are recorded as `warmup.<task>` spans in tracing.report().
+"""
+import importlib
+import threading
+import time
+from backend import tracing
+
+
+def import_module(name):
+    """Task that imports `name` (and everything it pulls in)."""
+    return lambda: importlib.import_module(name)
+
+
+def warm_embedder():
+    from backend import rag_engine
+    # Loads the model, then runs one forward pass (the first one is much slower)
+    rag_engine.embedder.get().model.encode(["warm up"])
+
+
+def warm_index():
+    from backend import rag_engine
+    rag_engine.get_index()
+
+
+# Agent graph (LangGraph + LangChain + LLM client), embedding model, vector index
+BACKEND_TASKS = [
+    ("agent", import_module("backend.core")),
+    ("embedder", warm_embedder),
+    ("index", warm_index),
+]
+
+
+class Warmup:
+    """Runs registered tasks in order on one daemon thread; `ready` is set when all are done."""
+
+    def __init__(self):
+        self._tasks = []
+        self._done = {}          # name -> Event
+        self._callbacks = []
+        self._lock = threading.Lock()
+        self._thread = None
+        self.ready = threading.Event()
+        self.timings = {}        # name -> ms
+        self.errors = {}         # name -> exception
+
+    def add(self, name, fn):
+        with self._lock:
+            if name not in self._done:
+                self._tasks.append((name, fn))
+                self._done[name] = threading.Event()
+
+    def start(self):
+        """Starts the warm-up thread (once). Returns immediately."""
+        with self._lock:
+            if self._thread:
+                return
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        start = time.perf_counter()
+        i = 0
+        while True:
+            with self._lock:
+                if i >= len(self._tasks):
+                    break
+                name, fn = self._tasks[i]
+            i += 1
+            task_start = time.perf_counter()
+            try:
+                fn()
+            except Exception as e:
+                # Not fatal: whatever failed is retried lazily on first use
+                self.errors[name] = e
+                print(f"⚠️ Warm-up '{name}' failed: {e}")
+            ms = (time.perf_counter() - task_start) * 1000
+            self.timings[name] = round(ms, 1)
+            tracing.record(f"warmup.{name}", ms)
+            self._done[name].set()
+
+        parts = ", ".join(f"{name} {ms / 1000:.1f}s" for name, ms in self.timings.items())
+        print(f"🔥 Warm-up done in {time.perf_counter() - start:.1f}s ({parts})")
+        with self._lock:
+            self.ready.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for fn in callbacks:
+            self._call(fn)
+
+    @staticmethod
+    def _call(fn):
+        try:
+            fn()
+        except Exception as e:
+            print(f"⚠️ Warm-up callback failed: {e}")
+
+    def on_ready(self, fn):
+        """fn() runs once everything is warm (right away if it already is), on the warm-up thread."""
+        with self._lock:
+            if not self.ready.is_set():
+                self._callbacks.append(fn)
+                return
+        self._call(fn)
+
+    def wait(self, name=None, timeout=None):
+        """Blocks until task `name` (or everything) is done. Returns False on timeout."""
+        event = self._done.get(name) if name else self.ready
+        return event.wait(timeout) if event else True
+
+    def is_ready(self, name=None):
+        return self.wait(name, timeout=0)
+
+    def report(self):
+        return {"ready": self.ready.is_set(), "ms": dict(self.timings),
+                "errors": {name: str(e) for name, e in self.errors.items()}}
+
+
+# One per process: front ends add their own tasks (TTS, Whisper) next to BACKEND_TASKS
+warmup = Warmup()
@@ -0,0 +1,168 @@
+import os
+import re
+import threading
+import time
+
+# --- CONFIG ---
+# How long a cached answer stays "fresh" (seconds), per topic.
+# After that it is still served, but refreshed in the background.
+TOPIC_TTLS = {
+    "stocks": 60,        # Prices move fast
+    "weather": 15 * 60,
+    "news": 10 * 60,
+    "time": 30,
+    "default": 6 * 60 * 60,
+}
+
+# Hard limit: older than fresh TTL * this and we block on a new search
+STALE_FACTOR = 4
+
+TOPIC_KEYWORDS = {
+    "stocks": ["stock", "share price", "nifty", "sensex", "nasdaq", "market", "bitcoin", "crypto"],
+    "weather": ["weather", "temperature", "rain", "forecast", "humidity"],
+    "news": ["news", "latest", "today", "headline", "score"],
+    "time": ["time in", "date in"],
+}
+
+FILLER_WORDS = {"the", "a", "an", "in", "of", "for", "what", "is", "whats", "what's", "current", "please", "now", "right"}
+
+
+def normalize_query(query):
+    """'What is the Weather in Raipur?' -> 'weather raipur'. Word order is kept ("from X to Y" != "from Y to X")."""
+    words = re.findall(r"[a-z0-9]+", query.lower())
+    return " ".join(w for w in words if w not in FILLER_WORDS)
+
+
+# Whole words / phrases only: "rain" must not match "Ukraine" or "train"
+_TOPIC_PATTERNS = {
+    topic: re.compile(r"\b(" + "|".join(re.escape(k) for k in keywords) + r")\b")
+    for topic, keywords in TOPIC_KEYWORDS.items()
+}
+
+
+def classify_topic(query):
+    q = " ".join(re.findall(r"[a-z0-9']+", query.lower()))
+    for topic, pattern in _TOPIC_PATTERNS.items():
+        if pattern.search(q):
+            return topic
+    return "default"
+
+
+class TavilyBackend:
+    """Default backend. Builds ONE Tavily client and reuses it."""
+
+    def __init__(self, max_results=1):
+        self.max_results = max_results
+        self._client = None
+        self._lock = threading.Lock()
+
+    def search(self, query):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from langchain_community.tools.tavily_search import TavilySearchResults
+                    self._client = TavilySearchResults(max_results=self.max_results)
+        results = self._client.invoke(query)
+        if not results:
+            return "No results."  # Not an outage: don't let it count against the breaker
+        return results[0]['content']  # Return just the text
+
+
+class OfflineBackend:
+    """No-network backend (WEB_SEARCH_BACKEND=offline) for benchmarks and offline runs."""
+
+    def __init__(self, latency_ms=0.0):
+        self.latency_ms = latency_ms
+
+    def search(self, query):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+        return f"Offline result for '{query}'. No live web data in this mode."
+
+
+class CachedWebSearch:
+    """
+    TTL cache in front of a search backend.
+    Any object with a `search(query) -> str` method works as a backend,
+    so a local fake can be plugged in for offline runs.
+    """
+
+    def __init__(self, backend=None, ttls=None, stale_factor=STALE_FACTOR, max_entries=512, clock=time.monotonic):
+        self.backend = backend or TavilyBackend()
+        self.ttls = dict(TOPIC_TTLS, **(ttls or {}))
+        self.stale_factor = stale_factor
+        self.max_entries = max_entries
+        self.clock = clock
+
+        self._cache = {}          # key -> (answer, fetched_at, topic)
+        self._refreshing = set()  # keys with a background refresh in flight
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "errors": 0}
+
+    def search(self, query):
+        key = normalize_query(query) or query.strip().lower()
+        topic = classify_topic(query)
+        ttl = self.ttls.get(topic, self.ttls["default"])
+        now = self.clock()
+
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry:
+                answer, fetched_at, _ = entry
+                age = now - fetched_at
+                if age < ttl:
+                    self.stats["hits"] += 1
+                    return answer
+                stale = age < ttl * self.stale_factor
+            else:
+                stale = False
+            self.stats["stale_hits" if stale else "misses"] += 1
+
+        if stale:
+            # Stale-while-revalidate: answer now, refresh behind the scenes
+            self._refresh_async(key, query, topic)
+            return entry[0]
+        return self._fetch(key, query, topic)
+
+    def _fetch(self, key, query, topic):
+        answer = self.backend.search(query)
+        with self._lock:
+            self._cache[key] = (answer, self.clock(), topic)
+            if len(self._cache) > self.max_entries:
+                # Drop the oldest entry
+                oldest = min(self._cache, key=lambda k: self._cache[k][1])
+                del self._cache[oldest]
+        return answer
+
+    def _refresh_async(self, key, query, topic):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self._fetch(key, query, topic)
+                with self._lock:
+                    self.stats["refreshes"] += 1
+            except Exception as e:
+                # Keep serving the old answer
+                with self._lock:
+                    self.stats["errors"] += 1
+                print(f"⚠️ Web refresh failed for '{query}': {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+# Shared instance used by backend/core.py
+if os.getenv("WEB_SEARCH_BACKEND", "tavily") == "offline":
+    web_search = CachedWebSearch(OfflineBackend(float(os.getenv("OFFLINE_SEARCH_LATENCY_MS", "0"))))
+else:
+    web_search = CachedWebSearch()
@@ -0,0 +1,217 @@
+import atexit
+import glob
+import json
+import os
+import re
+import threading
+
+FLUSH_INTERVAL = 2.0   # Seconds between background flushes
+MAX_BATCH = 32         # Flush early once this many writes are waiting
+MAX_ATTEMPTS = 5       # Failed applies before an entry goes to the dead-letter file
+MAX_BACKOFF = 60.0     # Longest wait between retries while the index keeps failing
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        code = ctypes.c_ulong()
+        kernel32.GetExitCodeProcess(handle, ctypes.byref(code))
+        kernel32.CloseHandle(handle)
+        return code.value == 259  # STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # Exists, owned by someone else
+    return True
+
+
+class WriteBehindBuffer:
+    """
+    Acknowledges memory writes immediately and applies them in batches.
+    Every write is appended (and fsync'd) to a local journal before submit()
+    returns, so a crash loses nothing: the journal is replayed on the next start.
+    `apply_fn(entries)` does the real work (embedding + bulk upsert); entries
+    stay in the journal until it succeeds.
+
+    Several processes (voice GUI, web app) may run at once, so each writes its
+    own journal, `<journal_path stem>.<pid>.jsonl`. At startup a buffer claims
+    the journals of processes that are gone (and a legacy `journal_path` file)
+    by renaming them, so exactly one process replays each.
+    An entry that keeps failing on its own is moved to `<stem>.dead.jsonl`
+    after MAX_ATTEMPTS, so it can't hold back the writes queued behind it.
+    """
+
+    def __init__(self, apply_fn, journal_path="data/memory_journal.jsonl",
+                 interval=FLUSH_INTERVAL, max_batch=MAX_BATCH, close_at_exit=True):
+        self.apply_fn = apply_fn
+        self._stem, self._ext = os.path.splitext(journal_path)
+        self.journal_path = f"{self._stem}.{os.getpid()}{self._ext}"
+        self.dead_letter_path = f"{self._stem}.dead{self._ext}"
+        self.interval = interval
+        self.max_batch = max_batch
+        self._lock = threading.Lock()         # pending list + journal file
+        self._flush_lock = threading.Lock()   # one apply at a time
+        self._wake = threading.Event()
+        self._closed = False
+        self._pending = []
+        self._inflight = []
+        self._failed_rounds = 0
+        self.stats = {"submitted": 0, "flushed": 0, "batches": 0, "errors": 0, "replayed": 0, "dead": 0}
+
+        self._replay(journal_path)
+
+        self._thread = threading.Thread(target=self._loop, name="write-behind", daemon=True)
+        self._thread.start()
+        if close_at_exit:  # Otherwise the owner calls close() from its own shutdown hook
+            atexit.register(self.close)
+
+    # --- REPLAY ---
+    def _orphans(self, legacy_path):
+        """Journals no live process owns: the legacy single file and those of exited PIDs."""
+        own = re.compile(re.escape(self._stem) + r"\.(\d+)(?:\.claim\d+)?" + re.escape(self._ext) + "$")
+        found = [legacy_path] if os.path.exists(legacy_path) else []
+        for path in sorted(glob.glob(f"{glob.escape(self._stem)}.*{self._ext}")):
+            m = own.match(path)
+            if m and int(m.group(1)) != os.getpid() and not _pid_alive(int(m.group(1))):
+                found.append(path)
+        return found
+
+    def _replay(self, legacy_path):
+        claimed = []
+        for i, path in enumerate(self._orphans(legacy_path)):
+            target = f"{self._stem}.{os.getpid()}.claim{i}{self._ext}"
+            try:
+                os.rename(path, target)  # Atomic: if another process got there first, this fails
+            except OSError:
+                continue
+            claimed.append(target)
+            with open(target, "r") as f:
+                for line in f:
+                    if line.strip():
+                        try:
+                            self._pending.append(json.loads(line))
+                        except ValueError:
+                            break  # Torn last line from a crash mid-write
+        if not claimed:
+            return
+        self.stats["replayed"] = len(self._pending)
+        with self._lock:
+            self._rewrite_journal()  # Into our own journal first, then drop the claimed files
+        for path in claimed:
+            os.remove(path)
+        if self._pending:
+            print(f"📓 Replaying {len(self._pending)} unsaved memory writes from {len(claimed)} journal(s)")
+
+    def submit(self, entry):
+        """Journals `entry` (a JSON-able dict) and returns without waiting for the index."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("write-behind buffer is closed")
+            os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+            with open(self.journal_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self._pending.append(entry)
+            self.stats["submitted"] += 1
+            if len(self._pending) >= self.max_batch:
+                self._wake.set()
+
+    def pending(self):
+        """Writes not yet in the index (including the batch being applied), oldest first."""
+        with self._lock:
+            return self._inflight + self._pending
+
+    def flush(self):
+        """Applies everything pending now. Returns the number of entries written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._inflight = batch
+            if not batch:
+                return 0
+            failed = self._apply(batch)
+            dead = []
+            for entry in failed:
+                entry["attempts"] = entry.get("attempts", 0) + 1
+                if entry["attempts"] >= MAX_ATTEMPTS:
+                    dead.append(entry)
+            with self._lock:
+                self._inflight = []
+                self._pending = [e for e in failed if e["attempts"] < MAX_ATTEMPTS] + self._pending
+                if dead:
+                    self._dead_letter(dead)
+                self._rewrite_journal()
+            written = len(batch) - len(failed)
+            self._failed_rounds = self._failed_rounds + 1 if failed and not written else 0
+            self.stats["flushed"] += written
+            self.stats["batches"] += 1
+            return written
+
+    def _apply(self, batch):
+        """Applies `batch`, returns the entries that failed."""
+        try:
+            self.apply_fn(batch)
+            return []
+        except Exception as e:
+            print(f"⚠️ Memory write failed, will retry: {e}")
+            self.stats["errors"] += 1
+            if len(batch) == 1:
+                return batch
+        # Retry one by one, so a single bad entry doesn't hold back the others
+        failed = []
+        for entry in batch:
+            try:
+                self.apply_fn([entry])
+            except Exception:
+                failed.append(entry)
+        return failed
+
+    def _dead_letter(self, entries):
+        # Caller holds self._lock
+        with open(self.dead_letter_path, "a") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.stats["dead"] += len(entries)
+        print(f"☠️ {len(entries)} memory writes failed {MAX_ATTEMPTS} times, moved to {self.dead_letter_path}")
+
+    def _rewrite_journal(self):
+        # Caller holds self._lock. Only what is still pending stays on disk.
+        if not self._pending:
+            if os.path.exists(self.journal_path):
+                os.remove(self.journal_path)
+            return
+        os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+        tmp = f"{self.journal_path}.tmp"
+        with open(tmp, "w") as f:
+            for entry in self._pending:
+                f.write(json.dumps(entry) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+
+    def _loop(self):
+        while not self._closed:
+            # Back off while every apply fails (index down), instead of hammering it
+            self._wake.wait(min(self.interval * 2 ** self._failed_rounds, MAX_BACKOFF))
+            self._wake.clear()
+            if not self._closed:
+                self.flush()
+
+    def close(self):
+        """Stops the background thread and flushes what is left (at exit, see close_at_exit)."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._wake.set()
+        self._thread.join(timeout=self.interval + 1)
+        self.flush()
@@ -0,0 +1,85 @@
+"""
+Latency vs recall: exact LocalIndex scan vs approximate IVFLocalIndex at growing sizes.
+Run from the repo root:  python -m benchmarks.bench_ann [--sizes 10000,100000,1000000] [--nprobe 4,16,64]
+Vectors are synthetic (clustered, unit length, 384-dim) so no model is needed;
+each carries --text-chars of chunk text as metadata, like an ingested PDF chunk.
+Also reports IVF training time and startup time: opening the saved index
+(memory-mapped vectors + IDs only) vs reading vectors and all metadata up front.
+"""
+import argparse
+import json
+import tempfile
+import time
+import numpy as np
+from backend.vector_store import IVFLocalIndex, LocalIndex
+from benchmarks.bench_quantized import DIM, recall_at_k, synthetic_vectors
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def fill(index, vecs, text_chars, batch=10000):
+    text = "x" * text_chars
+    for start in range(0, len(vecs), batch):
+        index.upsert(vectors=[(str(start + i), v, {"text": text, "source": "bench.pdf"})
+                              for i, v in enumerate(vecs[start:start + batch])])
+
+
+def full_read(path, index):
+    """What loading cost before: every vector and every metadata dict read at startup."""
+    vectors = np.load(f"{path}.npy")
+    meta = json.loads(json.dumps({"ids": index._ids, "metadata": index._all_meta()}))
+    return vectors, meta
+
+
+def bench_size(n, args):
+    vecs = synthetic_vectors(n)
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.integers(0, n, args.queries)] + 0.05 * rng.standard_normal((args.queries, DIM)).astype(np.float32)
+    truth = [set(np.argsort(-(vecs @ q))[:args.k].tolist()) for q in queries]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = LocalIndex(f"{tmp}/flat", DIM)
+        fill(flat, vecs, args.text_chars)
+        flat.flush()
+        ivf = IVFLocalIndex(f"{tmp}/ivf", DIM, min_vectors=0)
+        fill(ivf, vecs, args.text_chars)
+        _, train_ms = timed(ivf.flush)  # Trains ~sqrt(n) clusters, then saves
+
+        # Startup cost of the saved store: lazy open (default) vs reading everything
+        mapped, open_ms = timed(lambda: LocalIndex(f"{tmp}/flat", DIM))
+        _, read_ms = timed(lambda: full_read(f"{tmp}/flat", flat))
+
+        print(f"\n📦 {n:,} vectors: {len(ivf._centroids)} clusters, trained + saved in {train_ms / 1000:.1f}s; "
+              f"load {open_ms:.0f} ms lazy (mmap + IDs) vs {read_ms:.0f} ms reading vectors + metadata")
+        print(f"  {'mode':<18} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+        recall, ms = recall_at_k(flat, queries, truth, args.k)
+        print(f"  {'flat (exact)':<18} {recall:>10.3f} {ms:>9.2f}")
+        recall, ms = recall_at_k(mapped, queries, truth, args.k)
+        print(f"  {'flat (mmap, cold)':<18} {recall:>10.3f} {ms:>9.2f}")
+        for nprobe in args.nprobe:
+            recall, ms = recall_at_k(ivf, queries, truth, args.k, nprobe=nprobe)
+            print(f"  {f'ivf nprobe={nprobe}':<18} {recall:>10.3f} {ms:>9.2f}")
+        for index in (flat, ivf, mapped):
+            index.close()  # Nothing left to write: the temp dir goes away next
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--nprobe", default="4,16,64")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--text-chars", type=int, default=1000, help="metadata text per vector")
+    args = parser.parse_args()
+    args.nprobe = [int(p) for p in args.nprobe.split(",")]
+
+    for n in (int(s) for s in args.sizes.split(",")):
+        bench_size(n, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Raw top-k context vs packed context (over-fetch + MMR + token budget).
+Run from the repo root:  python -m benchmarks.bench_context
+Indexes data/knowledge_base.txt twice into a throwaway local index: once as
+facts and once as overlapping PDF-style slices, so near-duplicates compete.
+Reports the size of the prompt sent to the answer model and, when
+GROQ_API_KEY is set, the answer latency for both modes.
+"""
+import json
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["VECTOR_BACKEND"] = "local"
+os.environ["LOCAL_INDEX_PATH"] = os.path.join(_tmp, "index")
+os.environ["KEYWORD_INDEX_PATH"] = os.path.join(_tmp, "keywords.json")
+os.environ["MEMORY_JOURNAL_PATH"] = os.path.join(_tmp, "journal.jsonl")  # Don't replay the real journal
+os.environ["INGEST_MANIFEST_PATH"] = os.path.join(_tmp, "manifest.json")
+
+from backend import rag_engine  # noqa: E402  (env must be set first)
+from backend.context_packing import count_tokens  # noqa: E402
+from backend.pdf_pipeline import iter_chunks  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "memory_questions.json")
+
+
+def _answer_model():
+    if not os.getenv("GROQ_API_KEY"):
+        return None
+    from langchain_groq import ChatGroq
+    return ChatGroq(groq_api_key=os.getenv("GROQ_API_KEY"), model_name="llama-3.1-8b-instant")
+
+
+def run(questions, packing, llm):
+    rag_engine.CONTEXT_PACKING = packing
+    hits, tokens, retrieve_ms, answer_ms = 0, [], [], []
+    for q in questions:
+        start = time.perf_counter()
+        context = rag_engine.retrieve(q["question"])
+        retrieve_ms.append((time.perf_counter() - start) * 1000)
+        hits += q["expect"].lower() in context.lower()
+        prompt = f"Info: {context}. User Question: {q['question']}"
+        tokens.append(count_tokens(prompt))
+        if llm:
+            start = time.perf_counter()
+            llm.invoke(prompt)
+            answer_ms.append((time.perf_counter() - start) * 1000)
+    for xs in (tokens, retrieve_ms, answer_ms):
+        xs.sort()
+    return {
+        "hit_rate": hits / len(questions),
+        "prompt_tokens_p50": tokens[len(tokens) // 2],
+        "prompt_tokens_max": tokens[-1],
+        "retrieve_p50_ms": retrieve_ms[len(retrieve_ms) // 2],
+        "answer_p50_ms": answer_ms[len(answer_ms) // 2] if answer_ms else None,
+    }
+
+
+def main():
+    with open(rag_engine.KNOWLEDGE_BASE, "r") as f:
+        text = f.read()
+    facts = [line.strip() for line in text.splitlines() if line.strip()]
+    # Small windows with heavy overlap, like consecutive slices of a PDF page
+    slices = [chunk for chunk, _ in iter_chunks([(1, text)], max_tokens=60, overlap_tokens=30)]
+    rag_engine.ingest_chunks(facts + slices)
+    with open(FIXTURES, "r") as f:
+        questions = json.load(f)
+
+    # Warm the embedding cache so both modes pay the same model cost
+    for q in questions:
+        rag_engine.embedder.encode(q["question"])
+    rag_engine.embedder.encode(facts + slices)
+
+    llm = _answer_model()
+    if not llm:
+        print("GROQ_API_KEY not set: reporting prompt size and retrieval latency only.")
+    print(f"{'mode':<7} {'hit rate':>9} {'tokens p50':>11} {'tokens max':>11} {'retrieve ms':>12} {'answer ms':>10}")
+    for name, packing in (("raw", False), ("packed", True)):
+        r = run(questions, packing, llm)
+        answer = f"{r['answer_p50_ms']:.0f}" if r["answer_p50_ms"] is not None else "-"
+        print(f"{name:<7} {r['hit_rate']:>9.2f} {r['prompt_tokens_p50']:>11} {r['prompt_tokens_max']:>11} "
+              f"{r['retrieve_p50_ms']:>12.2f} {answer:>10}")
+
+
+if __name__ == "__main__":
+    main()
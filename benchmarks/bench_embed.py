@@ -0,0 +1,65 @@
+"""
+Parity + throughput: SentenceTransformer (torch) vs ONNX int8 encoder.
+Run from the repo root:  python -m benchmarks.bench_embed [--threads 4]
+Exits non-zero if any sentence's cosine similarity drops below --min-cosine.
+"""
+import argparse
+import sys
+import time
+import numpy as np
+from sentence_transformers import SentenceTransformer
+from backend.onnx_embedder import OnnxEmbedder
+from benchmarks.corpus import fake_pdf_text
+
+MODEL = "all-MiniLM-L6-v2"
+BATCH_SIZES = (1, 32, 256)
+
+
+def sample_sentences(n=512):
+    with open("data/knowledge_base.txt", "r") as f:
+        facts = [line.strip() for line in f if line.strip()]
+    text = fake_pdf_text(60)
+    synthetic = [text[i:i + 120] for i in range(0, len(text), 120)]
+    return (facts + synthetic)[:n]
+
+
+def throughput(encoder, sentences, batch_size):
+    count = min(len(sentences), max(batch_size * 4, 64))
+    encoder.encode(sentences[:batch_size], batch_size=batch_size)  # Warm-up
+    start = time.perf_counter()
+    for i in range(0, count, batch_size):
+        encoder.encode(sentences[i:i + batch_size], batch_size=batch_size)
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    args = parser.parse_args()
+
+    sentences = sample_sentences()
+    torch_model = SentenceTransformer(MODEL)
+    onnx_model = OnnxEmbedder(f"sentence-transformers/{MODEL}", threads=args.threads)
+
+    # 1. PARITY (both encoders output unit vectors, so dot = cosine)
+    ref = torch_model.encode(sentences, batch_size=64, normalize_embeddings=True)
+    got = onnx_model.encode(sentences, batch_size=64)
+    cos = (ref * got).sum(axis=1)
+    print(f"🎯 Cosine vs torch: mean={cos.mean():.4f} min={cos.min():.4f} (n={len(sentences)})")
+
+    # 2. THROUGHPUT
+    print(f"{'batch':>6} {'torch s/s':>10} {'onnx s/s':>10} {'speed-up':>9}")
+    for bs in BATCH_SIZES:
+        t = throughput(torch_model, sentences, bs)
+        o = throughput(onnx_model, sentences, bs)
+        print(f"{bs:>6} {t:>10.1f} {o:>10.1f} {o / t:>8.2f}x")
+
+    if np.min(cos) < args.min_cosine:
+        print(f"❌ Parity FAILED (min cosine < {args.min_cosine})")
+        sys.exit(1)
+    print("✅ Parity OK")
+
+
+if __name__ == "__main__":
+    main()
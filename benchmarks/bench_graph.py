@@ -0,0 +1,90 @@
+"""
+Agent graph routing + latency, fully offline.
+Run from the repo root:  python -m benchmarks.bench_graph [--ttft-ms 150] [--tokens-per-sec 500] [--rounds 5]
+Uses the scripted LLM (backend/fake_llm.py), a throwaway local vector index
+and the offline web backend, so numbers only move when our code does.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+PROMPTS = [
+    ("My name is Mohankalyan.", "SAVE"),
+    ("Who am I?", "SEARCH"),
+    ("Where do I study?", "SEARCH"),
+    ("What's the weather where I live?", "BOTH"),
+    ("What is the price of Bitcoin?", "GOOGLE"),
+    ("What time is it?", "TIME"),
+    ("Tell me a joke", "CHAT"),
+]
+
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ttft-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+        "FAKE_LLM_TOKENS_PER_SEC": str(args.tokens_per_sec),
+        "VECTOR_BACKEND": "local",
+        "LOCAL_INDEX_PATH": os.path.join(tmp, "index"),
+        "KEYWORD_INDEX_PATH": os.path.join(tmp, "keywords.json"),
+        "MEMORY_JOURNAL_PATH": os.path.join(tmp, "journal.jsonl"),
+        "INGEST_MANIFEST_PATH": os.path.join(tmp, "manifest.json"),
+        "WEB_SEARCH_BACKEND": "offline",
+    })
+    from langchain_core.messages import HumanMessage
+    from backend import core, rag_engine
+
+    rag_engine.KNOWLEDGE_BASE = os.path.join(tmp, "knowledge_base.txt")
+    with open(rag_engine.KNOWLEDGE_BASE, "w") as f:
+        f.write("My name is Mohankalyan.\nI study M.Tech at NIT Raipur.\nI live in Raipur.")
+    rag_engine.ingest_knowledge_base()
+
+    correct, turns = 0, 0
+    per_route, per_node = {}, {}
+    for r in range(args.rounds):
+        for prompt, expected in PROMPTS:
+            config = {"configurable": {"thread_id": f"bench-{r}"}}
+            start = time.perf_counter()
+            route = None
+            for event in core.app.stream({"messages": [HumanMessage(content=prompt)]}, config, stream_mode="updates"):
+                for node, update in event.items():
+                    route = update.get("route", route)
+                    for name, ms in (update.get("timings") or {}).items():
+                        per_node.setdefault(name, []).append(ms)
+            per_route.setdefault(expected, []).append((time.perf_counter() - start) * 1000)
+            correct += route == expected
+            turns += 1
+
+    print(f"🧭 routing accuracy: {correct}/{turns}")
+    print(f"{'route':<8} {'p50 ms':>8} {'p95 ms':>8}")
+    for route, ms in per_route.items():
+        print(f"{route:<8} {pct(ms, 0.5):>8.1f} {pct(ms, 0.95):>8.1f}")
+    print(f"{'node':<10} {'p50 ms':>8} {'p95 ms':>8}")
+    for node, ms in per_node.items():
+        print(f"{node:<10} {pct(ms, 0.5):>8.1f} {pct(ms, 0.95):>8.1f}")
+
+    # Streaming: first token vs full reply
+    messages = [core.ROUTER_PROMPT, HumanMessage(content="Tell me a joke")]
+    start = time.perf_counter()
+    first = None
+    for _ in core.llm.stream(messages):
+        first = first or (time.perf_counter() - start) * 1000
+    total = (time.perf_counter() - start) * 1000
+    print(f"🌊 stream: first token {first:.0f} ms, full reply {total:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
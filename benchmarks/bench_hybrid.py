@@ -0,0 +1,60 @@
+"""
+Dense-only vs hybrid (BM25 + dense, keyword short-circuit) retrieval.
+Run from the repo root:  python -m benchmarks.bench_hybrid
+Indexes data/knowledge_base.txt into a throwaway local index and asks the
+questions in benchmarks/fixtures/memory_questions.json.
+"""
+import json
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ["VECTOR_BACKEND"] = "local"
+os.environ["LOCAL_INDEX_PATH"] = os.path.join(_tmp, "index")
+os.environ["KEYWORD_INDEX_PATH"] = os.path.join(_tmp, "keywords.json")
+os.environ["MEMORY_JOURNAL_PATH"] = os.path.join(_tmp, "journal.jsonl")  # Don't replay the real journal
+os.environ["INGEST_MANIFEST_PATH"] = os.path.join(_tmp, "manifest.json")
+
+from backend import rag_engine  # noqa: E402  (env must be set first)
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "memory_questions.json")
+
+
+def run(questions, hybrid):
+    rag_engine.HYBRID_SEARCH = hybrid
+    rag_engine.retrieve_stats.update(queries=0, keyword_short_circuits=0)
+    hits, latencies = 0, []
+    for q in questions:
+        start = time.perf_counter()
+        context = rag_engine.retrieve(q["question"])
+        latencies.append((time.perf_counter() - start) * 1000)
+        hits += q["expect"].lower() in context.lower()
+    latencies.sort()
+    return {
+        "hit_rate": hits / len(questions),
+        "p50_ms": latencies[len(latencies) // 2],
+        "max_ms": latencies[-1],
+        "short_circuits": rag_engine.retrieve_stats["keyword_short_circuits"],
+    }
+
+
+def main():
+    with open(rag_engine.KNOWLEDGE_BASE, "r") as f:
+        facts = [line.strip() for line in f if line.strip()]
+    rag_engine.ingest_chunks(facts)
+    with open(FIXTURES, "r") as f:
+        questions = json.load(f)
+
+    # Warm the embedding cache's query path so both modes pay the same model cost
+    for q in questions:
+        rag_engine.embedder.encode(q["question"])
+
+    print(f"{'mode':<8} {'hit rate':>9} {'p50 ms':>8} {'max ms':>8} {'kw short-circuits':>18}")
+    for name, hybrid in (("dense", False), ("hybrid", True)):
+        r = run(questions, hybrid)
+        print(f"{name:<8} {r['hit_rate']:>9.2f} {r['p50_ms']:>8.2f} {r['max_ms']:>8.2f} {r['short_circuits']:>18}")
+
+
+if __name__ == "__main__":
+    main()
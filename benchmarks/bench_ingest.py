@@ -0,0 +1,76 @@
+"""
+Ingestion throughput: old per-chunk path vs rag_engine.ingest_chunks.
+Run from the repo root:  python -m benchmarks.bench_ingest [--pages 200]
+Runs against a throwaway local index, keyword index and embedding cache in a
+temp dir (set VECTOR_BACKEND=pinecone to time real uploads; the benchmark
+vectors are deleted again afterwards). Each path gets its own empty embedding
+cache, so the second run isn't served from the first one's cache.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+_tmp = tempfile.mkdtemp()
+os.environ.setdefault("VECTOR_BACKEND", "local")
+os.environ["LOCAL_INDEX_PATH"] = os.path.join(_tmp, "index")
+os.environ["KEYWORD_INDEX_PATH"] = os.path.join(_tmp, "keywords.json")
+os.environ["EMBED_CACHE_PATH"] = os.path.join(_tmp, "embed_cache.sqlite")
+os.environ["MEMORY_JOURNAL_PATH"] = os.path.join(_tmp, "journal.jsonl")  # Don't replay the real journal
+os.environ["INGEST_MANIFEST_PATH"] = os.path.join(_tmp, "manifest.json")
+
+from backend import rag_engine  # noqa: E402  (env must be set first)
+from backend.embed_cache import LazyEmbedder  # noqa: E402
+from benchmarks.corpus import fake_pdf_text  # noqa: E402
+
+
+def fresh_cache(name):
+    """Swaps in an empty embedding cache, reusing the already-loaded model."""
+    loaded = rag_engine.embedder.get()
+    encoder, model_name = loaded.model, loaded.model_name
+    rag_engine.embedder = LazyEmbedder(lambda: (encoder, model_name), path=os.path.join(_tmp, f"{name}.sqlite"))
+
+
+def old_path(chunks):
+    """What ingest_text did per chunk before bulk ingestion."""
+    index = rag_engine.get_index()
+    for i, chunk in enumerate(chunks):
+        rag_engine.setup_index()
+        vec = rag_engine.embedder.encode(chunk).tolist()
+        index.upsert(vectors=[(f"bench-old-{i}", vec, {"text": chunk})])
+    rag_engine.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=200)
+    args = parser.parse_args()
+
+    text = fake_pdf_text(args.pages)
+    chunks = [text[i:i + 1000] for i in range(0, len(text), 1000)]
+    print(f"📄 {args.pages} pages -> {len(chunks)} chunks ({rag_engine.VECTOR_BACKEND} backend)")
+
+    # Model load and first forward pass stay out of both timings
+    rag_engine.embedder.encode("warm up")
+    rag_engine.get_index()
+
+    fresh_cache("old")
+    start = time.perf_counter()
+    old_path(chunks)
+    old = time.perf_counter() - start
+    print(f"🐢 per-chunk: {old:.2f}s ({len(chunks) / old:.1f} chunks/s)")
+
+    fresh_cache("new")
+    start = time.perf_counter()
+    rag_engine.ingest_chunks(chunks, ids=[f"bench-new-{i}" for i in range(len(chunks))])
+    new = time.perf_counter() - start
+    print(f"🚀 bulk:      {new:.2f}s ({len(chunks) / new:.1f} chunks/s)")
+    print(f"⚡ speed-up:  {old / new:.1f}x")
+
+    # Don't leave benchmark vectors behind (matters when VECTOR_BACKEND=pinecone)
+    rag_engine._delete_ids(f"{prefix}-{i}" for prefix in ("bench-old", "bench-new") for i in range(len(chunks)))
+    rag_engine.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Recall vs memory: float32 LocalIndex vs int8 QuantizedLocalIndex (with / without re-rank).
+Run from the repo root:  python -m benchmarks.bench_quantized [--n 1000000]
+Vectors are synthetic (clustered, unit length, 384-dim) so no model is needed.
+Memory is measured with tracemalloc: what each index keeps after filling it
+(vectors, IDs, metadata) and the extra peak while answering queries.
+Memory-mapped float32 rows live in the page cache, not the heap, so they aren't counted.
+"""
+import argparse
+import gc
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from backend.vector_store import LocalIndex, QuantizedLocalIndex
+
+DIM = 384
+
+
+def synthetic_vectors(n, clusters=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, DIM)).astype(np.float32)
+    vecs = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, DIM)).astype(np.float32)
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
+
+
+def fill(index, vecs, batch=10000):
+    for start in range(0, len(vecs), batch):
+        index.upsert(vectors=[(str(start + i), v, {}) for i, v in enumerate(vecs[start:start + batch])])
+
+
+def recall_at_k(index, queries, truth, k, **query_kwargs):
+    hits, start = 0, time.perf_counter()
+    for q, expected in zip(queries, truth):
+        got = {int(m["id"]) for m in index.query(vector=q, top_k=k, include_metadata=False, **query_kwargs)["matches"]}
+        hits += len(got & expected)
+    ms = (time.perf_counter() - start) * 1000 / len(queries)
+    return hits / (k * len(queries)), ms
+
+
+def measured_fill(index, vecs):
+    """Fills `index`, returns the heap bytes it retains."""
+    gc.collect()
+    before = tracemalloc.get_traced_memory()[0]
+    fill(index, vecs)
+    gc.collect()
+    return tracemalloc.get_traced_memory()[0] - before
+
+
+def measured_recall(index, queries, truth, k, **query_kwargs):
+    """recall_at_k plus the peak heap bytes allocated on top while querying."""
+    tracemalloc.reset_peak()
+    current = tracemalloc.get_traced_memory()[0]
+    recall, ms = recall_at_k(index, queries, truth, k, **query_kwargs)
+    return recall, ms, tracemalloc.get_traced_memory()[1] - current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--n", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"⏳ Building {args.n:,} synthetic vectors...")
+    vecs = synthetic_vectors(args.n)
+    rng = np.random.default_rng(1)
+    queries = vecs[rng.integers(0, args.n, args.queries)] + 0.05 * rng.standard_normal((args.queries, DIM)).astype(np.float32)
+    truth = [set(np.argsort(-(vecs @ q))[:args.k].tolist()) for q in queries]
+
+    tracemalloc.start()
+    with tempfile.TemporaryDirectory() as tmp:
+        flat = LocalIndex(f"{tmp}/flat", DIM)
+        quant = QuantizedLocalIndex(f"{tmp}/q8", DIM)
+        held = {flat: measured_fill(flat, vecs), quant: measured_fill(quant, vecs)}
+
+        rows = [
+            ("float32", flat, {}),
+            ("int8 (no re-rank)", quant, {"rerank_factor": 1}),
+            ("int8 + re-rank x10", quant, {"rerank_factor": 10}),
+        ]
+        print(f"\n{'mode':<20} {'held (MB)':>10} {'query peak (MB)':>16} {'recall@' + str(args.k):>10} {'ms/query':>9}")
+        for name, index, kwargs in rows:
+            recall, ms, peak = measured_recall(index, queries, truth, args.k, **kwargs)
+            print(f"{name:<20} {held[index] / 1e6:>10.1f} {peak / 1e6:>16.1f} {recall:>10.3f} {ms:>9.2f}")
+        # Nothing left to write: the temp dir is gone before the atexit flush runs
+        flat.flush()
+        quant.flush()
+    tracemalloc.stop()
+
+    per_vec_text = 1000  # ~1000-char PDF chunks stored as metadata
+    print(f"\nNote: {args.n:,} chunks of ~{per_vec_text} chars also carry ~{args.n * per_vec_text / 1e6:,.0f} MB of metadata text.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Cold start: where launch time goes before the first listen.
+Run from the repo root:
+    python -m benchmarks.bench_startup [--entry gui_modern] [--top 15] [--warm] [--out startup.json]
+
+Imports each entry point in a fresh interpreter with `python -X importtime`
+(nothing is started: no window, no mic) and prints the import-time breakdown:
+the slowest modules (cumulative) and the time per top-level package (self).
+--warm then runs backend/warmup.py's tasks in this process and times each one,
+i.e. the work that now happens in the background after the window is up.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+ENTRY_POINTS = ["main", "gui_modern", "jarvis_pro", "gui", "main_agent"]
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def import_profile(module):
+    """Imports `module` in a fresh interpreter. Returns (wall ms, [(module, self us, cumulative us)], error)."""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    wall_ms = (time.perf_counter() - start) * 1000
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time:      1234 |       5678 |     package.module"
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    error = None
+    if proc.returncode:
+        messages = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        error = messages[-1] if messages else f"exit code {proc.returncode}"
+    return wall_ms, rows, error
+
+
+def summarize(rows, top):
+    by_package = defaultdict(int)
+    for name, self_us, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    slowest = sorted(rows, key=lambda r: r[2], reverse=True)[:top]
+    return {
+        "import_ms": round(sum(r[1] for r in rows) / 1000, 1),
+        "modules": len(rows),
+        "slowest": [{"module": name, "cumulative_ms": round(cum / 1000, 1)} for name, _, cum in slowest],
+        "packages": {pkg: round(us / 1000, 1) for pkg, us in
+                     sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:top]},
+    }
+
+
+def warm_profile():
+    from backend.warmup import BACKEND_TASKS, Warmup
+    warmup = Warmup()
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    warmup.start()
+    warmup.wait()
+    return warmup.report()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--entry", action="append", choices=ENTRY_POINTS,
+                        help="entry point(s) to profile (default: all)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--warm", action="store_true", help="also time the background warm-up tasks")
+    parser.add_argument("--out")
+    args = parser.parse_args()
+
+    report = {"entries": {}}
+    for entry in args.entry or ENTRY_POINTS:
+        wall_ms, rows, error = import_profile(entry)
+        summary = dict(summarize(rows, args.top), wall_ms=round(wall_ms, 1), error=error)
+        report["entries"][entry] = summary
+
+        print(f"\n🚀 import {entry}: {summary['import_ms']:.0f} ms in {summary['modules']} modules "
+              f"({wall_ms:.0f} ms wall incl. interpreter)" + (f"  ⚠️ {error}" if error else ""))
+        print(f"  {'slowest (cumulative)':<44} {'ms':>8}")
+        for row in summary["slowest"]:
+            print(f"  {row['module']:<44} {row['cumulative_ms']:>8.1f}")
+        print(f"  {'by package (self)':<44} {'ms':>8}")
+        for pkg, ms in summary["packages"].items():
+            print(f"  {pkg:<44} {ms:>8.1f}")
+
+    if args.warm:
+        sys.path.insert(0, ROOT)
+        report["warmup"] = warm_profile()
+        print("\n🔥 background warm-up (after the window is up)")
+        for name, ms in report["warmup"]["ms"].items():
+            print(f"  {name:<44} {ms:>8.1f}")
+        for name, error in report["warmup"]["errors"].items():
+            print(f"  ⚠️ {name}: {error}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 {args.out}")
+
+
+if __name__ == "__main__":
+    main()
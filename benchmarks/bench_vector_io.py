@@ -0,0 +1,75 @@
+"""
+Ingestion + retrieval throughput against the in-memory Pinecone stand-in.
+Run from the repo root:
+    python -m benchmarks.bench_vector_io [--pages 100] [--latency-ms 40] [--jitter-ms 10] [--failure-rate 0.01]
+Same seed -> same latencies and failures, so runs are comparable between commits.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=100)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--jitter-ms", type=float, default=10.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "VECTOR_BACKEND": "fake",
+        "FAKE_PINECONE_LATENCY_MS": str(args.latency_ms),
+        "FAKE_PINECONE_JITTER_MS": str(args.jitter_ms),
+        "FAKE_PINECONE_FAILURE_RATE": str(args.failure_rate),
+        "FAKE_PINECONE_SEED": str(args.seed),
+        "KEYWORD_INDEX_PATH": os.path.join(tmp, "keywords.json"),
+        "MEMORY_JOURNAL_PATH": os.path.join(tmp, "journal.jsonl"),
+        "INGEST_MANIFEST_PATH": os.path.join(tmp, "manifest.json"),
+    })
+    from backend import rag_engine
+    from benchmarks.corpus import fake_pdf_text
+
+    text = fake_pdf_text(args.pages)
+    chunks = [text[i:i + 1000] for i in range(0, len(text), 1000)]
+    rag_engine.embedder.encode(chunks, batch_size=rag_engine.ENCODE_BATCH)  # Time the index, not the model
+    print(f"📄 {len(chunks)} chunks, {args.latency_ms}±{args.jitter_ms} ms per call, "
+          f"failure rate {args.failure_rate}")
+
+    start = time.perf_counter()
+    written, failed = 0, 0
+    step = rag_engine.ENCODE_BATCH * 4
+    for i in range(0, len(chunks), step):
+        batch = chunks[i:i + step]
+        try:
+            written += rag_engine.ingest_chunks(batch, ids=[f"bench-{i + j}" for j in range(len(batch))],
+                                                persist=False)
+        except Exception as e:
+            failed += len(batch)
+            print(f"⚠️ {e}")
+    rag_engine.flush()  # Once per run, like a PDF job
+    elapsed = time.perf_counter() - start
+    print(f"🚀 ingest:   {written / elapsed:.1f} chunks/s ({written} written, {failed} in failed batches)")
+
+    queries = [chunks[i % len(chunks)][:80] for i in range(args.queries)]
+    rag_engine.embedder.encode(queries)
+    latencies, errors = [], 0
+    for q in queries:
+        start = time.perf_counter()
+        try:
+            rag_engine.retrieve(q)
+        except Exception:
+            errors += 1
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    print(f"🔎 retrieve: p50 {latencies[len(latencies) // 2]:.1f} ms, "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:.1f} ms, {errors} errors")
+    print(f"📊 stand-in: {rag_engine.pc.fault.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+End-to-end voice latency, replayed from WAV fixtures.
+Run from the repo root:
+    python -m benchmarks.bench_voice --make-fixtures      # once: synthesize fixtures with pyttsx3
+    python -m benchmarks.bench_voice --record 1           # or: record them yourself on mic 1
+    python -m benchmarks.bench_voice --synth-fixtures     # or: regenerate the committed stand-ins
+    python -m benchmarks.bench_voice [--rounds 3] [--baseline old.json]
+
+Each utterance goes through the real pipeline: listener endpointing
+(speech_recognition on the WAV), listener.transcribe, backend.core.app and
+speaker.synthesize. Network dependencies are local stand-ins (scripted LLM,
+in-memory Pinecone, offline web search, fixture STT / silent TTS with
+configurable latency; --stt whisper uses a local Whisper model instead).
+Reports p50/p95/p99 per stage and for speech-end -> first audio byte, and
+writes them to JSON so runs can be compared between commits.
+"""
+import argparse
+import array
+import asyncio
+import io
+import json
+import math
+import os
+import subprocess
+import tempfile
+import time
+import wave
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "utterances.json")
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "utterances")
+RESULTS = os.path.join(os.path.dirname(__file__), "results", "voice_latency.json")
+STAGES = ["capture", "endpoint", "stt", "agent", "tts_first_audio", "speech_end_to_first_audio"]
+
+
+# --- FIXTURES ---
+def _pad_wav(wav_bytes, out_path, lead_s=0.5, tail_s=1.5):
+    """Adds silence around an utterance so endpointing behaves like a live mic."""
+    with wave.open(io.BytesIO(wav_bytes), "rb") as src:
+        params, frames = src.getparams(), src.readframes(src.getnframes())
+    silence = lambda s: b"\0" * int(params.framerate * s) * params.sampwidth * params.nchannels
+    with wave.open(out_path, "wb") as dst:
+        dst.setparams(params)
+        dst.writeframes(silence(lead_s) + frames + silence(tail_s))
+
+
+def make_fixtures(items):
+    import pyttsx3
+    engine = pyttsx3.init()
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for item in items:
+        tmp = os.path.join(tempfile.mkdtemp(), "raw.wav")
+        engine.save_to_file(item["text"], tmp)
+        engine.runAndWait()
+        with open(tmp, "rb") as f:
+            _pad_wav(f.read(), os.path.join(FIXTURE_DIR, item["file"]))
+        print(f"🎙️ {item['file']}")
+
+
+def synth_fixtures(items, rate=16000):
+    """
+    Speech-shaped stand-ins without a TTS engine: a voiced buzz (120 Hz and
+    harmonics) with a syllable-rate envelope, ~0.3 s per word. Deterministic,
+    so these are the fixtures committed to the repo. Endpointing and the
+    fixture STT only need the energy profile; --stt whisper needs real speech.
+    """
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for item in items:
+        n = int(rate * (0.2 + 0.3 * len(item["text"].split())))
+        samples = array.array("h", (
+            int(6000 * (0.65 + 0.35 * math.sin(2 * math.pi * 4 * t / rate))
+                * sum(math.sin(2 * math.pi * 120 * k * t / rate) / k for k in (1, 2, 3)))
+            for t in range(n)))
+        buf = io.BytesIO()
+        with wave.open(buf, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(rate)
+            w.writeframes(samples.tobytes())
+        _pad_wav(buf.getvalue(), os.path.join(FIXTURE_DIR, item["file"]))
+        print(f"🎙️ {item['file']}")
+
+
+def record_fixtures(items, mic_index):
+    import speech_recognition as sr
+    r = sr.Recognizer()
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    with sr.Microphone(device_index=mic_index) as source:
+        r.adjust_for_ambient_noise(source, duration=0.5)
+        for item in items:
+            print(f"🎤 Say: {item['text']}")
+            audio = r.listen(source, phrase_time_limit=8)
+            _pad_wav(audio.get_wav_data(convert_width=2), os.path.join(FIXTURE_DIR, item["file"]))
+
+
+def speech_end_s(path, threshold):
+    """Where speech stops in the file: end of the last 20 ms frame above the energy threshold."""
+    with wave.open(path, "rb") as w:
+        if w.getsampwidth() != 2:
+            raise ValueError(f"{path}: fixtures must be 16-bit PCM")
+        rate, channels = w.getframerate(), w.getnchannels()
+        samples = array.array("h", w.readframes(w.getnframes()))
+    step = int(rate * 0.02) * channels
+    last = 0
+    for i in range(0, len(samples), step):
+        frame = samples[i:i + step]
+        if frame and (sum(s * s for s in frame) / len(frame)) ** 0.5 > threshold:
+            last = i + len(frame)
+    return last / channels / rate
+
+
+# --- LOCAL STAND-INS ---
+class FixtureTranscriber:
+    """STT stand-in: returns the fixture's transcript after a Whisper-like delay."""
+
+    def __init__(self, base_ms, ms_per_audio_sec):
+        self.base_ms = base_ms
+        self.ms_per_audio_sec = ms_per_audio_sec
+        self.text = ""
+
+    def transcribe(self, wav_bytes):
+        with wave.open(io.BytesIO(wav_bytes), "rb") as w:
+            seconds = w.getnframes() / w.getframerate()
+        time.sleep((self.base_ms + self.ms_per_audio_sec * seconds) / 1000)
+        return self.text
+
+
+class LocalWhisper:
+    """Real STT without the network (pip install openai-whisper)."""
+
+    def __init__(self, model="base"):
+        import whisper
+        self.model = whisper.load_model(model)
+
+    def transcribe(self, wav_bytes):
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as f:
+            f.write(wav_bytes)
+        try:
+            return self.model.transcribe(f.name, language="en")["text"]
+        finally:
+            os.remove(f.name)
+
+
+class SilentTTS:
+    """TTS stand-in: first audio chunk after `first_byte_ms`, then the rest."""
+
+    def __init__(self, first_byte_ms, chunks=8):
+        self.first_byte_ms = first_byte_ms
+        self.chunks = chunks
+
+    async def stream(self, text):
+        await asyncio.sleep(self.first_byte_ms / 1000)
+        for _ in range(self.chunks):
+            yield b"\0" * 1024
+            await asyncio.sleep(0.005)
+
+
+# --- RUN ---
+def percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {"n": 0}
+    pick = lambda p: round(values[min(len(values) - 1, int(len(values) * p))], 1)
+    return {"n": len(values), "p50": pick(0.5), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return None
+
+
+def compare(current, baseline):
+    print(f"\n📈 vs baseline ({baseline.get('commit')})")
+    for stage in STAGES:
+        old, new = baseline["stages"].get(stage, {}), current["stages"].get(stage, {})
+        if "p95" not in old or "p95" not in new:
+            continue
+        delta = new["p95"] - old["p95"]
+        flag = "  ⚠️ regression" if old["p95"] and delta / old["p95"] > 0.10 else ""
+        print(f"{stage:<27} p95 {old['p95']:>8.1f} -> {new['p95']:>8.1f} ms ({delta:+.1f}){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--make-fixtures", action="store_true")
+    parser.add_argument("--record", type=int, metavar="MIC_INDEX")
+    parser.add_argument("--synth-fixtures", action="store_true")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--stt", choices=["fixture", "whisper"], default="fixture")
+    parser.add_argument("--stt-ms", type=float, default=250.0, help="stand-in STT base latency")
+    parser.add_argument("--stt-ms-per-sec", type=float, default=40.0, help="stand-in STT latency per audio second")
+    parser.add_argument("--ttft-ms", type=float, default=150.0)
+    parser.add_argument("--tokens-per-sec", type=float, default=500.0)
+    parser.add_argument("--vector-latency-ms", type=float, default=40.0)
+    parser.add_argument("--web-latency-ms", type=float, default=300.0)
+    parser.add_argument("--tts-first-byte-ms", type=float, default=250.0)
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--baseline")
+    args = parser.parse_args()
+
+    with open(FIXTURES, "r") as f:
+        items = json.load(f)
+    if args.make_fixtures:
+        return make_fixtures(items)
+    if args.record is not None:
+        return record_fixtures(items, args.record)
+    if args.synth_fixtures:
+        return synth_fixtures(items)
+    missing = [i["file"] for i in items if not os.path.exists(os.path.join(FIXTURE_DIR, i["file"]))]
+    if missing:
+        raise SystemExit(f"Missing fixtures {missing}: run with --make-fixtures or --record <mic>")
+
+    tmp = tempfile.mkdtemp()
+    os.environ.update({
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_TTFT_MS": str(args.ttft_ms),
+        "FAKE_LLM_TOKENS_PER_SEC": str(args.tokens_per_sec),
+        "VECTOR_BACKEND": "fake",
+        "FAKE_PINECONE_LATENCY_MS": str(args.vector_latency_ms),
+        "FAKE_PINECONE_SEED": "1",
+        "WEB_SEARCH_BACKEND": "offline",
+        "OFFLINE_SEARCH_LATENCY_MS": str(args.web_latency_ms),
+        "KEYWORD_INDEX_PATH": os.path.join(tmp, "keywords.json"),
+        "MEMORY_JOURNAL_PATH": os.path.join(tmp, "journal.jsonl"),
+        "INGEST_MANIFEST_PATH": os.path.join(tmp, "manifest.json"),
+        "EMBED_CACHE_PATH": os.path.join(tmp, "embed_cache.sqlite"),
+    })
+    import speech_recognition as sr
+    from langchain_core.messages import HumanMessage
+    from backend import core, rag_engine
+    from voice import listener, speaker
+
+    rag_engine.KNOWLEDGE_BASE = os.path.join(tmp, "knowledge_base.txt")
+    with open("data/knowledge_base.txt", "r") as src, open(rag_engine.KNOWLEDGE_BASE, "w") as dst:
+        dst.write(src.read())
+    rag_engine.ingest_knowledge_base()
+
+    stt = FixtureTranscriber(args.stt_ms, args.stt_ms_per_sec) if args.stt == "fixture" else LocalWhisper()
+    listener.stt_backend = stt
+    speaker.tts_backend = SilentTTS(args.tts_first_byte_ms)
+    audio_out = os.path.join(tmp, "reply.mp3")
+
+    timings = {stage: [] for stage in STAGES}
+    rejected = 0
+    for round_no in range(args.rounds):
+        for item in items:
+            path = os.path.join(FIXTURE_DIR, item["file"])
+            spoken_until = speech_end_s(path, listener.ENERGY_THRESHOLD)
+            recognizer = listener.make_recognizer()
+            with sr.AudioFile(path) as source:
+                start = time.perf_counter()
+                audio = listener.capture(recognizer, source)
+                capture_ms = (time.perf_counter() - start) * 1000
+                # Audio time at which endpointing fired; on a live mic this is wall-clock time
+                heard_until = source.audio_reader.tell() / source.SAMPLE_RATE
+            endpoint_ms = max(0.0, heard_until - spoken_until) * 1000
+
+            if isinstance(stt, FixtureTranscriber):
+                stt.text = item["text"]
+            start = time.perf_counter()
+            text = listener.transcribe(audio)
+            stt_ms = (time.perf_counter() - start) * 1000
+            if not text:
+                rejected += 1
+                continue
+
+            config = {"configurable": {"thread_id": f"bench-voice-{round_no}"}}
+            start = time.perf_counter()
+            result = core.app.invoke({"messages": [HumanMessage(content=text)]}, config)
+            agent_ms = (time.perf_counter() - start) * 1000
+
+            first_audio = []
+            start = time.perf_counter()
+            asyncio.run(speaker.synthesize(result["messages"][-1].content, audio_out,
+                                           on_first_audio=lambda: first_audio.append(time.perf_counter())))
+            tts_ms = ((first_audio[0] if first_audio else time.perf_counter()) - start) * 1000
+
+            for stage, ms in (("capture", capture_ms), ("endpoint", endpoint_ms), ("stt", stt_ms),
+                              ("agent", agent_ms), ("tts_first_audio", tts_ms),
+                              ("speech_end_to_first_audio", endpoint_ms + stt_ms + agent_ms + tts_ms)):
+                timings[stage].append(ms)
+
+    report = {
+        "commit": _git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("out", "baseline", "make_fixtures", "record", "synth_fixtures")},
+        "utterances": len(items) * args.rounds,
+        "rejected": rejected,
+        "stages": {stage: percentiles(ms) for stage, ms in timings.items()},
+    }
+    print(f"{'stage':<27} {'p50':>8} {'p95':>8} {'p99':>8}   (ms)")
+    for stage, p in report["stages"].items():
+        if p["n"]:
+            print(f"{stage:<27} {p['p50']:>8.1f} {p['p95']:>8.1f} {p['p99']:>8.1f}")
+    baseline = None
+    if args.baseline:  # Read first: --baseline may be the file we are about to overwrite
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 {args.out}")
+    if baseline:
+        compare(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,16 @@
+"""Synthetic text shared by the benchmarks (no network, fixed seed)."""
+import random
+
+WORDS = ("voice agent latency memory graph vector embedding retrieval model groq pinecone "
+         "transcript speaker listener router answer project research result method data").split()
+
+
+def fake_pdf_text(pages, chars_per_page=2000, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for _ in range(pages):
+        page = []
+        while sum(len(w) + 1 for w in page) < chars_per_page:
+            page.append(rng.choice(WORDS))
+        out.append(" ".join(page) + ". ")
+    return "".join(out)
@@ -1,7 +1,5 @@
 import os
 import sys
-import threading
-import time
 from datetime import datetime
 
 # --- 1. AUTO-FIX FOR "TclError" (CRITICAL) ---
@@ -30,9 +28,9 @@ except Exception as e:
 # ---------------------------------------------
 
 import customtkinter as ctk
-from langchain_core.messages import HumanMessage
-from voice import listener, speaker
-from backend.core import app
+from voice.filler import FillerPlayer
+from voice.pipeline import VoicePipeline
+from backend.warmup import BACKEND_TASKS, warmup
 
 # --- CONFIGURATION ---
 ctk.set_appearance_mode("Dark")
@@ -48,8 +46,11 @@ class JarvisGUI(ctk.CTk):
         
         # State
         self.running = False
-        self.thread = None
-        self.config = {"configurable": {"thread_id": "Gui-Session-1"}}
+        self.filler = FillerPlayer() # Plays "One moment." when the answer is slow
+        self.pipeline = VoicePipeline(mic_index=1, # <--- Verify this matches check_mics.py
+                                      thread_id="Gui-Session-1", greeting="Systems Online.", goodbye=None)
+        self.pipeline.subscribe(self.on_pipeline_event)
+        self.filler.on_playback = self.pipeline.playback  # Half duplex: the mic ignores the clip
 
         # --- LAYOUT ---
         self.grid_columnconfigure(1, weight=1)
@@ -74,6 +75,11 @@ class JarvisGUI(ctk.CTk):
         self.mic_label = ctk.CTkLabel(self.sidebar, text="Microphone: Active", font=ctk.CTkFont(size=12))
         self.mic_label.grid(row=4, column=0, padx=20, pady=(40, 10))
 
+        # Models load in the background (backend/warmup.py); the first answer waits if needed
+        self.ready_label = ctk.CTkLabel(self.sidebar, text="Models: warming up...", font=ctk.CTkFont(size=12), text_color="gray")
+        self.ready_label.grid(row=5, column=0, padx=20, pady=10)
+        warmup.on_ready(lambda: self.after(0, self._on_ready))
+
         # 2. Main Chat Area
         self.chat_frame = ctk.CTkScrollableFrame(self, label_text="Live Interaction Log")
         self.chat_frame.grid(row=0, column=1, padx=20, pady=20, sticky="nsew")
@@ -85,14 +91,16 @@ class JarvisGUI(ctk.CTk):
             self.start_btn.configure(text="STOP SYSTEM", fg_color="red")
             self.status_label.configure(text="STATUS: ONLINE", text_color="#00FF00")
             
-            # Run the "While True" loop in a separate thread so UI doesn't freeze
-            self.thread = threading.Thread(target=self.run_voice_loop, daemon=True)
-            self.thread.start()
+            # The pipeline runs on its own thread so UI doesn't freeze
+            self.filler.warm()
+            self.pipeline.start()
+            self.add_message("AI", "Systems Online. Listening...")
         else:
             # Stop
             self.running = False
             self.start_btn.configure(text="START SYSTEM", fg_color="green")
             self.status_label.configure(text="STATUS: STOPPED", text_color="orange")
+            self.pipeline.stop()
 
     def add_message(self, sender, text):
         """Adds a bubble to the chat window"""
@@ -128,67 +136,38 @@ class JarvisGUI(ctk.CTk):
 
     def update_status(self, text):
         """Updates the status label safely"""
+        self.filler.on_status(text)
         try:
             self.status_label.configure(text=f"STATUS: {text}")
         except:
             pass
 
+    def _on_ready(self):
+        text = "Models: ready" if not warmup.errors else f"Models: {len(warmup.errors)} load on first use"
+        self.ready_label.configure(text=text, text_color="#00FF00")
+
     def clear_chat(self):
         for widget in self.chat_frame.winfo_children():
             widget.destroy()
 
-    # --- THE CORE LOOP (Background Thread) ---
-    def run_voice_loop(self):
-        MIC_INDEX = 1 # <--- Verify this matches check_mics.py
-        
-        # Initial Greeting
-        try:
-            speaker.speak("Systems Online.")
-            self.after(0, self.add_message, "AI", "Systems Online. Listening...")
-        except:
-            pass
-
-        while self.running:
-            try:
-                # 1. Listen
-                self.after(0, self.update_status, "LISTENING...")
-                user_text = listener.listen(mic_index=MIC_INDEX)
-                
-                if user_text:
-                    # Update UI with User Text
-                    self.after(0, self.add_message, "You", user_text)
-                    
-                    if "exit" in user_text.lower():
-                        self.running = False
-                        self.after(0, self.toggle_system)
-                        break
-
-                    # 2. Think
-                    self.after(0, self.update_status, "THINKING...")
-                    
-                    # Use the "Turbo" app logic from backend/core.py
-                    result = app.invoke(
-                        {"messages": [HumanMessage(content=user_text)]}, 
-                        config=self.config
-                    )
-                    ai_response = result['messages'][-1].content
-                    
-                    # Update UI with AI Response
-                    self.after(0, self.add_message, "AI", ai_response)
-
-                    # 3. Speak
-                    self.after(0, self.update_status, "SPEAKING...")
-                    speaker.speak(ai_response)
-            
-            except Exception as e:
-                print(f"Loop Error: {e}")
-                pass
-            
-            # Small delay to prevent CPU hogging
-            time.sleep(0.1)
+    # --- VOICE PIPELINE EVENTS (pipeline thread -> Tk thread) ---
+    def on_pipeline_event(self, event, payload):
+        self.after(0, self._handle_event, event, payload)
 
-        self.after(0, self.update_status, "OFFLINE")
+    def _handle_event(self, event, payload):
+        if event == "status":
+            self.update_status(f"{payload['status']}...")
+        elif event == "heard":
+            self.add_message("You", payload["text"])
+        elif event == "reply":
+            self.add_message("AI", payload["text"])
+        elif event == "exit":
+            self.toggle_system()
 
 if __name__ == "__main__":
+    # Starts loading the agent, embedding model and index while the window opens
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    warmup.start()
     app_ui = JarvisGUI()
     app_ui.mainloop()
\ No newline at end of file
@@ -1,13 +1,14 @@
 import flet as ft
-import threading
-import time
-from voice import listener, speaker
-from backend.core import app
-from langchain_core.messages import HumanMessage
+from voice.filler import FillerPlayer
+from voice.pipeline import VoicePipeline
+from backend.warmup import BACKEND_TASKS, warmup
 
 # --- CONFIGURATION ---
 MIC_INDEX = 1  # <--- ENSURE THIS MATCHES YOUR MIC ID
 
+# Plays "One moment." when the answer is slow
+filler = FillerPlayer()
+
 def main(page: ft.Page):
     # --- PAGE SETUP ---
     page.title = "JARVIS | Neural Interface"
@@ -18,7 +19,7 @@ def main(page: ft.Page):
     page.bgcolor = ft.Colors.BLACK
 
     # --- STATE VARIABLES ---
-    state = {"running": False}
+    state = {"running": False, "exited": False}
 
     # --- UI COMPONENTS ---
     
@@ -41,6 +42,14 @@ def main(page: ft.Page):
 
     orb_status = ft.Text("OFFLINE", size=16, weight=ft.FontWeight.BOLD, color=ft.Colors.GREY_500)
 
+    # Models load in the background; the button works before they finish (first answer waits)
+    ready_text = ft.Text("Warming up...", size=12, color=ft.Colors.GREY_500)
+
+    def on_ready():
+        ready_text.value = "Models ready" if not warmup.errors else f"Ready ({len(warmup.errors)} will load on first use)"
+        ready_text.color = ft.Colors.CYAN_100
+        page.update()
+
     # 2. CHAT LOG (Scrollable)
     chat_list = ft.ListView(
         expand=True,
@@ -69,6 +78,7 @@ def main(page: ft.Page):
 
     # --- ANIMATION CONTROLLER ---
     def set_status(mode):
+        filler.on_status(mode)
         if mode == "LISTENING":
             orb.scale = 1.2 
             orb.gradient.colors = [ft.Colors.CYAN_ACCENT, ft.Colors.BLUE_900]
@@ -99,58 +109,28 @@ def main(page: ft.Page):
             
         page.update()
 
-    # --- CORE LOGIC (Background Thread) ---
-    def run_voice_loop():
-        config = {"configurable": {"thread_id": "Flet-Session-1"}}
-        
-        # Initial Welcome
-        set_status("IDLE")
-        time.sleep(0.5)
-        try:
-            speaker.speak("Interface Initialized.")
-        except:
-            pass
-        
-        while state["running"]:
-            try:
-                # 1. LISTEN
-                set_status("LISTENING")
-                user_text = listener.listen(mic_index=MIC_INDEX)
-                
-                if user_text:
-                    chat_list.controls.append(create_bubble("You", user_text))
-                    set_status("THINKING") 
-                    page.update() 
-                    
-                    if "exit" in user_text.lower():
-                        state["running"] = False
-                        speaker.speak("Shutting down.")
-                        page.window_close()
-                        break
-                    
-                    # 2. THINK
-                    result = app.invoke(
-                        {"messages": [HumanMessage(content=user_text)]}, 
-                        config=config
-                    )
-                    ai_response = result['messages'][-1].content
-                    
-                    # 3. SPEAK
-                    chat_list.controls.append(create_bubble("AI", ai_response))
-                    page.update()
-                    
-                    set_status("SPEAKING") 
-                    speaker.speak(ai_response)
-                
-                else:
-                    set_status("IDLE")
-                    time.sleep(0.1)
-                    
-            except Exception as e:
-                print(f"Error: {e}")
-                set_status("IDLE")
-        
-        set_status("OFFLINE")
+    # --- VOICE PIPELINE (runs on its own thread, reports back through events) ---
+    pipeline = VoicePipeline(mic_index=MIC_INDEX, thread_id="Flet-Session-1",
+                             greeting="Interface Initialized.", goodbye="Shutting down.")
+    filler.on_playback = pipeline.playback  # Half duplex: the mic ignores the clip
+
+    def on_event(event, payload):
+        if event == "status":
+            # Stopped reads as idle here, like the old STOP button did
+            set_status("IDLE" if payload["status"] == "OFFLINE" else payload["status"])
+        elif event == "heard":
+            chat_list.controls.append(create_bubble("You", payload["text"]))
+            page.update()
+        elif event == "reply":
+            chat_list.controls.append(create_bubble("AI", payload["text"]))
+            page.update()
+        elif event == "exit":
+            state["running"] = False
+            state["exited"] = True
+        elif event == "stopped" and state["exited"]:
+            page.window_close()
+
+    pipeline.subscribe(on_event)
 
     # --- BUTTON ACTIONS ---
     def toggle_system(e):
@@ -158,12 +138,13 @@ def main(page: ft.Page):
             state["running"] = True
             btn_text.value = "STOP SYSTEM"
             btn_start.style = ft.ButtonStyle(bgcolor=ft.Colors.RED_900)
-            threading.Thread(target=run_voice_loop, daemon=True).start()
+            filler.warm()
+            pipeline.start()
         else:
             state["running"] = False
             btn_text.value = "START SYSTEM"
             btn_start.style = ft.ButtonStyle(bgcolor=ft.Colors.GREEN_900)
-            set_status("IDLE")
+            pipeline.stop()
         page.update()
 
     def clear_log(e):
@@ -201,7 +182,8 @@ def main(page: ft.Page):
                 ft.Container(content=orb, alignment=ft.Alignment(0, 0)),
                 ft.Container(height=30),
                 ft.Container(content=orb_status, alignment=ft.Alignment(0, 0)),
-                ft.Container(height=100), 
+                ft.Container(content=ready_text, alignment=ft.Alignment(0, 0)),
+                ft.Container(height=85), 
                 ft.Container(content=btn_start, alignment=ft.Alignment(0, 0)),
                 ft.Container(height=10),
                 ft.Container(content=btn_clear, alignment=ft.Alignment(0, 0)),
@@ -231,7 +213,12 @@ def main(page: ft.Page):
             spacing=0
         )
     )
+    warmup.on_ready(on_ready)
 
 # --- RUN APP ---
 if __name__ == "__main__":
+    # Starts loading the agent, embedding model and index while the window opens
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    warmup.start()
     ft.app(target=main)
\ No newline at end of file
@@ -1,15 +1,16 @@
 import flet as ft
-import threading
-import time
 import os
-from pypdf import PdfReader
-from voice import listener, speaker
-from backend.core import app
-from backend import rag_engine
-from langchain_core.messages import HumanMessage
+from voice import speaker
+from voice.filler import FillerPlayer
+from voice.pipeline import GraphAgent, VoicePipeline
+from backend.warmup import BACKEND_TASKS, import_module, warmup
 
 # --- CONFIGURATION ---
 MIC_INDEX = 1  # <--- Set this to your correct mic index (0, 1, or 2)
+CONFIG = {"configurable": {"thread_id": "Desktop-Pro"}}
+
+# Plays "One moment." when the answer is slow
+filler = FillerPlayer()
 
 def main(page: ft.Page):
     # --- WINDOW SETUP ---
@@ -23,12 +24,16 @@ def main(page: ft.Page):
     # --- STATE ---
     state = {
         "running": False,
+        "exited": False,
         "current_pdf": None
     }
 
     # --- PDF PROCESSING FUNCTION ---
     def process_pdf(e: ft.FilePickerResultEvent):
         if e.files:
+            # Imported here so the window doesn't wait for the agent (see backend/warmup.py)
+            from backend.core import set_active_document
+            from backend.jobs import job_manager
             file_path = e.files[0].path
             filename = e.files[0].name
             
@@ -37,32 +42,35 @@ def main(page: ft.Page):
             pdf_status.color = "yellow"
             page.update()
             
-            try:
-                # 1. Read PDF
-                reader = PdfReader(file_path)
-                text = ""
-                for page_obj in reader.pages:
-                    text += page_obj.extract_text() or ""
-                
-                # 2. Ingest to Memory (Chunked)
-                chunk_size = 1000
-                chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-                
-                # Clear old memory roughly (optional, or just add to it)
-                # rag_engine.clear() # If you implemented clear method
-                
-                for chunk in chunks:
-                    rag_engine.ingest_text(f"SOURCE_PDF: {filename} | CONTENT: {chunk}")
-                
-                state["current_pdf"] = filename
-                pdf_status.value = f"✅ Learned: {filename}"
-                pdf_status.color = "green"
-                speaker.speak(f"I have read {filename}. You can ask me about it.")
-                
-            except Exception as ex:
-                pdf_status.value = f"Error: {ex}"
-                pdf_status.color = "red"
+            def show_progress(job):
+                pdf_status.value = f"Reading {job.source}... {job.pages_done}/{job.total_pages} pages"
+                page.update()
+
+            def finished(job):
+                if job.status == "done":
+                    pdf_status.value = f"✅ Learned: {job.source}"
+                    pdf_status.color = "green"
+                    if state["running"]:
+                        # Queued behind any reply in flight, so it never talks over the voice loop
+                        add_bubble("AI", f"I have read {job.source}. You can ask me about it.")
+                        pipeline.say(f"I have read {job.source}. You can ask me about it.")
+                    else:
+                        speaker.speak(f"I have read {job.source}. You can ask me about it.")
+                elif job.status == "cancelled":
+                    pdf_status.value = f"Cancelled: {job.source}"
+                    pdf_status.color = "grey"
+                else:
+                    pdf_status.value = f"Error: {job.error}"
+                    pdf_status.color = "red"
+                page.update()
+
+            # Ingest in the background; the PDF's own namespace is searchable as chunks land
+            # (an already-ingested file reports back through on_done too, off this thread)
+            job = job_manager.submit_pdf(file_path, filename, on_progress=show_progress, on_done=finished)
             
+            # Memory searches in this conversation now also cover this PDF
+            set_active_document(CONFIG, job.source)
+            state["current_pdf"] = job.source
             page.update()
 
     # --- UI COMPONENTS ---
@@ -83,6 +91,12 @@ def main(page: ft.Page):
     
     status_text = ft.Text("OFFLINE", size=18, weight="bold", color="grey")
     pdf_status = ft.Text("No PDF Loaded", size=12, color="grey")
+    ready_text = ft.Text("Warming up...", size=12, color="grey")
+
+    def on_ready():
+        ready_text.value = "Models ready" if not warmup.errors else f"Ready ({len(warmup.errors)} will load on first use)"
+        ready_text.color = "cyan100"
+        page.update()
 
     # 3. Chat Log
     chat_list = ft.ListView(expand=True, spacing=15, padding=20, auto_scroll=True)
@@ -104,58 +118,46 @@ def main(page: ft.Page):
         )
         page.update()
 
-    # --- VOICE LOOP (Background Brain) ---
-    def run_voice_loop():
-        # Clean start
-        speaker.speak("Online.")
-        
-        while state["running"]:
-            try:
-                # 1. LISTEN
-                update_status("LISTENING", "cyan")
-                user_text = listener.listen(mic_index=MIC_INDEX)
-                
-                if user_text:
-                    add_bubble("You", user_text)
-                    
-                    if "exit" in user_text.lower():
-                        state["running"] = False
-                        speaker.speak("Goodbye.")
-                        page.window_close()
-                        break
-                    
-                    # 2. THINK
-                    update_status("PROCESSING", "purple")
-                    
-                    # Construct Prompt with PDF Awareness
-                    prompt = user_text
-                    if state["current_pdf"]:
-                         # If PDF loaded, prompt the AI to look at memory
-                         prompt = f"Context: I uploaded {state['current_pdf']}. Question: {user_text}"
-
-                    result = app.invoke(
-                        {"messages": [HumanMessage(content=prompt)]}, 
-                        config={"configurable": {"thread_id": "Desktop-Pro"}}
-                    )
-                    ai_reply = result['messages'][-1].content
-                    
-                    # 3. SPEAK
-                    add_bubble("AI", ai_reply)
-                    update_status("SPEAKING", "green")
-                    speaker.speak(ai_reply)
-                
-                else:
-                    # Silence
-                    update_status("IDLE", "grey")
-                    time.sleep(0.1)
+    # --- VOICE PIPELINE (Background Brain) ---
+    def with_pdf_context(user_text):
+        # If PDF loaded, prompt the AI to look at memory
+        if state["current_pdf"]:
+            return f"Context: I uploaded {state['current_pdf']}. Question: {user_text}"
+        return user_text
+
+    pipeline = VoicePipeline(mic_index=MIC_INDEX, thread_id=CONFIG["configurable"]["thread_id"],
+                             agent=GraphAgent(prompt_fn=with_pdf_context),
+                             greeting="Online.", goodbye="Goodbye.")
+    filler.on_playback = pipeline.playback  # Half duplex: the mic ignores the clip
+
+    # Pipeline status -> (label, orb color)
+    STATUS_STYLE = {
+        "LISTENING": ("LISTENING", "cyan"),
+        "THINKING": ("PROCESSING", "purple"),
+        "SPEAKING": ("SPEAKING", "green"),
+        "IDLE": ("IDLE", "grey"),
+        "OFFLINE": ("OFFLINE", "grey"),
+    }
 
-            except Exception as e:
-                print(e)
-                update_status("ERROR", "red")
+    def on_event(event, payload):
+        if event == "status":
+            update_status(*STATUS_STYLE[payload["status"]])
+        elif event == "heard":
+            add_bubble("You", payload["text"])
+        elif event == "reply":
+            add_bubble("AI", payload["text"])
+        elif event == "error" and payload["fatal"]:
+            update_status("ERROR", "red")
+        elif event == "exit":
+            state["running"] = False
+            state["exited"] = True
+        elif event == "stopped" and state["exited"]:
+            page.window_close()
 
-        update_status("OFFLINE", "grey")
+    pipeline.subscribe(on_event)
 
     def update_status(text, color):
+        filler.on_status(text)
         orb.scale = 1.2 if text == "LISTENING" else (0.9 if text == "PROCESSING" else 1.0)
         
         if color == "cyan":
@@ -181,12 +183,13 @@ def main(page: ft.Page):
             state["running"] = True
             btn_start.text = "STOP SYSTEM"
             btn_start.bgcolor = "red900"
-            threading.Thread(target=run_voice_loop, daemon=True).start()
+            filler.warm()
+            pipeline.start()
         else:
             state["running"] = False
             btn_start.text = "START SYSTEM"
             btn_start.bgcolor = "green900"
-            update_status("IDLE", "grey")
+            pipeline.stop()
         page.update()
 
     def upload_click(e):
@@ -203,7 +206,8 @@ def main(page: ft.Page):
             ft.Container(content=orb, alignment=ft.alignment.center),
             ft.Container(height=30),
             ft.Container(content=status_text, alignment=ft.alignment.center),
-            ft.Container(height=80),
+            ft.Container(content=ready_text, alignment=ft.alignment.center),
+            ft.Container(height=65),
             ft.Container(content=btn_start, alignment=ft.alignment.center),
             ft.Container(height=20),
             ft.Container(content=btn_upload, alignment=ft.alignment.center),
@@ -222,6 +226,12 @@ def main(page: ft.Page):
     )
 
     page.add(ft.Row([left_panel, right_panel], expand=True, spacing=0))
+    warmup.on_ready(on_ready)
 
 if __name__ == "__main__":
+    # Starts loading the agent, embedding model, index and PDF pipeline while the window opens
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    warmup.add("jobs", import_module("backend.jobs"))
+    warmup.start()
     ft.app(target=main)
\ No newline at end of file
@@ -1,13 +1,15 @@
 import sys
+import time
 import traceback
 
+STARTED = time.perf_counter()
+
 print("⏳ Initializing Modules...")
 
 try:
-    from langchain_core.messages import HumanMessage
-    from voice import listener, speaker
-    from backend.core import app
-    import os
+    from voice.pipeline import VoicePipeline
+    from backend import rag_engine, tracing
+    from backend.warmup import BACKEND_TASKS, import_module, warmup
     print("✅ Modules Loaded.")
 except Exception as e:
     print(f"❌ CRITICAL IMPORT ERROR: {e}")
@@ -16,54 +18,48 @@ except Exception as e:
 
 # CONFIGURATION
 # ⚠️ UPDATE THIS NUMBER based on check_mics.py
-MIC_INDEX = 1  
+MIC_INDEX = 1
+
+first_listen = []
+
+def on_event(event, payload):
+    if event == "status" and payload["status"] == "LISTENING" and not first_listen:
+        first_listen.append(time.perf_counter() - STARTED)
+        print(f"👂 Listening ({first_listen[0]:.1f}s after launch)")
+    if event == "heard":
+        print(f"👤 You: {payload['text']}")
+    elif event == "status" and payload["status"] == "THINKING":
+        print("🧠 Thinking...")
+    elif event == "error" and payload["fatal"] and isinstance(payload["error"], OSError):
+        print(f"\n❌ MICROPHONE ERROR: Could not access Device Index {MIC_INDEX}.")
+        print(f"Error Details: {payload['error']}")
+        print("👉 Run 'python check_mics.py' to find the correct index.")
 
 def main():
     print("🚀 Starting Main Loop...")
-    
-    # Test Speaker first to ensure audio works
+
+    # Models, clients and the memory sync load in the background; listening starts right away
+    warmup.add("speaker", import_module("voice.speaker"))
+    for name, fn in BACKEND_TASKS:
+        warmup.add(name, fn)
+    # Sync long-term memory (only new/changed lines get embedded)
+    warmup.add("kb_sync", rag_engine.ingest_knowledge_base)
+    warmup.start()
+
+    # Greets first (tests the speaker), then listens until "exit"
+    pipeline = VoicePipeline(mic_index=MIC_INDEX, thread_id="Session-Debug-1",
+                             greeting="System Diagnostics Online.", goodbye="Shutting down.")
+    pipeline.subscribe(on_event)
     try:
-        speaker.speak("System Diagnostics Online.")
-    except Exception as e:
-        print(f"⚠️ Speaker Error: {e}")
+        pipeline.run()
+    except KeyboardInterrupt:
+        pass
 
-    # Conversation State
-    config = {"configurable": {"thread_id": "Session-Debug-1"}}
-    
-    while True:
-        try:
-            # 1. Listen
-            user_text = listener.listen(mic_index=MIC_INDEX)
-            
-            if user_text:
-                print(f"👤 You: {user_text}")
-                
-                if "exit" in user_text.lower():
-                    speaker.speak("Shutting down.")
-                    break
-                
-                # 2. Think (LangGraph)
-                print("🧠 Thinking...")
-                result = app.invoke(
-                    {"messages": [HumanMessage(content=user_text)]}, 
-                    config=config
-                )
-                
-                ai_response = result['messages'][-1].content
-                
-                # 3. Speak
-                speaker.speak(ai_response)
-                
-        except OSError as e:
-            print(f"\n❌ MICROPHONE ERROR: Could not access Device Index {MIC_INDEX}.")
-            print(f"Error Details: {e}")
-            print("👉 Run 'python check_mics.py' to find the correct index.")
-            break
-            
-        except Exception as e:
-            print(f"\n❌ UNEXPECTED ERROR: {e}")
-            traceback.print_exc()
-            break
+    from backend.core import prefetcher
+    print(f"📊 Prefetch: {prefetcher.report()}")
+    print(f"📊 Embedding cache: {rag_engine.embedder.report()}")
+    print(f"📊 Stage latency: {tracing.report()}")
+    print(f"📊 Pipeline: {pipeline.metrics()}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,12 @@
-import whisper
 import pyttsx3
-import speech_recognition as sr
+import threading
 import time
 import os
 from groq import Groq
 from dotenv import load_dotenv  # <--- NEW IMPORT
+from voice import listener
+from voice.pipeline import VoicePipeline
+from backend.warmup import warmup
 
 # 1. Load Environment Variables
 load_dotenv()
@@ -20,49 +22,54 @@ if not GROQ_API_KEY:
 MIC_INDEX = 3  # Based on your previous success
 client = Groq(api_key=GROQ_API_KEY)
 
-engine = pyttsx3.init()
-engine.setProperty('rate', 160)
+engine = None  # Created on the pipeline's speaker thread (pyttsx3 is not thread-safe)
 
 def speak(text):
+    global engine
+    if engine is None:
+        engine = pyttsx3.init()
+        engine.setProperty('rate', 160)
     print(f"🤖 AI: {text}")
     engine.say(text)
     engine.runAndWait()
 
-print("⏳ Loading Whisper Model...")
-model = whisper.load_model("base")
-print("✅ Systems Online. Metrics Active.")
+# Whisper (and torch under it) loads in the background, not at import
+model = None
+_model_lock = threading.Lock()
 
-def listen_and_transcribe():
-    recognizer = sr.Recognizer()
+def load_model():
+    global model
+    with _model_lock:
+        if model is None:
+            import whisper
+            print("⏳ Loading Whisper Model...")
+            model = whisper.load_model("base")
+    return model
+
+def make_recognizer():
+    recognizer = listener.make_recognizer()
     recognizer.energy_threshold = 300
-    recognizer.dynamic_energy_threshold = False
-    
-    with sr.Microphone(device_index=MIC_INDEX) as source:
-        print(f"\n🎤 Listening...")
-        try:
-            audio = recognizer.listen(source, timeout=None, phrase_time_limit=5)
-            
-            # METRIC 1: Transcription Time
-            start_time = time.time()
-            print("⚡ Transcribing...")
-            
-            with open("temp.wav", "wb") as f:
-                f.write(audio.get_wav_data())
-            
-            result = model.transcribe("temp.wav", language="en")
-            text = result['text'].strip()
-            
-            end_time = time.time()
-            transcription_time = end_time - start_time
-            
-            if not text: return None, 0
-            
-            print(f"👤 You: {text}")
-            print(f"⏱️ Whisper Latency: {transcription_time:.2f}s")
-            return text, transcription_time
-            
-        except Exception as e:
-            return None, 0
+    return recognizer
+
+def transcribe(audio):
+    # METRIC 1: Transcription Time
+    start_time = time.time()
+    print("⚡ Transcribing...")
+
+    with open("temp.wav", "wb") as f:
+        f.write(audio.get_wav_data())
+
+    result = load_model().transcribe("temp.wav", language="en")
+    text = result['text'].strip()
+
+    end_time = time.time()
+    transcription_time = end_time - start_time
+
+    if not text: return None
+
+    print(f"👤 You: {text}")
+    print(f"⏱️ Whisper Latency: {transcription_time:.2f}s")
+    return text
 
 def query_llm(user_text):
     # METRIC 2: Groq Inference Time
@@ -87,17 +94,24 @@ def query_llm(user_text):
     print(f"⏱️ Groq Latency: {inference_time:.2f}s") 
     return response
 
+def on_event(event, payload):
+    if event == "status" and payload["status"] == "LISTENING":
+        print(f"\n🎤 Listening...")
+
 # --- MAIN LOOP ---
 if __name__ == "__main__":
-    speak("Secure Systems Online.")
-    
-    while True:
-        user_input, trans_time = listen_and_transcribe()
-        
-        if user_input:
-            if "exit" in user_input.lower():
-                speak("Shutting down.")
-                break
-            
-            response = query_llm(user_input)
-            speak(response)
\ No newline at end of file
+    warmup.add("whisper", load_model)
+    warmup.on_ready(lambda: print("✅ Systems Online. Metrics Active."))
+    warmup.start()
+
+    pipeline = VoicePipeline(
+        mic_index=MIC_INDEX,
+        agent=lambda text, thread_id: query_llm(text),
+        transcribe=transcribe,
+        speak=speak,
+        recognizer=make_recognizer(),
+        greeting="Secure Systems Online.",
+        goodbye="Shutting down.",
+    )
+    pipeline.subscribe(on_event)
+    pipeline.run()
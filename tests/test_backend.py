@@ -0,0 +1,237 @@
+"""
+Offline tests for routing, circuit breakers, the write-behind journal and the
+web-search cache. Run from the repo root:  python -m pytest tests
+Everything runs on the local stand-ins (scripted LLM, in-memory Pinecone,
+offline web search); tests that need the agent's dependencies
+(langgraph, numpy, ...) are skipped when those aren't installed.
+"""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import pytest
+
+# Before backend.core / rag_engine are imported: stand-ins, and nothing written under data/
+_tmp = tempfile.mkdtemp(prefix="jarvis-tests-")
+os.environ.update({
+    "LLM_BACKEND": "fake",
+    "VECTOR_BACKEND": "fake",
+    "WEB_SEARCH_BACKEND": "offline",
+    "KEYWORD_INDEX_PATH": os.path.join(_tmp, "keywords.json"),
+    "MEMORY_JOURNAL_PATH": os.path.join(_tmp, "journal.jsonl"),
+    "INGEST_MANIFEST_PATH": os.path.join(_tmp, "manifest.json"),
+    "EMBED_CACHE_PATH": os.path.join(_tmp, "embed_cache.sqlite"),
+})
+
+from backend import write_behind
+from backend.resilience import CircuitBreaker, call_with_deadline
+from backend.web_search import CachedWebSearch, classify_topic, normalize_query
+from backend.write_behind import WriteBehindBuffer
+
+
+@pytest.fixture(scope="module")
+def core():
+    for module in ("dotenv", "numpy", "langgraph", "langchain_core"):
+        pytest.importorskip(module)
+    from backend import core
+    return core
+
+
+# --- ROUTING ---
+@pytest.mark.parametrize("reply, expected", [
+    ('CMD: SAVE | "I live in Raipur"', ("SAVE", "I live in Raipur")),
+    ("CMD: SAVE | I study at NIT\nGot it.", ("SAVE", "I study at NIT")),
+    ("CMD: SEARCH | where do I study", ("SEARCH", "where do I study")),
+    ('CMD: GOOGLE | bitcoin price" now', ("GOOGLE", "bitcoin price")),
+    ("CMD: BOTH | weather where I live", ("BOTH", "weather where I live")),
+    ("CMD: TIME", ("TIME", "")),
+    ("Sure, happy to help.", ("CHAT", "")),
+])
+def test_parse_command(core, reply, expected):
+    assert core.parse_command(reply) == expected
+
+
+@pytest.mark.parametrize("route, branches", [
+    ("SEARCH", ["retrieval"]),
+    ("GOOGLE", ["web"]),
+    ("BOTH", ["retrieval", "web"]),  # Fan-out: both run, answer joins them
+    ("SAVE", ["tool"]),
+    ("TIME", ["tool"]),
+])
+def test_pick_route(core, route, branches):
+    assert core.pick_route({"route": route}) == branches
+
+
+def test_pick_route_chat_ends(core):
+    from langgraph.graph import END
+    assert core.pick_route({"route": "CHAT"}) == [END]
+
+
+def test_scripted_router_fans_out(core):
+    """The fake LLM's router reply for a personal + live question parses to BOTH."""
+    from backend.fake_llm import route_for
+    route, query = core.parse_command(route_for("What's the weather where I live?"))
+    assert route == "BOTH"
+    assert core.pick_route({"route": route}) == ["retrieval", "web"]
+    assert query == "What's the weather where I live"
+
+
+def test_both_branches_join_at_answer(core):
+    edges = {(e.source, e.target) for e in core.app.get_graph().edges}
+    assert ("retrieval", "answer") in edges
+    assert ("web", "answer") in edges
+
+
+# --- CIRCUIT BREAKER ---
+def test_breaker_half_open_lets_one_trial_through():
+    breaker = CircuitBreaker("test", failure_threshold=2, cooldown=0.05)
+    breaker.record_failure()
+    assert breaker.state == "CLOSED"
+    breaker.record_failure()
+    assert breaker.state == "OPEN"
+    assert not breaker.allow()
+
+    time.sleep(0.06)
+    assert breaker.state == "HALF_OPEN"
+    assert breaker.allow()       # The single trial call
+    assert not breaker.allow()   # Everyone else waits for its result
+
+    breaker.record_failure()     # Trial failed: straight back to OPEN
+    assert breaker.state == "OPEN"
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_success()     # Trial succeeded: CLOSED for everyone
+    assert breaker.state == "CLOSED"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_half_open_trial_not_spent_without_budget():
+    breaker = CircuitBreaker("test", failure_threshold=1, cooldown=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    calls = []
+    assert call_with_deadline(calls.append, "x", timeout=0, breaker=breaker, fallback="fb") == "fb"
+    assert calls == []
+    assert call_with_deadline(calls.append, "x", timeout=1.0, breaker=breaker, fallback="fb") is None
+    assert calls == ["x"]
+    assert breaker.state == "CLOSED"
+
+
+# --- WRITE-BEHIND ---
+def _dead_pid():
+    proc = subprocess.Popen([sys.executable, "-c", "pass"])
+    proc.wait()
+    return proc.pid
+
+
+def _write_journal(path, entries):
+    with open(path, "w") as f:
+        for entry in entries:
+            f.write(json.dumps(entry) + "\n")
+
+
+def test_write_behind_replays_orphaned_journals(tmp_path):
+    legacy = tmp_path / "journal.jsonl"
+    _write_journal(legacy, [{"id": "a"}])
+    orphan = tmp_path / f"journal.{_dead_pid()}.jsonl"
+    _write_journal(orphan, [{"id": "b"}, {"id": "c"}])
+    with open(orphan, "a") as f:
+        f.write('{"id": "torn')  # Crash mid-write
+
+    applied = []
+    buffer = WriteBehindBuffer(applied.extend, str(legacy), interval=3600, close_at_exit=False)
+    try:
+        assert buffer.stats["replayed"] == 3
+        assert [e["id"] for e in buffer.pending()] == ["a", "b", "c"]
+        assert not legacy.exists() and not orphan.exists()  # Claimed into our own journal
+        assert os.path.exists(buffer.journal_path)
+
+        assert buffer.flush() == 3
+        assert [e["id"] for e in applied] == ["a", "b", "c"]
+        assert not os.path.exists(buffer.journal_path)
+    finally:
+        buffer.close()
+
+
+def test_write_behind_keeps_unapplied_writes_in_journal(tmp_path):
+    def fail(entries):
+        raise RuntimeError("index down")
+
+    path = str(tmp_path / "journal.jsonl")
+    buffer = WriteBehindBuffer(fail, path, interval=3600, close_at_exit=False)
+    buffer.submit({"id": "a"})
+    assert buffer.flush() == 0
+    with open(buffer.journal_path) as f:
+        assert [json.loads(line)["id"] for line in f] == ["a"]
+    buffer._closed = True  # Simulate a crash: no final flush
+    buffer._wake.set()
+
+    # The next process (different PID in real life) finds the journal and applies it
+    applied = []
+    os.rename(buffer.journal_path, str(tmp_path / f"journal.{_dead_pid()}.jsonl"))
+    replay = WriteBehindBuffer(applied.extend, path, interval=3600, close_at_exit=False)
+    try:
+        replay.flush()
+        assert [e["id"] for e in applied] == ["a"]
+    finally:
+        replay.close()
+
+
+def test_write_behind_dead_letters_a_poison_entry(tmp_path):
+    applied = []
+
+    def apply(entries):
+        if any(e["id"] == "bad" for e in entries):
+            raise ValueError("cannot embed")
+        applied.extend(entries)
+
+    buffer = WriteBehindBuffer(apply, str(tmp_path / "journal.jsonl"), interval=3600, close_at_exit=False)
+    try:
+        buffer.submit({"id": "bad"})
+        buffer.submit({"id": "good"})
+        buffer.flush()
+        assert [e["id"] for e in applied] == ["good"]  # Not held back by the bad one
+        for _ in range(write_behind.MAX_ATTEMPTS - 1):
+            buffer.flush()
+        assert buffer.pending() == []
+        with open(buffer.dead_letter_path) as f:
+            assert [json.loads(line)["id"] for line in f] == ["bad"]
+    finally:
+        buffer.close()
+
+
+# --- WEB SEARCH CACHE ---
+class _CountingBackend:
+    def __init__(self):
+        self.calls = []
+
+    def search(self, query):
+        self.calls.append(query)
+        return f"result {len(self.calls)}"
+
+
+def test_normalize_keeps_word_order():
+    assert normalize_query("What is the Weather in Raipur?") == "weather raipur"
+    assert normalize_query("flights from delhi to goa") != normalize_query("flights from goa to delhi")
+
+
+def test_topics_match_whole_words():
+    assert classify_topic("Will it rain tomorrow?") == "weather"
+    assert classify_topic("Capital of Ukraine") == "default"
+
+
+def test_cache_serves_fresh_then_stale_then_refetches():
+    now = [0.0]
+    backend = _CountingBackend()
+    cache = CachedWebSearch(backend, ttls={"weather": 10}, stale_factor=4, clock=lambda: now[0])
+
+    assert cache.search("weather in Raipur") == "result 1"
+    assert cache.search("What is the weather in Raipur?") == "result 1"  # Same normalized key
+    assert cache.stats["hits"] == 1
+
+    now[0] = 100.0  # Past TTL * stale_factor: blocks on a new search
+    assert cache.search("weather in Raipur") == "result 2"
+    assert len(backend.calls) == 2
@@ -0,0 +1,150 @@
+import asyncio
+import os
+import random
+import threading
+import edge_tts
+import pygame
+from voice import speaker
+
+# --- CONFIG ---
+FILLER_DELAY = 1.2  # Seconds of silence before we play a filler
+CACHE_DIR = "data/filler_cache"
+PHRASES = [
+    "One moment.",
+    "Let me check.",
+    "Hmm, let me see.",
+    "Looking that up.",
+]
+
+# Statuses the GUIs pass to update_status / set_status
+THINKING_STATUSES = {"THINKING", "PROCESSING"}
+ANSWER_STATUSES = {"SPEAKING"}
+
+
+def _clip_path(phrase):
+    slug = "".join(c for c in phrase.lower() if c.isalnum() or c == " ").strip().replace(" ", "_")
+    return os.path.join(CACHE_DIR, f"{slug}.mp3")
+
+
+class FillerPlayer:
+    """
+    Masks tool-call latency with a short pre-synthesized acknowledgement.
+    Feed it the same status strings the GUI shows: THINKING arms a timer, and if
+    the answer has not arrived when it fires, a cached clip plays. When the real
+    answer starts, speaker.py cross-fades out of the clip.
+    `on_playback(active)` is told when a clip starts and stops (pass
+    VoicePipeline.playback, so a half-duplex mic doesn't hear the clip as a turn).
+    """
+
+    def __init__(self, delay=FILLER_DELAY, phrases=PHRASES, on_playback=None):
+        self.delay = delay
+        self.phrases = phrases
+        self.on_playback = on_playback
+        self._timer = None
+        self._channel = None
+        self._ended = None  # Timer that reports the end of a clip that wasn't faded
+        self._lock = threading.Lock()
+        self.stats = {"armed": 0, "played": 0}
+        speaker.playback_hooks.append(self.fade_out)
+
+    def warm(self):
+        """Synthesizes any missing clips in the background (once per machine)."""
+        missing = [p for p in self.phrases if not os.path.exists(_clip_path(p))]
+        if not missing:
+            return
+
+        async def _synthesize():
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            for phrase in missing:
+                communicate = edge_tts.Communicate(phrase, speaker.VOICE, rate=speaker.RATE)
+                await communicate.save(_clip_path(phrase))
+
+        def _run():
+            try:
+                asyncio.run(_synthesize())
+                print(f"✅ Filler clips ready ({len(missing)} new)")
+            except Exception as e:
+                print(f"⚠️ Filler synthesis failed: {e}")
+
+        threading.Thread(target=_run, daemon=True).start()
+
+    def on_status(self, status):
+        """Call this wherever the front end updates its status label."""
+        status = status.upper().strip(". ")
+        if status in THINKING_STATUSES:
+            self._arm()
+        elif status in ANSWER_STATUSES:
+            # Answer is here; speaker.py fades the clip once playback starts
+            self._disarm()
+        else:
+            self._disarm()
+            self.fade_out()
+
+    def _arm(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.delay, self._play)
+            self._timer.daemon = True
+            self._timer.start()
+            self.stats["armed"] += 1
+
+    def _disarm(self):
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+
+    def _play(self):
+        clips = [_clip_path(p) for p in self.phrases if os.path.exists(_clip_path(p))]
+        if not clips:
+            return
+        started = False
+        try:
+            pygame.mixer.init()
+            sound = pygame.mixer.Sound(random.choice(clips))
+            if self.on_playback:
+                self.on_playback(True)  # Before the first sample reaches the speakers
+                started = True
+            with self._lock:
+                self._timer = None
+                self._channel = sound.play()
+                self._ended = threading.Timer(sound.get_length(), self._finished, args=(self._channel,))
+                self._ended.daemon = True
+                self._ended.start()
+            self.stats["played"] += 1
+        except Exception as e:
+            print(f"⚠️ Filler Error: {e}")
+            if started:
+                self._finished(None)
+
+    def _finished(self, channel, delay=0.0):
+        """Reports the end of playback once (clip ran out, was faded, or failed to start)."""
+        with self._lock:
+            if channel is not self._channel and channel is not None:
+                return  # Already reported by fade_out
+            if channel is not None:
+                self._channel = None
+            ended, self._ended = self._ended, None
+        if ended:
+            ended.cancel()
+        if self.on_playback:
+            if delay:
+                timer = threading.Timer(delay, self.on_playback, args=(False,))
+                timer.daemon = True
+                timer.start()
+            else:
+                self.on_playback(False)
+
+    def fade_out(self):
+        """Fades the filler clip. Returns True if one was playing."""
+        with self._lock:
+            channel = self._channel
+        if channel is None:
+            return False
+        busy = channel.get_busy()
+        if busy:
+            channel.fadeout(speaker.CROSSFADE_MS)
+        # The mic stays guarded until the fade has finished
+        self._finished(channel, delay=speaker.CROSSFADE_MS / 1000 if busy else 0.0)
+        return busy
@@ -1,53 +1,93 @@
 import os
+import time
+from contextlib import ExitStack
 import speech_recognition as sr
-from groq import Groq
 from dotenv import load_dotenv
+from backend import tracing
 
 load_dotenv()
-client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 
-def listen(mic_index=1): # <--- KEPT YOUR INDEX 1
+# 1. NOISE FILTERING
+# Higher = Less Sensitive (300 is sensitive, 500-1000 is stricter)
+ENERGY_THRESHOLD = 500
+PAUSE_THRESHOLD = 0.6  # Seconds of silence that end an utterance (endpointing)
+
+# --- THE TRASH FILTER ---
+# Whisper "hears" these in silence / noise. If the text matches ANY of these, ignore it.
+GHOST_PHRASES = [
+    "Thank you.", "Thank you", "You", "MBC", "Subtitles",
+    "Amara.org", "by", "The", "Copyright", "Copyright 2025"
+]
+
+
+class GroqWhisper:
+    """Default speech-to-text backend. Any object with `transcribe(wav_bytes) -> str` works."""
+
+    def __init__(self, model="whisper-large-v3-turbo"):
+        self.model = model
+        self._client = None
+
+    def transcribe(self, wav_bytes):
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(api_key=os.getenv("GROQ_API_KEY"))
+        return self._client.audio.transcriptions.create(
+            file=("temp.wav", wav_bytes),
+            model=self.model,
+            prompt="Mohankalyan, M.Tech, NIT Raipur. English.",
+            language="en",
+            response_format="text"
+        )
+
+# Swappable (benchmarks plug in a local stand-in)
+stt_backend = GroqWhisper()
+
+def make_recognizer():
     r = sr.Recognizer()
-    
-    # 1. NOISE FILTERING
-    # Higher = Less Sensitive (300 is sensitive, 500-1000 is stricter)
-    r.energy_threshold = 500  
-    r.dynamic_energy_threshold = False 
-    r.pause_threshold = 0.6
-    
-    with sr.Microphone(device_index=mic_index) as source:
+    r.energy_threshold = ENERGY_THRESHOLD
+    r.dynamic_energy_threshold = False
+    r.pause_threshold = PAUSE_THRESHOLD
+    return r
+
+def capture(recognizer, source, timeout=1.0, phrase_time_limit=5):
+    """Waits for speech and returns the utterance once PAUSE_THRESHOLD of silence ends it."""
+    return recognizer.listen(source, timeout=timeout, phrase_time_limit=phrase_time_limit)
+
+def is_ghost(text):
+    # Reject if in ghost list OR too short (less than 3 chars)
+    return text in GHOST_PHRASES or len(text) < 4
+
+def transcribe(audio):
+    """AudioData -> text, or None for silence hallucinations."""
+    # The network upload itself is inside the "stt" span (one request/response)
+    with tracing.span("encode"):
+        wav = audio.get_wav_data()
+    with tracing.span("stt", backend=type(stt_backend).__name__) as attrs:
+        text = stt_backend.transcribe(wav).strip()
+        attrs["ghost"] = is_ghost(text)
+    return None if attrs["ghost"] else text
+
+def listen(mic_index=1): # <--- KEPT YOUR INDEX 1
+    r = make_recognizer()
+
+    with ExitStack() as stack:
+        with tracing.span("device_open", mic=mic_index):
+            source = stack.enter_context(sr.Microphone(device_index=mic_index))
         # Optional: Adjust for noise once at startup (can slow down first loop)
         # r.adjust_for_ambient_noise(source, duration=0.5)
-        
+
         try:
             # Wait 1s for speech. If silence, stops waiting.
-            audio = r.listen(source, timeout=1.0, phrase_time_limit=5)
-            
-            with open("temp.wav", "wb") as f: f.write(audio.get_wav_data())
-            
-            with open("temp.wav", "rb") as file:
-                text = client.audio.transcriptions.create(
-                    file=("temp.wav", file.read()),
-                    model="whisper-large-v3-turbo",
-                    prompt="Mohankalyan, M.Tech, NIT Raipur. English.",
-                    language="en",
-                    response_format="text"
-                ).strip()
-            
-            # --- 2. THE TRASH FILTER ---
-            # If the text matches ANY of these, ignore it.
-            ghost_phrases = [
-                "Thank you.", "Thank you", "You", "MBC", "Subtitles", 
-                "Amara.org", "by", "The", "Copyright", "Copyright 2025"
-            ]
-            
-            # Reject if in ghost list OR too short (less than 3 chars)
-            if text in ghost_phrases or len(text) < 4: 
-                return None
-                
-            return text
-            
+            start_ns = time.time_ns()
+            audio = capture(r, source)
+            # Only speech starts a turn; spans from here to speaker.speak share its ID
+            tracing.start_turn(start_ns=start_ns)
+            tracing.record("capture", (time.time_ns() - start_ns) / 1e6)
+            # The utterance only ended after PAUSE_THRESHOLD of silence
+            tracing.record("endpoint", r.pause_threshold * 1000, estimated=True)
+            return transcribe(audio)
+
         except sr.WaitTimeoutError:
             return None # Silence is normal
         except Exception:
-            return None
\ No newline at end of file
+            return None
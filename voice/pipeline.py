@@ -0,0 +1,428 @@
+"""
+One voice loop for every front end.
+
+    capture -> [audio_q] -> stt -> [text_q] -> agent -> [reply_q] -> tts
+
+Each stage is an asyncio task. Its blocking work (mic, Whisper, LangGraph,
+playback) runs on that stage's own worker thread, so the mic can pick up the
+next utterance while the previous answer is still being thought about or spoken.
+The queues are bounded: a slow stage makes the one before it wait (back-pressure)
+instead of piling up stale turns.
+
+    pipeline = VoicePipeline(mic_index=1, thread_id="Session-1", greeting="Online.")
+    pipeline.subscribe(lambda event, payload: print(event, payload))
+    pipeline.start()   # background thread (GUIs); pipeline.run() blocks (CLI)
+    ...
+    pipeline.stop()
+
+Events passed to subscribers, always from the pipeline thread:
+  status  {"status": LISTENING / THINKING / SPEAKING / IDLE / OFFLINE}
+  heard   {"text", "turn_id"}            a transcript made it past the ghost filter
+  reply   {"text", "turn_id"}            the agent answered (before it is spoken)
+  dropped {"stage", "reason"}            an utterance was thrown away (e.g. echo)
+  error   {"stage", "error", "fatal"}    fatal errors (mic won't open) stop the pipeline
+  exit    {"text"}                       an exit word was heard
+  stopped {}
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+from backend import tracing
+from voice import listener
+
+QUEUE_SIZE = 2   # Utterances allowed to wait between two stages
+STAGES = ["capture", "stt", "agent", "tts"]
+
+# half: don't capture while the reply is playing (open speakers hear themselves)
+# full: keep listening through playback (headset)
+DUPLEX = "half"
+
+
+class GraphAgent:
+    """The LangGraph app from backend.core as a pipeline agent (imported on first use)."""
+
+    def __init__(self, prompt_fn=None):
+        self.prompt_fn = prompt_fn  # text -> prompt, e.g. to mention an uploaded PDF
+
+    def _prompt(self, text):
+        return self.prompt_fn(text) if self.prompt_fn else text
+
+    def prefetch(self, text, thread_id):
+        from backend.core import prefetch_memory
+        # Keyed on the prompt the router will see, so router_node reuses this prefetch
+        prefetch_memory(self._prompt(text), {"configurable": {"thread_id": thread_id}})
+
+    def __call__(self, text, thread_id):
+        from langchain_core.messages import HumanMessage
+        from backend.core import app
+        prompt = self._prompt(text)
+        result = app.invoke({"messages": [HumanMessage(content=prompt)]},
+                            config={"configurable": {"thread_id": thread_id}})
+        return result["messages"][-1].content
+
+
+def speak(text):
+    from voice import speaker
+    speaker.speak(text)
+
+
+class StageMetrics:
+    def __init__(self, name, queue=None):
+        self.name = name
+        self.queue = queue       # Input queue (None for capture)
+        self.processed = 0
+        self.errors = 0
+        self.busy_ms = 0.0       # Time spent in the stage's blocking work
+        self.blocked_ms = 0.0    # Time spent waiting for room in the next queue
+        self.backpressure = 0    # Puts that found the next queue full
+        self.max_depth = 0
+
+    def snapshot(self):
+        snap = {"processed": self.processed, "errors": self.errors,
+                "busy_ms": round(self.busy_ms, 1), "blocked_ms": round(self.blocked_ms, 1),
+                "backpressure": self.backpressure}
+        if self.queue is not None:
+            snap.update(depth=self.queue.qsize(), max_depth=self.max_depth, capacity=self.queue.maxsize)
+        return snap
+
+
+class Utterance:
+    def __init__(self, turn, audio=None, text=None, final=False):
+        self.turn = turn      # tracing.current_context() of the capture that produced it
+        self.audio = audio
+        self.text = text
+        self.final = final    # Goodbye: the pipeline stops once it has been spoken
+
+    @property
+    def turn_id(self):
+        return self.turn[0] if self.turn else None
+
+
+class VoicePipeline:
+    def __init__(self, mic_index=1, thread_id="Session-1", agent=None, transcribe=None, speak=speak,
+                 recognizer=None, capture_timeout=1.0, phrase_time_limit=5, queue_size=QUEUE_SIZE,
+                 duplex=DUPLEX, exit_words=("exit",), greeting=None, goodbye="Shutting down."):
+        self.mic_index = mic_index
+        self.thread_id = thread_id
+        self.agent = agent or GraphAgent()
+        self.transcribe = transcribe or listener.transcribe
+        self.speak = speak
+        self.recognizer = recognizer or listener.make_recognizer()
+        self.capture_timeout = capture_timeout
+        self.phrase_time_limit = phrase_time_limit
+        self.queue_size = queue_size
+        self.duplex = duplex
+        self.exit_words = exit_words
+        self.greeting = greeting
+        self.goodbye = goodbye
+        self.status = "OFFLINE"
+        self._subscribers = []
+        self._metrics = {}
+        self._busy = {stage: 0 for stage in STAGES}
+        self._loop = None
+        self._stop = None
+        self._thread = None
+        self._exiting = False
+        self._speech_epoch = 0   # Bumped whenever playback starts (echo detection)
+        self._external_playback = 0  # Clips playing outside the tts stage (see playback())
+
+    # --- PUBLIC API ---
+    def subscribe(self, fn):
+        """fn(event, payload) is called from the pipeline thread; GUIs marshal to their own."""
+        self._subscribers.append(fn)
+        return fn
+
+    def start(self):
+        """Runs the pipeline on a daemon thread and returns immediately."""
+        if self._thread and self._thread.is_alive():
+            self._thread.join()  # Restarted right after stop(): let the old run release the mic
+        self._thread = threading.Thread(target=self.run, name=f"voice-{self.thread_id}", daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def run(self):
+        """Runs the pipeline in this thread until stop() or an exit word."""
+        asyncio.run(self._main())
+
+    def stop(self):
+        """Thread-safe. Stages finish what they are doing; nothing new is picked up."""
+        if self._loop and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._stop.set)
+            except RuntimeError:
+                pass  # Loop already shut down
+
+    def say(self, text):
+        """Thread-safe. Queues text behind any pending replies instead of talking over them."""
+        if self._loop and not self._loop.is_closed():
+            asyncio.run_coroutine_threadsafe(self._put("agent", self._reply_q, Utterance(None, text=text)), self._loop)
+
+    def playback(self, active):
+        """
+        Thread-safe hook for audio played outside the tts stage (e.g. voice/filler.py):
+        playback(True) when it starts, playback(False) when it ends. In half duplex the
+        mic then treats it like a reply, so the clip isn't heard as a new turn.
+        """
+        if self._loop and not self._loop.is_closed():
+            try:
+                self._loop.call_soon_threadsafe(self._set_external_playback, active)
+            except RuntimeError:
+                pass  # Loop already shut down
+
+    def _set_external_playback(self, active):
+        if active:
+            self._external_playback += 1
+            self._playback_started()
+        elif self._external_playback:
+            self._external_playback -= 1
+            self._playback_ended()
+
+    def _playback_started(self):
+        self._speech_epoch += 1
+        self._quiet.clear()
+
+    def _playback_ended(self):
+        if not self._busy["tts"] and not self._external_playback:
+            self._quiet.set()
+
+    @property
+    def running(self):
+        return self._stop is not None and not self._stop.is_set()
+
+    def metrics(self):
+        """{stage: processed / errors / busy / blocked ms / back-pressure / queue depth}"""
+        return {name: m.snapshot() for name, m in self._metrics.items()}
+
+    # --- PLUMBING ---
+    def _emit(self, event, **payload):
+        for fn in list(self._subscribers):
+            try:
+                fn(event, payload)
+            except Exception as e:
+                print(f"⚠️ Pipeline subscriber failed on '{event}': {e}")
+
+    def _update_status(self):
+        if self._busy["tts"]:
+            status = "SPEAKING"
+        elif self._busy["agent"] or self._text_q.qsize():
+            status = "THINKING"
+        else:
+            status = "LISTENING"
+        self._set_status(status)
+
+    def _set_status(self, status):
+        if status != self.status:
+            self.status = status
+            self._emit("status", status=status)
+
+    async def _call(self, stage, fn, *args):
+        """Runs blocking work on the stage's own thread, carrying the tracing context along."""
+        ctx = contextvars.copy_context()
+        start = time.perf_counter()
+        try:
+            return await self._loop.run_in_executor(self._executors[stage], functools.partial(ctx.run, fn, *args))
+        finally:
+            self._metrics[stage].busy_ms += (time.perf_counter() - start) * 1000
+
+    async def _put(self, stage, queue, item):
+        """Puts into the next stage's queue, waiting (and counting it) when that queue is full."""
+        metrics = self._metrics[stage]
+        try:
+            queue.put_nowait(item)
+        except asyncio.QueueFull:
+            metrics.backpressure += 1
+            start = time.perf_counter()
+            await queue.put(item)
+            metrics.blocked_ms += (time.perf_counter() - start) * 1000
+        downstream = next(m for m in self._metrics.values() if m.queue is queue)
+        downstream.max_depth = max(downstream.max_depth, queue.qsize())
+        self._update_status()
+
+    def _fail(self, stage, error, fatal=False):
+        self._metrics[stage].errors += 1
+        print(f"❌ {stage} stage error: {error}")
+        if not isinstance(error, OSError):
+            traceback.print_exception(type(error), error, error.__traceback__)
+        self._emit("error", stage=stage, error=error, fatal=fatal)
+        if fatal:
+            self._stop.set()
+
+    # --- STAGES ---
+    def _open_mic(self):
+        with tracing.span("device_open", mic=self.mic_index):
+            source = sr.Microphone(device_index=self.mic_index)
+            source.__enter__()
+        # Optional: Adjust for noise once at startup (can slow down first loop)
+        # self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        return source
+
+    def _capture(self, source):
+        """Returns (audio, turn) once someone spoke, None after capture_timeout of silence."""
+        start_ns = time.time_ns()
+        try:
+            # Wait capture_timeout for speech. If silence, stops waiting.
+            audio = listener.capture(self.recognizer, source, self.capture_timeout, self.phrase_time_limit)
+        except sr.WaitTimeoutError:
+            return None  # Silence is normal, and not a turn
+        # A turn starts only once there was speech; it covers the capture that heard it
+        tracing.start_turn(start_ns=start_ns)
+        tracing.record("capture", (time.time_ns() - start_ns) / 1e6)
+        # The utterance only ended after pause_threshold of silence
+        tracing.record("endpoint", self.recognizer.pause_threshold * 1000, estimated=True)
+        return audio, tracing.current_context()
+
+    async def _capture_stage(self):
+        metrics = self._metrics["capture"]
+        try:
+            source = await self._call("capture", self._open_mic)
+        except OSError as e:
+            return self._fail("capture", e, fatal=True)
+        try:
+            while not self._stop.is_set() and not self._exiting:
+                if self.duplex == "half":
+                    await self._quiet.wait()
+                epoch = self._speech_epoch
+                try:
+                    captured = await self._call("capture", self._capture, source)
+                except OSError as e:
+                    return self._fail("capture", e, fatal=True)  # Device went away
+                except Exception as e:
+                    self._fail("capture", e)
+                    await asyncio.sleep(0.1)  # Don't spin on a misbehaving device
+                    continue
+                if captured is None:
+                    continue
+                audio, turn = captured  # Spans from here to the reply's playback share this turn ID
+                if self.duplex == "half" and epoch != self._speech_epoch:
+                    # Playback started mid-utterance: likely our own voice
+                    self._emit("dropped", stage="capture", reason="echo")
+                    continue
+                metrics.processed += 1
+                await self._put("capture", self._audio_q, Utterance(turn, audio=audio))
+        finally:
+            await self._call("capture", source.__exit__, None, None, None)
+
+    async def _stt_stage(self):
+        metrics = self._metrics["stt"]
+        while True:
+            item = await self._audio_q.get()
+            if self._exiting:
+                continue  # Already leaving; drain whatever was captured
+            tracing.attach(item.turn)
+            self._busy["stt"] += 1
+            try:
+                text = await self._call("stt", self.transcribe, item.audio)
+            except Exception as e:
+                self._fail("stt", e)
+                continue
+            finally:
+                self._busy["stt"] -= 1
+            if not text:
+                self._emit("dropped", stage="stt", reason="ghost")
+                continue
+            metrics.processed += 1
+            item.text, item.audio = text, None
+            self._emit("heard", text=text, turn_id=item.turn_id)
+            if any(word in text.lower() for word in self.exit_words):
+                self._exiting = True
+                self._emit("exit", text=text)
+                await self._put("stt", self._text_q, Utterance(item.turn, text=self.goodbye, final=True))
+                continue
+            # Start the memory lookup before the router has decided
+            prefetch = getattr(self.agent, "prefetch", None)
+            if prefetch:
+                try:
+                    await self._call("stt", prefetch, text, self.thread_id)
+                except Exception as e:
+                    print(f"⚠️ Prefetch skipped: {e}")
+            await self._put("stt", self._text_q, item)
+
+    async def _agent_stage(self):
+        metrics = self._metrics["agent"]
+        while True:
+            item = await self._text_q.get()
+            if item.final:  # Goodbye skips the agent
+                await self._put("agent", self._reply_q, item)
+                continue
+            tracing.attach(item.turn)
+            self._busy["agent"] += 1
+            self._update_status()
+            try:
+                reply = await self._call("agent", self.agent, item.text, self.thread_id)
+            except Exception as e:
+                self._fail("agent", e)
+                continue
+            finally:
+                self._busy["agent"] -= 1
+                self._update_status()
+            metrics.processed += 1
+            item.text = reply
+            self._emit("reply", text=reply, turn_id=item.turn_id)
+            await self._put("agent", self._reply_q, item)
+
+    def _speak_turn(self, text):
+        try:
+            self.speak(text)
+        finally:
+            tracing.end_turn()  # No-op if the speak function already ended it
+
+    async def _tts_stage(self):
+        metrics = self._metrics["tts"]
+        while True:
+            item = await self._reply_q.get()
+            tracing.attach(item.turn)
+            self._busy["tts"] += 1
+            self._playback_started()
+            self._update_status()
+            try:
+                if item.text:
+                    await self._call("tts", self._speak_turn, item.text)
+                metrics.processed += 1
+            except Exception as e:
+                self._fail("tts", e)
+            finally:
+                self._busy["tts"] -= 1
+                self._playback_ended()
+                self._update_status()
+            if item.final:
+                self._stop.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        self._quiet = asyncio.Event()
+        self._quiet.set()
+        self._external_playback = 0
+        self._exiting = False
+        self._audio_q = asyncio.Queue(self.queue_size)
+        self._text_q = asyncio.Queue(self.queue_size)
+        self._reply_q = asyncio.Queue(self.queue_size)
+        self._metrics = {
+            "capture": StageMetrics("capture"),
+            "stt": StageMetrics("stt", self._audio_q),
+            "agent": StageMetrics("agent", self._text_q),
+            "tts": StageMetrics("tts", self._reply_q),
+        }
+        # One thread per stage: stages overlap, and the mic / audio device stay on one thread each
+        self._executors = {stage: ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"voice-{stage}")
+                           for stage in STAGES}
+        self._set_status("IDLE")
+        if self.greeting:
+            self._reply_q.put_nowait(Utterance(None, text=self.greeting))
+        tasks = [asyncio.create_task(getattr(self, f"_{stage}_stage")()) for stage in STAGES]
+        try:
+            await self._stop.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            for executor in self._executors.values():
+                executor.shutdown(wait=False)  # A capture may still be waiting out its timeout
+            self._set_status("OFFLINE")
+            self._emit("stopped")
@@ -2,32 +2,110 @@ import os
 import asyncio
 import edge_tts
 import pygame
+import time
+from backend import tracing
+from backend.resilience import get_breaker
 
 # CONFIG: Faster Rate & "Brian" (Jarvis-like)
 VOICE = "en-IN-NeerjaNeural"
 RATE = "+25%"  # <--- Speed boost
 
 OUTPUT_FILE = "ai_response.mp3"
+TTS_TIMEOUT = 4.0  # Seconds to wait for edge-tts' first audio chunk before falling back to offline TTS
+
+CROSSFADE_MS = 300
+
+# Called right before the answer starts playing. A hook returns True if it was
+# playing something (e.g. filler audio) that the answer should cross-fade from.
+playback_hooks = []
+
+_offline_engine = None
+
+class EdgeTTS:
+    """Default TTS backend. Any object with an async `stream(text)` yielding audio bytes works."""
+
+    async def stream(self, text):
+        # Added 'rate' parameter for speed
+        communicate = edge_tts.Communicate(text, VOICE, rate=RATE)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio":
+                yield chunk["data"]
+
+# Swappable (benchmarks plug in a local stand-in)
+tts_backend = EdgeTTS()
+
+async def synthesize(text, path=OUTPUT_FILE, on_first_audio=None, first_byte_timeout=None):
+    """
+    Streams TTS audio into `path`. on_first_audio() fires when the first bytes arrive.
+    first_byte_timeout bounds only the wait for that first chunk (asyncio.TimeoutError);
+    a long answer may take as long as it needs once audio is flowing.
+    """
+    start = time.perf_counter()
+    with open(path, "wb") as f, tracing.span("tts", chars=len(text)):
+        chunks = tts_backend.stream(text).__aiter__()
+        try:
+            data = await asyncio.wait_for(chunks.__anext__(), timeout=first_byte_timeout)
+        except StopAsyncIteration:
+            return
+        tracing.record("tts.first_byte", (time.perf_counter() - start) * 1000)
+        if on_first_audio:
+            on_first_audio()
+        f.write(data)
+        async for data in chunks:
+            f.write(data)
+
+def _speak_offline(text):
+    """Degraded path: local pyttsx3 voice, no network needed."""
+    global _offline_engine
+    if _offline_engine is None:
+        import pyttsx3
+        _offline_engine = pyttsx3.init()
+        _offline_engine.setProperty('rate', 175)
+    _offline_engine.say(text)
+    _offline_engine.runAndWait()
 
 def speak(text):
     if not text: return
-    
+    try:
+        _speak(text)
+    finally:
+        tracing.end_turn() # No-op unless this context carries a turn (listener.listen / voice.pipeline)
+
+def _speak(text):
     async def _generate_audio():
-        # Added 'rate' parameter for speed
-        communicate = edge_tts.Communicate(text, VOICE, rate=RATE)
-        await communicate.save(OUTPUT_FILE)
+        await synthesize(text, OUTPUT_FILE, first_byte_timeout=TTS_TIMEOUT)
+
+    breaker = get_breaker("edge-tts")
+    if not breaker.allow():
+        print("⏭️ edge-tts circuit open, using offline voice")
+        try:
+            with tracing.span("tts.offline"):
+                _speak_offline(text)
+        except Exception as e:
+            print(f"❌ Audio Error: {e}")
+        return
 
     try:
         # Generate Audio
-        asyncio.run(_generate_audio())
+        try:
+            asyncio.run(_generate_audio())
+            breaker.record_success()
+        except Exception as e:
+            print(f"⚠️ edge-tts failed ({type(e).__name__}), using offline voice")
+            breaker.record_failure()
+            with tracing.span("tts.offline"):
+                _speak_offline(text)
+            return
 
         # Play Audio (Fast Load)
         pygame.mixer.init()
         pygame.mixer.music.load(OUTPUT_FILE)
-        pygame.mixer.music.play()
+        fading = any([hook() for hook in playback_hooks])
+        with tracing.span("playback", crossfade=fading):
+            pygame.mixer.music.play(fade_ms=CROSSFADE_MS if fading else 0)
 
-        while pygame.mixer.music.get_busy():
-            pygame.time.Clock().tick(10)
+            while pygame.mixer.music.get_busy():
+                pygame.time.Clock().tick(10)
 
         pygame.mixer.music.unload()
         try:
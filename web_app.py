@@ -4,10 +4,10 @@ import asyncio
 import edge_tts
 import base64
 import time
-from pypdf import PdfReader
 from langchain_core.messages import HumanMessage, AIMessage
 from backend.core import app
 from backend import rag_engine
+from backend.jobs import job_manager
 from groq import Groq
 
 # --- CONFIGURATION ---
@@ -73,9 +73,13 @@ with st.sidebar:
     
     # 1. Clear Memory Button (CRITICAL FIX)
     if st.button("🗑️ Reset Brain (Clear Old Data)"):
-        # This is a hacky way to simulate clearing context in this simple setup
-        # ideally you would delete from Pinecone, but for now we just clear the session source
+        # Really delete the uploaded document's vectors (and stop/forget its ingestion), then clear the session
+        if st.session_state.get("ingest_job"):
+            job_manager.cancel(st.session_state.ingest_job)
+        if st.session_state.get("current_source"):
+            job_manager.delete_document(st.session_state.current_source)
         st.session_state.current_source = None
+        st.session_state.ingest_job = None
         st.session_state.messages = []
         st.success("Memory Wiped.")
         time.sleep(1)
@@ -86,25 +90,29 @@ with st.sidebar:
     if uploaded_file:
         # Check if it's a new file
         if "current_source" not in st.session_state or st.session_state.current_source != uploaded_file.name:
-            with st.status("⚙️ Ingesting Document...", expanded=True) as status:
-                st.write("📖 Reading Text...")
-                pdf = PdfReader(uploaded_file)
-                text = ""
-                for page in pdf.pages:
-                    text += page.extract_text() or ""
-                
-                st.write("🧠 Memorizing...")
-                # Chunking
-                chunk_size = 1000
-                chunks = [text[i:i+chunk_size] for i in range(0, len(text), chunk_size)]
-                
-                # We tag the data with the filename so we only search THIS file later
-                for chunk in chunks:
-                    # Ingest with a specific tag
-                    rag_engine.ingest_text(f"SOURCE_FILE: {uploaded_file.name} | CONTENT: {chunk}")
-                
-                st.session_state.current_source = uploaded_file.name
-                status.update(label="✅ Ready", state="complete", expanded=False)
+            # Ingest in the background (same bytes are only ingested once); chat keeps working
+            # and the document's own namespace is searchable while chunks land
+            job = job_manager.submit_pdf(uploaded_file, uploaded_file.name)
+            st.session_state.ingest_job = job.id
+            st.session_state.current_source = job.source
+
+    @st.fragment(run_every=1.0)
+    def ingest_status():
+        job = job_manager.get(st.session_state.get("ingest_job"))
+        if not job:
+            return
+        if job.status in ("queued", "running"):
+            st.progress(job.progress, text=f"⚙️ {job.source}: {job.pages_done}/{job.total_pages or '?'} pages")
+            if st.button("✖ Cancel ingestion"):
+                job_manager.cancel(job.id)
+        elif job.status == "done":
+            st.success(f"✅ Ready: {job.source} ({job.chunks} chunks)")
+        elif job.status == "cancelled":
+            st.warning(f"Cancelled: {job.source}")
+        else:
+            st.error(f"Ingestion failed: {job.error}")
+
+    ingest_status()
 
 # --- MAIN CHAT ---
 st.title("🤖 JARVIS PDF Chat")
@@ -146,13 +154,11 @@ if user_text:
         status.markdown("🔵 *Searching PDF...*")
         
         # --- FIX: Strict Search ---
-        # We append the filename to the search query to prioritize the current PDF
-        search_query = f"{user_text}"
-        if "current_source" in st.session_state:
-            # We add context to the retrieval query
-            search_query += f" {st.session_state.current_source}"
-            
-        context_data = rag_engine.retrieve(search_query)
+        # Only scan the current PDF's namespace
+        if st.session_state.get("current_source"):
+            context_data = rag_engine.retrieve(user_text, namespace=rag_engine.doc_namespace(st.session_state.current_source))
+        else:
+            context_data = rag_engine.retrieve(user_text)
         
         # --- FIX: Strict Prompt ---
         # Explicitly tell it to IGNORE outside knowledge if it conflicts